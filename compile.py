@@ -1,4 +1,6 @@
-from compiler import Generator, Parser, Scanner, Typer
+from compiler import Generator, Parser, Scanner
+from compiler.pass_manager import FoldPass, GeneratePass, PassManager, TypePass
+from compiler.util import SourceFile
 from tests.test_util import open_file
 
 # Load a program string,
@@ -9,6 +11,8 @@ main(){
 
 }
 """
+# Share the program between all stages, e.g. for their error messages
+program = SourceFile(program)
 
 # Perform scanning on the input program
 scanner = Scanner(program)
@@ -18,9 +22,11 @@ tokens = scanner.scan()
 parser = Parser(program)
 tree = parser.parse(tokens)
 
-# Perform typing on the AST
-typer = Typer(program)
-typer.type(tree)
+# Perform typing on the AST, fold its constant expressions, and generate the SSM code.
+# The passes share the analyses of the tree, e.g. the frame size of every function
+generate = GeneratePass(program)
+manager = PassManager([TypePass(program), FoldPass(), generate])
+manager.run(tree)
 
 # Print out the typed tree
 print("=" * 25)
@@ -28,12 +34,14 @@ print("Program:")
 print("=" * 25)
 print(tree)
 
-# Generate the SSM Code
-generator = Generator(program)
-ssm_code = generator.generate(tree)
+# Print out the time spent in every pass
+print("=" * 25)
+print("Passes:")
+print("=" * 25)
+print(manager.report())
 
 # Execute the SSM Code
-out = generator.run(ssm_code, gui=False)
+out = Generator(program).run(generate.ssm_code, gui=False)
 
 # Print out the final output
 print("=" * 25)
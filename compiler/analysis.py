@@ -0,0 +1,181 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple, Type
+
+from compiler.generation.ownership import Ownership, OwnershipChecker
+from compiler.generation.utils import ForCounterVisitor, ForDepthVisitor
+from compiler.tree.printer import Renderings
+from compiler.tree.tree import ForNode, FunDeclNode, Node, SPLNode
+from compiler.typer.call_graph import CallGraph
+
+
+class Analysis:
+    """
+    Information computed from a node without modifying it, e.g. the number of local variables of a
+    FunDeclNode. Analyses are not computed directly, but through an AnalysisManager, which caches
+    the result per node, such that other passes can reuse it.
+
+    `node_class` is the class of the nodes that the analysis applies to. For a program, the
+    analysis is computed for the program itself, or for each of its top-level declarations.
+    """
+
+    node_class: type = Node
+
+    def run(self, node: Node, analyses: "AnalysisManager"):
+        raise NotImplementedError()
+
+
+class ForNestingAnalysis(Analysis):
+    """The maximum number of nested for loops in a function, i.e. the number of loop variables
+    that are in use at the same time."""
+
+    node_class = FunDeclNode
+
+    def run(self, node: FunDeclNode, analyses: "AnalysisManager") -> int:
+        return ForCounterVisitor().count(node)
+
+
+class FrameSizeAnalysis(Analysis):
+    """The number of local variables of a function, including the loop variables."""
+
+    node_class = FunDeclNode
+
+    def run(self, node: FunDeclNode, analyses: "AnalysisManager") -> int:
+        return len(node.var_decl) + analyses.get(ForNestingAnalysis, node)
+
+
+@dataclass
+class FrameLayout:
+    """
+    The offsets relative to MP of the variables of a function. Arguments are below MP, with the
+    first argument furthest away, and local variables are above MP, followed by the variables
+    of the (nested) for loops. Loops at the same depth share the slot of their variable.
+    """
+
+    arguments: Dict[str, int]
+    locals: Dict[str, int]
+    # The loop variable and its offset per ForNode, by node id
+    loops: Dict[int, Tuple[str, int]]
+
+    def offset(self, node: ForNode) -> int:
+        """The offset of the variable of the for loop `node`."""
+        return self.loops[id(node)][1]
+
+    def __str__(self) -> str:
+        slots = [
+            *((offset, name) for name, offset in self.arguments.items()),
+            *((offset, name) for name, offset in self.locals.items()),
+            *sorted(set((offset, name) for name, offset in self.loops.values())),
+        ]
+        return "\n".join(f"MP{offset:+d}  {name}" for offset, name in slots)
+
+
+class FrameLayoutAnalysis(Analysis):
+    """The offsets of the arguments, local variables and loop variables of a function."""
+
+    node_class = FunDeclNode
+
+    def run(self, node: FunDeclNode, analyses: "AnalysisManager") -> FrameLayout:
+        args = node.args.items if node.args else []
+        arguments = {
+            token.text: index - len(args) - 1 for index, token in enumerate(args)
+        }
+        # Local variables are positive relative to MP, starting from 1
+        local = {
+            var_decl.id.text: offset
+            for offset, var_decl in enumerate(node.var_decl, start=1)
+        }
+        loops = {
+            key: (loop.id.text, len(local) + depth)
+            for key, (loop, depth) in ForDepthVisitor().assign(node).items()
+        }
+        return FrameLayout(arguments, local, loops)
+
+
+class CallGraphAnalysis(Analysis):
+    """The dependencies between the top-level declarations of a program."""
+
+    node_class = SPLNode
+
+    def run(self, node: SPLNode, analyses: "AnalysisManager") -> CallGraph:
+        return CallGraph(node)
+
+
+class OwnershipAnalysis(Analysis):
+    """The `:` operations of a typed program that do not need to copy their list."""
+
+    node_class = SPLNode
+
+    def run(self, node: SPLNode, analyses: "AnalysisManager") -> Ownership:
+        return OwnershipChecker().check(node)
+
+
+class AnalysisManager:
+    """
+    A cache of analysis results per node. Results remain valid until `invalidate` is called,
+    generally by the PassManager after a pass reports that it changed the tree.
+    """
+
+    def __init__(self) -> None:
+        # Mapping of analyses to the results by node id. The node is stored as well, such that
+        # a reused id is not mistaken for the same node.
+        self.results: Dict[Type[Analysis], Dict[int, Tuple[Node, object]]] = {}
+        self.hits = 0
+        self.misses = 0
+        # Renderings of the nodes of the tree by the Printer, see `Printer.render`
+        self.renderings: Renderings = {}
+
+    def get(self, analysis: Type[Analysis], node: Node):
+        """Get the result of `analysis` for `node`, computing it if it is not cached.
+
+        Args:
+            analysis (Type[Analysis]): The class of the analysis.
+            node (Node): The node to analyse, an instance of `analysis.node_class`.
+
+        Returns:
+            The result of the analysis.
+        """
+        results = self.results.setdefault(analysis, {})
+        entry = results.get(id(node))
+        if entry is not None and entry[0] is node:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        result = analysis().run(node, self)
+        results[id(node)] = (node, result)
+        return result
+
+    def compute(self, analysis: Type[Analysis], tree: Node) -> None:
+        """Ensure that `analysis` is computed for `tree`, or for its top-level declarations
+        that it applies to."""
+        if isinstance(tree, analysis.node_class):
+            self.get(analysis, tree)
+        elif isinstance(tree, SPLNode):
+            for declaration in tree.body:
+                if isinstance(declaration, analysis.node_class):
+                    self.get(analysis, declaration)
+
+    def invalidate(
+        self,
+        preserved: Iterable[Type[Analysis]] = (),
+        nodes: Optional[Iterable[Node]] = None,
+    ) -> None:
+        """Discard cached results, except for the `preserved` analyses. All renderings are
+        discarded, as a change to any node also changes how the nodes containing it print.
+
+        Args:
+            preserved (Iterable[Type[Analysis]], optional): The analyses that remain valid.
+                Defaults to ().
+            nodes (Optional[Iterable[Node]], optional): The nodes for which results are
+                discarded. Defaults to None, i.e. all nodes.
+        """
+        self.renderings.clear()
+        preserved = set(preserved)
+        for analysis, results in self.results.items():
+            if analysis in preserved:
+                continue
+            if nodes is None:
+                results.clear()
+            else:
+                for node in nodes:
+                    results.pop(id(node), None)
@@ -0,0 +1,131 @@
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Optional
+
+from compiler.tree.tree import (  # isort:skip
+    BoolTypeNode,
+    CharTypeNode,
+    FunTypeNode,
+    IntTypeNode,
+    ListNode,
+    PolymorphicTypeNode,
+    TypeNode,
+    VoidTypeNode,
+)
+
+
+@dataclass(frozen=True)
+class BuiltInFunction:
+    """
+    A function that is provided by the compiler, rather than declared in the program.
+
+    `type` is a type scheme: Every compilation receives its own copy with fresh polymorphic types,
+    as the Typer updates the function types in its context in-place.
+
+    `codegen` is the name of the strategy used by the GeneratorYielder to produce a call to
+    this function, i.e. its method `built_in_{codegen}`, which may use `operand`. The std-lib
+    routines in `std_lib` are included in the output whenever the function is called.
+    """
+
+    name: str
+    type: FunTypeNode
+    codegen: str
+    operand: Optional[str | int] = None
+    std_lib: FrozenSet[str] = field(default_factory=frozenset)
+
+    def instantiate(self) -> FunTypeNode:
+        """Copy the type scheme of this function, using fresh polymorphic types. Parts of the
+        scheme without polymorphic types are never updated by the Typer, and are shared.
+
+        Returns:
+            FunTypeNode: A copy of `type` that can be used in a single compilation.
+        """
+        fresh = {}
+
+        def copy(node: TypeNode) -> TypeNode:
+            match node:
+                case PolymorphicTypeNode():
+                    return fresh.setdefault(node.id, PolymorphicTypeNode.fresh())
+                case ListNode():
+                    body = copy(node.body)
+                    if body is not node.body:
+                        return ListNode(body)
+                case FunTypeNode():
+                    types = [copy(_type) for _type in node.types]
+                    ret_type = copy(node.ret_type)
+                    if ret_type is not node.ret_type or any(
+                        new is not old for new, old in zip(types, node.types)
+                    ):
+                        return FunTypeNode(types, ret_type)
+            return node
+
+        return copy(self.type)
+
+
+BUILT_IN_FUNCTIONS: Dict[str, BuiltInFunction] = {
+    built_in.name: built_in
+    for built_in in [
+        BuiltInFunction(
+            "print",
+            FunTypeNode([PolymorphicTypeNode.fresh()], VoidTypeNode()),
+            codegen="specialized",
+        ),
+        BuiltInFunction(
+            "println",
+            FunTypeNode([PolymorphicTypeNode.fresh()], VoidTypeNode()),
+            codegen="println",
+        ),
+        BuiltInFunction(
+            "isEmpty",
+            FunTypeNode([ListNode(PolymorphicTypeNode.fresh())], BoolTypeNode()),
+            codegen="std_lib_call",
+            operand="_is_empty",
+            std_lib=frozenset({"_is_empty"}),
+        ),
+        BuiltInFunction(
+            "get_Int",
+            FunTypeNode([], IntTypeNode()),
+            codegen="trap",
+            operand=10,
+        ),
+        BuiltInFunction(
+            "get_Chr",
+            FunTypeNode([], CharTypeNode()),
+            codegen="trap",
+            operand=11,
+        ),
+        BuiltInFunction(
+            "get_Str",
+            FunTypeNode([], ListNode(CharTypeNode())),
+            codegen="get_Str",
+            std_lib=frozenset({"_get_Str"}),
+        ),
+        BuiltInFunction(
+            "exit",
+            FunTypeNode([], ListNode(VoidTypeNode())),
+            codegen="halt",
+        ),
+        BuiltInFunction(
+            "length",
+            FunTypeNode([ListNode(PolymorphicTypeNode.fresh())], IntTypeNode()),
+            codegen="std_lib_call",
+            operand="_length",
+            std_lib=frozenset({"_length"}),
+        ),
+        # Characters and integers share their representation
+        BuiltInFunction(
+            "ord",
+            FunTypeNode([CharTypeNode()], IntTypeNode()),
+            codegen="identity",
+        ),
+        BuiltInFunction(
+            "chr",
+            FunTypeNode([IntTypeNode()], CharTypeNode()),
+            codegen="identity",
+        ),
+        BuiltInFunction(
+            "bool",
+            FunTypeNode([PolymorphicTypeNode.fresh()], BoolTypeNode()),
+            codegen="specialized",
+        ),
+    ]
+}
@@ -1,15 +1,24 @@
+import heapq
 import sys
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
 
-from compiler.util import Colors, Span
+from compiler.error.diagnostic import Diagnostic, Severity
+from compiler.util import Colors, SourceFile, Span
 
 
 # Class used to create messages, which can be communicated to the programmer
 class Communicator:
+    # Callbacks that receive every error and warning as a Diagnostic when it is produced
+    listeners: List[Callable[[Diagnostic], None]] = []
+    # Whether messages are rendered for the programmer when communicating
+    render = True
 
     # Creates an appropriate message string from the given arguments
     @staticmethod
     def create_message(
-        program: str,
+        program: str | SourceFile,
         span: Span,
         class_name="CompilerError",
         before: str = "",
@@ -18,10 +27,10 @@ class Communicator:
         n_after: int = 1,
         color=Colors.RED,
     ) -> str:
-        lines = program.splitlines()
-        error_lines = lines[
-            max(0, span.start_ln - n_before - 1) : span.end_ln + n_after
-        ]
+        # Only the shown lines are taken from the program
+        error_lines = SourceFile.of(program).lines(
+            span.start_ln - n_before, span.end_ln + n_after
+        )
         final_error_lines = []
         start_line_no = max(1, span.start_ln - n_before)
         end_line_no = start_line_no + len(error_lines) - 1
@@ -73,72 +82,176 @@ class Communicator:
 
     # Communicates all warnings and errors to the programmer
     # In case of any errors, the compiler will stop with an exception
+    # Messages are only rendered here, and only for the diagnostics that are shown
     @staticmethod
     def communicate(stage_of_exception) -> None:
-        ErrorRaiser.__combine_errors__()
+        if not Communicator.render:
+            n_errors = len(ErrorRaiser.ERRORS)
+            WarningRaiser.WARNINGS.clear()
+            ErrorRaiser.ERRORS.clear()
+            if n_errors:
+                raise stage_of_exception(
+                    f"Compilation failed with {n_errors} error{'s' if n_errors > 1 else ''}."
+                )
+            return
 
         warnings = "".join(
-            [str(warning) + "\n\n" for warning in WarningRaiser.WARNINGS[:10]]
+            [str(warning) + "\n\n" for warning in WarningRaiser.WARNINGS]
         )
         if warnings:
-            if len(WarningRaiser.WARNINGS) > 10:
-                omitting_multiple_warnings = len(WarningRaiser.WARNINGS) - 10 > 1
-                warnings += f"Showing 10 warnings, omitting {len(WarningRaiser.WARNINGS)-10} warning{'s' if omitting_multiple_warnings else ''}..."
+            n_omitted = WarningRaiser.WARNINGS.n_omitted
+            if n_omitted:
+                warnings += f"Showing {WarningRaiser.WARNINGS.limit} warnings, omitting {n_omitted} warning{'s' if n_omitted > 1 else ''}..."
             WarningRaiser.WARNINGS.clear()
             print(warnings, end="")
 
-        errors = "".join(["\n\n" + str(error) for error in ErrorRaiser.ERRORS[:10]])
+        errors = "".join(["\n\n" + str(error) for error in ErrorRaiser.ERRORS])
         if errors:
             sys.tracebacklimit = -1
-            if len(ErrorRaiser.ERRORS) > 10:
-                omitting_multiple_errors = len(ErrorRaiser.ERRORS) - 10 > 1
-                errors += f"\n\nShowing 10 errors, omitting {len(ErrorRaiser.ERRORS)-10} error{'s' if omitting_multiple_errors else ''}..."
+            n_omitted = ErrorRaiser.ERRORS.n_omitted
+            if n_omitted:
+                errors += f"\n\nShowing {ErrorRaiser.ERRORS.limit} errors, omitting {n_omitted} error{'s' if n_omitted > 1 else ''}..."
             ErrorRaiser.ERRORS.clear()
             raise stage_of_exception(errors)
 
+    @classmethod
+    @contextmanager
+    def listen(cls, callback: Callable[[Diagnostic], None], render: bool = True):
+        """Call `callback` with a Diagnostic for every error and warning that is produced in
+        this context, as soon as it is produced.
 
-# Used to store all the accumulated warnings
-class WarningRaiser:
-    WARNINGS = []
+        Args:
+            callback (Callable[[Diagnostic], None]): The function to call, e.g. `list.append`.
+            render (bool, optional): Whether messages are still rendered for the programmer.
+                If False, warnings are not printed, and exceptions only state the number of
+                errors. Defaults to True.
+        """
+        previous_render = cls.render
+        cls.listeners.append(callback)
+        cls.render = cls.render and render
+        try:
+            yield
+        finally:
+            cls.listeners.remove(callback)
+            cls.render = previous_render
 
+    @staticmethod
+    def describe(diagnostic, severity: Severity) -> Diagnostic:
+        """Convert an error or warning into a Diagnostic, without rendering its message."""
+        message = diagnostic.message
+        return Diagnostic(
+            type(diagnostic).__name__,
+            severity,
+            message.category,
+            message.span,
+            message.before,
+            message.after,
+        )
 
-# Used to store all the accumulated errors and combine UnexpectedCharacterError
-class ErrorRaiser:
-    ERRORS = []
 
-    @staticmethod
-    def __combine_errors__() -> None:
-        from compiler.error.error import CompilerError
-        from compiler.error.scanner_error import UnexpectedCharacterError
-
-        # Check if we have any consecutive UnexpectedCharacterError
-        # First sort on line_no, and then on start of the error in the line
-        # If error object has no span attribute, then sort it on top
-        ErrorRaiser.ERRORS.sort(
-            key=lambda error: (error.span.start_ln, error.span.start_col)
-            if isinstance(error, CompilerError)
-            else (0, 0)
+@dataclass(frozen=True)
+class Message:
+    """
+    The parts of the message of an error or warning, which every error and warning stores when
+    it is created. `before` and `after` are shown before and after the lines of the program
+    around `span`, or `before` is shown on its own if there is no span.
+    """
+
+    category: str
+    span: Optional[Span]
+    before: str
+    after: str = ""
+    n_after: int = 1
+    color: str = Colors.RED
+
+    def render(self, program: str | SourceFile) -> str:
+        if self.span is None:
+            return self.before
+        return Communicator.create_message(
+            program,
+            self.span,
+            self.category,
+            self.before,
+            self.after,
+            n_after=self.n_after,
+            color=self.color,
         )
 
-        length = len(ErrorRaiser.ERRORS)
-        i = 0
-        while i < length - 1:
-            # Ensure that consecutive objects are the (1) same error, (2) have same line_no and (3) are next to eachothers
-            current_error = ErrorRaiser.ERRORS[i]
-            next_error = ErrorRaiser.ERRORS[i + 1]
-            if (
-                isinstance(current_error, UnexpectedCharacterError)
-                and isinstance(next_error, UnexpectedCharacterError)
-                and current_error.span.start_ln == next_error.span.start_ln
-                and current_error.span.end_col == next_error.span.start_col
-            ):
-
-                # Reuse current_error to prevent additional call to __post_init__ on object creation
-                next_error.span = Span(
-                    line_no=(current_error.span.start_ln, current_error.span.end_ln),
-                    span=(current_error.span.start_col, next_error.span.end_col),
-                )
-                del ErrorRaiser.ERRORS[i]
-                length -= 1
-            else:
-                i += 1
+
+class Diagnostics:
+    """
+    A bounded collection of errors or warnings. Every diagnostic is counted, but only the
+    `limit` diagnostics that are shown first are kept (or all if `limit` is None), i.e. those
+    with the lowest `key`, or the first ones added if there is no `key`. Iterating gives the
+    kept diagnostics in that order.
+    """
+
+    def __init__(
+        self,
+        limit: Optional[int] = 10,
+        key: Optional[Callable] = None,
+        severity: Optional[Severity] = None,
+    ) -> None:
+        self.limit = limit
+        self.key = key
+        # The severity with which diagnostics are passed to the listeners of the Communicator,
+        # or None if they are not passed on, e.g. if they are added to another collection later
+        self.severity = severity
+        self.count = 0
+        # A max-heap of the kept diagnostics, using negated keys and insertion indices,
+        # such that the diagnostic that is shown last can be dropped in logarithmic time
+        self.heap: List[Tuple[Tuple[int, ...], int, object]] = []
+
+    def append(self, diagnostic) -> None:
+        if self.severity and Communicator.listeners:
+            described = Communicator.describe(diagnostic, self.severity)
+            for listener in Communicator.listeners:
+                listener(described)
+
+        key = self.key(diagnostic) if self.key else ()
+        self.count += 1
+        item = (tuple(-value for value in key), -self.count, diagnostic)
+        if self.limit is None or len(self.heap) < self.limit:
+            heapq.heappush(self.heap, item)
+        elif item > self.heap[0]:
+            heapq.heapreplace(self.heap, item)
+
+    def extend(self, diagnostics: Iterable) -> None:
+        for diagnostic in diagnostics:
+            self.append(diagnostic)
+        # Diagnostics that were already dropped from `diagnostics` are still counted
+        if isinstance(diagnostics, Diagnostics):
+            self.count += diagnostics.n_omitted
+
+    @property
+    def n_omitted(self) -> int:
+        return self.count - len(self.heap)
+
+    def clear(self) -> None:
+        self.count = 0
+        self.heap.clear()
+
+    def __iter__(self) -> Iterator:
+        return (diagnostic for *_, diagnostic in sorted(self.heap, reverse=True))
+
+    def __len__(self) -> int:
+        return self.count
+
+
+# Errors are shown in the order of their location, and errors without a location first
+def error_position(error) -> Tuple[int, int]:
+    from compiler.error.error import CompilerError
+
+    if isinstance(error, CompilerError):
+        return (error.span.start_ln, error.span.start_col)
+    return (0, 0)
+
+
+# Used to store all the accumulated warnings
+class WarningRaiser:
+    WARNINGS = Diagnostics(severity=Severity.WARNING)
+
+
+# Used to store all the accumulated errors
+class ErrorRaiser:
+    ERRORS = Diagnostics(key=error_position, severity=Severity.ERROR)
@@ -0,0 +1,106 @@
+import json
+from dataclasses import dataclass
+from enum import Enum
+from typing import Iterator, Optional, TextIO
+
+from compiler.util import SourceFile, Span
+
+
+class Severity(str, Enum):
+    ERROR = "error"
+    WARNING = "warning"
+
+
+@dataclass(slots=True)
+class Diagnostic:
+    """
+    A structured error or warning, for tools that handle diagnostics themselves rather than
+    reading the messages that are shown to the programmer.
+
+    `code` is the name of the class of the original error or warning, e.g. "LonelyQuoteError",
+    and `category` is the name that is shown in its message, e.g. "ScannerError". `message` and
+    `note` are the text shown before and after the lines of the program, without any colors.
+    """
+
+    code: str
+    severity: Severity
+    category: str
+    span: Optional[Span]
+    message: str
+    note: str = ""
+
+    def to_dict(self) -> dict:
+        span = None
+        if self.span:
+            span = {
+                "start_line": self.span.start_ln,
+                "start_col": self.span.start_col,
+                "end_line": self.span.end_ln,
+                "end_col": self.span.end_col,
+            }
+        return {
+            "code": self.code,
+            "severity": self.severity.value,
+            "category": self.category,
+            "span": span,
+            "message": self.message,
+            "note": self.note,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+
+class JsonLinesWriter:
+    """
+    Write diagnostics to a stream as JSON Lines as they are produced, e.g. for batch mode:
+
+    >>> with Communicator.listen(JsonLinesWriter(sys.stdout), render=False):
+    ...     tokens = Scanner(program).scan()
+    """
+
+    def __init__(self, stream: TextIO) -> None:
+        self.stream = stream
+
+    def __call__(self, diagnostic: Diagnostic) -> None:
+        self.stream.write(diagnostic.to_json() + "\n")
+
+
+def check(program: str | SourceFile) -> Iterator[Diagnostic]:
+    """Scan, parse, type and generate code for `program`, and yield the diagnostics of every
+    stage once that stage is done, such that they can be handled before compilation finishes.
+    The stages stop after the first stage that fails. Messages are not rendered for humans.
+
+    Args:
+        program (str | SourceFile): The program to check.
+
+    Yields:
+        Iterator[Diagnostic]: The errors and warnings, in the order they are produced.
+    """
+    # Prevent circular imports
+    from compiler.error.communicator import Communicator
+    from compiler.error.error import CompilerException
+    from compiler.generation.generator import Generator
+    from compiler.parser.parser import Parser
+    from compiler.scanner.scanner import Scanner
+    from compiler.typer.typer import Typer
+
+    source = SourceFile.of(program)
+    stages = (
+        lambda _: Scanner(source).scan(),
+        lambda tokens: Parser(source).parse(tokens),
+        lambda tree: Typer(source).type(tree),
+        lambda tree: Generator(source).generate(tree),
+    )
+    output = None
+    for stage in stages:
+        diagnostics = []
+        with Communicator.listen(diagnostics.append, render=False):
+            try:
+                output = stage(output)
+                failed = False
+            except CompilerException:
+                failed = True
+        yield from diagnostics
+        if failed:
+            return
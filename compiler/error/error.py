@@ -1,7 +1,7 @@
 from dataclasses import KW_ONLY, dataclass, field
 
-from compiler.error.communicator import Communicator, ErrorRaiser
-from compiler.util import Span
+from compiler.error.communicator import ErrorRaiser, Message
+from compiler.util import SourceFile, Span
 
 
 # Python exceptions to differentiate the stage in which errors are thrown
@@ -11,26 +11,28 @@ class CompilerException(Exception):
 
 @dataclass
 class CompilerError:
-    program: str
+    program: SourceFile
     span: Span
     n_before: int = field(init=False, default=1)
     n_after: int = field(init=False, default=1)
 
     # Call __post_init__ using dataclass, to automatically add errors to the list
     def __post_init__(self) -> None:
+        self.message = self.describe()
         ErrorRaiser.ERRORS.append(self)
 
+    def __str__(self) -> str:
+        return self.message.render(self.program)
+
     def create_error(
         self, before: str = "", after: str = "", class_name="CompilerError"
-    ):
-        return Communicator.create_message(
-            self.program, self.span, class_name, before, after
-        )
+    ) -> Message:
+        return Message(class_name, self.span, before, after)
 
     # Give the characters that caused the error to be thrown
     @property
     def error_chars(self) -> str:
-        error_line = self.program.splitlines()[self.span.start_ln - 1]
+        error_line = SourceFile.of(self.program).line(self.span.start_ln)
         return error_line[self.span.start_col : self.span.end_col]
 
     @property
@@ -72,13 +74,13 @@ class CompilerError:
 class UnrecoverableError(CompilerError):
     error_message: str
     _: KW_ONLY
-    program: str = field(default="")
+    program: SourceFile = field(default_factory=lambda: SourceFile(""))
     span: Span = field(default_factory=Span.default)
 
-    def __str__(self) -> str:
-        return self.error_message
+    def describe(self) -> Message:
+        return Message("CompilerError", None, self.error_message)
 
     # Add the error to the list, and immediately raise it
     def __post_init__(self) -> None:
-        ErrorRaiser.ERRORS.append(self)
+        super().__post_init__()
         Communicator.communicate(CompilerException)
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 
+from compiler.error.communicator import Message
 from compiler.error.error import CompilerError, CompilerException
 
 
@@ -16,7 +17,7 @@ class GeneratorError(CompilerError):
 class OverFlowError(GeneratorError):
     integer_value: int
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         return self.create_error(
             f"The value {self.integer_value} does not fit into SSM memory."
         )
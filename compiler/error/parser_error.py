@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 from typing import List
 
+from compiler.error.communicator import Message
 from compiler.error.error import CompilerError, CompilerException
 from compiler.token import Token
 from compiler.type import Type
@@ -19,28 +20,28 @@ class BracketMismatchError(CompilerError):
 
 
 class UnclosedBracketError(BracketMismatchError):
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         return self.create_error(
             f"The {str(self.bracket)} bracket on {self.span.lines_str} was never closed."
         )
 
 
 class UnopenedBracketError(BracketMismatchError):
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         return self.create_error(
             f"The {str(self.bracket)} bracket on {self.span.lines_str} was never opened."
         )
 
 
 class ClosedWrongBracketError(BracketMismatchError):
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         return self.create_error(
             f"The {str(self.bracket)} bracket on {self.span.lines_str} closes the wrong type of bracket."
         )
 
 
 class OpenedWrongBracketError(BracketMismatchError):
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         return self.create_error(
             f"The {str(self.bracket)} bracket on {self.span.lines_str} opens the wrong type of bracket."
         )
@@ -52,7 +53,7 @@ class ParseError(CompilerError):
     expected: List
     got: Token
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         after = ""
         if isinstance(self.expected[0], Type):
             after = f"Expected {self.expected[0].article_str()}"
@@ -1,3 +1,4 @@
+from compiler.error.communicator import Message
 from compiler.error.error import CompilerError, CompilerException
 
 
@@ -11,14 +12,14 @@ class ScannerError(CompilerError):
 
 
 class UnmatchableTokenError(ScannerError):
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         return self.create_error(
             f"Unexpected lack of token match on {self.span.lines_str}."
         )
 
 
 class UnexpectedCharacterError(ScannerError):
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         multiple_unexpected_chars = self.span.multiline
         return self.create_error(
             f"Unexpected character{'s' if multiple_unexpected_chars else ''} {self.error_chars!r} on {self.span.lines_str}."
@@ -26,19 +27,19 @@ class UnexpectedCharacterError(ScannerError):
 
 
 class DanglingMultiLineCommentError(ScannerError):
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         return self.create_error(
             f"Found dangling multiline comment on {self.span.lines_str}."
         )
 
 
 class LonelyQuoteError(ScannerError):
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         return self.create_error(f"Found lonely quote on {self.span.lines_str}.")
 
 
 class CharacterSlashError(ScannerError):
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         return self.create_error(
             f"Cannot use single slash as a character on {self.span.lines_str}. Use '\\\\' instead.",
             "The single slash is escaping the quote.",
@@ -46,5 +47,5 @@ class CharacterSlashError(ScannerError):
 
 
 class EmptyQuoteError(ScannerError):
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         return self.create_error(f"Found empty quote on {self.span.lines_str}.")
@@ -1,9 +1,10 @@
 from dataclasses import dataclass
 from typing import List
 
-from compiler.error.error import CompilerError, CompilerException, ErrorRaiser
+from compiler.error.communicator import ErrorRaiser, Message
+from compiler.error.error import CompilerException
 from compiler.token import Token
-from compiler.util import Span
+from compiler.util import SourceFile, Span
 
 from compiler.tree.tree import (  # isort:skip
     CommaListNode,
@@ -17,6 +18,7 @@ from compiler.tree.tree import (  # isort:skip
     Op2Node,
     ReturnNode,
     StmtAssNode,
+    StringLiteralNode,
     TupleNode,
     TypeNode,
     VarDeclNode,
@@ -30,37 +32,70 @@ class TyperException(CompilerException):
 
 
 # Failed to unify two types
+# Rather than constructing an error factory for every unification, the Typer passes a lightweight
+# "error frame": a tuple of a UnificationError subclass and its arguments, describing why two types
+# are unified, e.g. `(ReturnUnifyErrorFactory, tree)`. The frame is only materialized into an
+# error factory when the unification fails.
 class UnificationError:
     type_one = None
     type_two = None
     program = ""
     function = None
 
+    @staticmethod
+    def materialize(error_factory) -> "UnificationError":
+        """Convert an error frame, error factory class or error factory into an error factory.
+
+        Args:
+            error_factory: A tuple of a UnificationError subclass and its arguments, a
+                UnificationError subclass, or a UnificationError instance.
+
+        Returns:
+            UnificationError: The error factory, on which `build` can be called.
+        """
+        match error_factory:
+            case UnificationError():
+                return error_factory
+            case (factory, *args):
+                return factory(*args)
+            case type() if issubclass(error_factory, UnificationError):
+                return error_factory()
+        # If no (correct) error_factory was provided, then just use a default one that simply
+        # states that the two types cannot unify.
+        return DefaultUnifyErrorFactory()
+
     def build(
         self,
         type_one: TypeNode,
         type_two: TypeNode,
-        program: str,
+        program: SourceFile,
         function: FunDeclNode,
     ):
         self.type_one = type_one
         self.type_two = type_two
         self.program = program
         self.function = function
+        self.message = self.describe()
         ErrorRaiser.ERRORS.append(self)
 
-    def create_error(self, before: str, span: Span, after: str = "") -> str:
-        return CompilerError(self.program, span).create_error(
-            before, after, "TypeError"
-        )
+    # Should only be called after build method has been used
+    def __str__(self) -> str:
+        return self.message.render(self.program)
+
+    def create_error(self, before: str, span: Span, after: str = "") -> Message:
+        return Message("TypeError", span, before, after)
 
 
 # This class should be avoided at all cost, since the error is very generic.
 class DefaultUnifyErrorFactory(UnificationError):
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         # Error occurred outside of a function
         if self.function == None:
-            return f"Failed to match type {str(self.type_two)!r} with expected type {str(self.type_one)!r}."
+            return Message(
+                "TypeError",
+                None,
+                f"Failed to match type {str(self.type_two)!r} with expected type {str(self.type_one)!r}.",
+            )
 
         before = f"Failed to match type {str(self.type_two)!r} with expected type {str(self.type_one)!r} in function {self.function.id.text!r}."
         return self.create_error(before, self.function.id.span)
@@ -70,7 +105,7 @@ class DefaultUnifyErrorFactory(UnificationError):
 class UnaryUnifyErrorFactory(UnificationError):
     unary_op: Op1Node
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         span = self.unary_op.operand.span & self.unary_op.operator.span
         before = f"Cannot match type {str(self.type_two)!r} with expected type {str(self.type_one)!r} for unary operation {str(self.unary_op.operator)!r} on {span.lines_str}."
         return self.create_error(before, span)
@@ -80,16 +115,25 @@ class UnaryUnifyErrorFactory(UnificationError):
 class BinaryUnifyErrorFactory(UnificationError):
     binary_op: Op2Node
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         before = f"Cannot match type {str(self.type_two)!r} with expected type {str(self.type_one)!r} for binary operation {str(self.binary_op.operator)!r} on {self.binary_op.span.lines_str}."
         return self.create_error(before, self.binary_op.span)
 
 
+@dataclass
+class StringUnifyErrorFactory(UnificationError):
+    string: StringLiteralNode
+
+    def describe(self) -> Message:
+        before = f"Cannot match type {str(self.type_two)!r} with expected type {str(self.type_one)!r} for string on {self.string.span.lines_str}."
+        return self.create_error(before, self.string.span)
+
+
 @dataclass
 class VariableDeclarationUnifyErrorFactory(UnificationError):
     var_decl: VarDeclNode
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         before = f"Cannot match type {str(self.type_two)!r} with expected type {str(self.type_one)!r} for variable declaration on {self.var_decl.span.lines_str}."
         return self.create_error(before, self.var_decl.span)
 
@@ -98,7 +142,7 @@ class VariableDeclarationUnifyErrorFactory(UnificationError):
 class VariableAssignmentUnifyErrorFactory(UnificationError):
     stmt_ass: StmtAssNode
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         before = f"Cannot match type {str(self.type_two)!r} with expected type {str(self.type_one)!r} for variable assignment on {self.stmt_ass.span.lines_str}."
         return self.create_error(before, self.stmt_ass.span)
 
@@ -107,7 +151,7 @@ class VariableAssignmentUnifyErrorFactory(UnificationError):
 class IfConditionUnifyErrorFactory(UnificationError):
     if_else: IfElseNode
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         before = f"Cannot match type {str(self.type_two)!r} with expected type {str(self.type_one)!r} for if-statement condition on {self.if_else.cond.span.lines_str}."
         return self.create_error(before, self.if_else.cond.span)
 
@@ -116,7 +160,7 @@ class IfConditionUnifyErrorFactory(UnificationError):
 class WhileConditionUnifyErrorFactory(UnificationError):
     while_: WhileNode
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         before = f"Cannot match type {str(self.type_two)!r} with expected type {str(self.type_one)!r} for while condition on {self.while_.cond.span.lines_str}."
         return self.create_error(before, self.while_.cond.span)
 
@@ -125,7 +169,7 @@ class WhileConditionUnifyErrorFactory(UnificationError):
 class FunCallUnifyErrorFactory(UnificationError):
     fun_call: FunCallNode
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         before = f"Cannot match type {str(self.type_two)!r} with expected type {str(self.type_one)!r} in the function call to {str(self.fun_call.func)!r} on {self.fun_call.args.span.lines_str}."
         return self.create_error(before, self.fun_call.args.span)
 
@@ -134,7 +178,7 @@ class FunCallUnifyErrorFactory(UnificationError):
 class FieldUnifyErrorFactory(UnificationError):
     var: VariableNode
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         before = f"Cannot match type {str(self.type_two)!r} with expected type {str(self.type_one)!r} when applying {str(self.var.field)!r} on {self.var.span.lines_str}."
         return self.create_error(before, self.var.span)
 
@@ -154,8 +198,7 @@ class ReturnUnifyErrorFactory(UnificationError):
             and self.token.span.ln[0] == self.token.span.ln[1]
         )
 
-    # Should only be called after build method has been used
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         # Lines on which the function is defined on
         lines = f"[{self.function.span.ln[0]}-{self.function.span.ln[1]}]"
         # Did we insert the return type?
@@ -194,7 +237,7 @@ class FunctionSignatureTypeError(UnificationError):
     function: FunDeclNode
     inferred_type: TypeNode = None
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         before = f"The given function type of the function {str(self.function.id)!r} does not match the inferred type {str(self.inferred_type)!r} on {self.function.type.span.lines_str}."
         after = f"Cannot match type {str(self.type_two)!r} with expected type {str(self.type_one)!r}."
         return self.create_error(before, self.function.type.span, after)
@@ -205,7 +248,7 @@ class ListAbbrError(UnificationError):
     bound: Node
     is_left: bool
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         if isinstance(self.type_one, tuple):
             expected = f"{str(self.type_one[0])!r} or {str(self.type_one[1])!r}"
         else:
@@ -218,7 +261,7 @@ class ListAbbrError(UnificationError):
 class IndexTypeError(UnificationError):
     index: IndexNode
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         before = f"Cannot match type {str(self.type_two)!r} with expected type {str(self.type_one)!r} for list indexing on {self.index.span.lines_str}."
         return self.create_error(before, self.index.exp.span)
 
@@ -226,22 +269,24 @@ class IndexTypeError(UnificationError):
 # Errors that occur within the type_node function of the Typer
 @dataclass
 class TypeNodeError:
-    program: str
+    program: SourceFile
 
     def __post_init__(self):
+        self.message = self.describe()
         ErrorRaiser.ERRORS.append(self)
 
-    def create_error(self, before: str, span: Span, after: str = "") -> str:
-        return CompilerError(self.program, span).create_error(
-            before, after, "TypeError"
-        )
+    def __str__(self) -> str:
+        return self.message.render(self.program)
+
+    def create_error(self, before: str, span: Span, after: str = "") -> Message:
+        return Message("TypeError", span, before, after)
 
 
 @dataclass
 class VariableError(TypeNodeError):
     token: Token
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         before = f"Unknown variable {self.token.text!r} found on line {self.token.span.start_ln}."
         return self.create_error(before, self.token.span)
 
@@ -250,7 +295,7 @@ class VariableError(TypeNodeError):
 class FunctionRedefinitionError(TypeNodeError):
     token: FunDeclNode
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         before = (
             f"The function {self.token.id.text!r} cannot be defined more than once."
         )
@@ -263,7 +308,7 @@ class DuplicateArgumentsDeclError(TypeNodeError):
     token: Token
     function: FunDeclNode
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         num_of_duplicate = sum(
             [
                 1
@@ -281,7 +326,7 @@ class WrongNumberOfArgumentsCallError(TypeNodeError):
     num_of_expected: int
     num_of_received: int
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         arg = "argument" if self.num_of_expected == 1 else "arguments"
         before = f"Expected {self.num_of_expected} {arg}, but got {self.num_of_received} when calling the function {self.function.func.text!r} on line {self.function.span.start_ln}."
         return self.create_error(before, self.function.span)
@@ -293,7 +338,7 @@ class WrongNumberOfArgumentsDeclError(TypeNodeError):
     num_of_args: int
     num_of_type_args: int
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         span = self.function.id.span & self.function.args.span & self.function.type.span
         arg_str = (
             f"{self.num_of_args} arguments"
@@ -314,7 +359,7 @@ class WrongNumberOfArgumentsDeclError(TypeNodeError):
 class RedefinitionOfVariableError(TypeNodeError):
     var_decl: VarDeclNode
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         before = f"Redefinition of the variable {self.var_decl.id.text!r} to {str(self.var_decl.exp)!r} is not allowed on line {self.var_decl.span.start_ln}."
         return self.create_error(before, self.var_decl.span)
 
@@ -323,7 +368,7 @@ class RedefinitionOfVariableError(TypeNodeError):
 class RedefinitionOfLoopVariableError(TypeNodeError):
     for_loop: ForNode
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         before = f"Redefinition of the variable {self.for_loop.id.text!r} as a loop variable is not allowed on line {self.for_loop.span.start_ln}."
         return self.create_error(before, self.for_loop.id.span)
 
@@ -332,7 +377,7 @@ class RedefinitionOfLoopVariableError(TypeNodeError):
 class UsageOfUndefinedFunctionError(TypeNodeError):
     function: FunCallNode
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         before = f"Function call to {self.function.func.text!r} on line {self.function.span.start_ln} is not allowed, because {self.function.func.text!r} is not defined."
         return self.create_error(before, self.function.span)
 
@@ -341,7 +386,7 @@ class UsageOfUndefinedFunctionError(TypeNodeError):
 class GlobalFunctionCallError(TypeNodeError):
     function: FunCallNode
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         before = f"Function call to {self.function.func.text!r} on line {self.function.span.start_ln} is not allowed, because the call is made in a global context."
         return self.create_error(before, self.function.span)
 
@@ -350,7 +395,7 @@ class GlobalFunctionCallError(TypeNodeError):
 class IllegalContinueBreakError(TypeNodeError):
     token: Token
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         before = f"'{self.token.text}' may only occur within a while or for-loop."
         return self.create_error(before, self.token.span)
 
@@ -359,7 +404,7 @@ class IllegalContinueBreakError(TypeNodeError):
 class VoidAssignmentError(TypeNodeError):
     var_decl: VarDeclNode
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         before = f"Cannot assign type 'Void' to a variable on {self.var_decl.span.lines_str}."
         return self.create_error(before, self.var_decl.span)
 
@@ -368,7 +413,7 @@ class VoidAssignmentError(TypeNodeError):
 class VoidReturnError(TypeNodeError):
     return_: ReturnNode
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         before = f"Cannot return type 'Void' on {self.return_.span.lines_str}."
         return self.create_error(before, self.return_.span)
 
@@ -377,7 +422,7 @@ class VoidReturnError(TypeNodeError):
 class VoidTupleError(TypeNodeError):
     tuple: TupleNode
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         before = f"Cannot place 'Void' in a tuple on {self.tuple.span.lines_str}."
         return self.create_error(before, self.tuple.span)
 
@@ -386,7 +431,7 @@ class VoidTupleError(TypeNodeError):
 class VoidOp2Error(TypeNodeError):
     operation: Op2Node
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         before = f"Cannot use 'Void' in a binary operation on {self.operation.span.lines_str}."
         return self.create_error(before, self.operation.span)
 
@@ -395,7 +440,7 @@ class VoidOp2Error(TypeNodeError):
 class VoidFunCallArgError(TypeNodeError):
     args: CommaListNode
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         before = f"Cannot use 'Void' as a function call argument on {self.args.span.lines_str}."
         return self.create_error(before, self.args.span)
 
@@ -415,7 +460,7 @@ class PolymorphicTypeCheckError(TypeNodeError):
         message += f"{str(nodes[-1])}'"
         return message
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         before = f"The given {self.node_list_to_str(self.original_types, True)} do not match the inferred {self.node_list_to_str(self.inferred_types)} for function {str(self.function.id)!r} on {self.function.id.span.lines_str}."
         span = self.original_types[0].span
         for type in self.original_types[1:]:
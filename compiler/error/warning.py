@@ -1,8 +1,8 @@
 from dataclasses import dataclass
 from typing import List
 
-from compiler.error.communicator import Communicator, WarningRaiser
-from compiler.util import Colors, Span
+from compiler.error.communicator import Message, WarningRaiser
+from compiler.util import Colors, SourceFile, Span
 
 from compiler.tree.tree import (  # isort:skip
     FunCallNode,
@@ -18,17 +18,19 @@ from compiler.tree.tree import (  # isort:skip
 
 @dataclass
 class Warning:
-    program: str
+    program: SourceFile
 
     def __post_init__(self) -> None:
+        self.message = self.describe()
         WarningRaiser.WARNINGS.append(self)
 
+    def __str__(self) -> str:
+        return self.message.render(self.program)
+
     def create_message(
         self, span: Span, before: str, after: str = "", n_after=1
-    ) -> str:
-        return Communicator.create_message(
-            self.program, span, "Warning", before, after, 1, n_after, Colors.YELLOW
-        )
+    ) -> Message:
+        return Message("Warning", span, before, after, n_after, Colors.YELLOW)
 
 
 @dataclass
@@ -36,7 +38,7 @@ class DeadCodeRemovalWarning(Warning):
     after_stmt: StmtNode
     removed: List[StmtNode]
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         span_limited = self.removed[0].span
         for statement in self.removed[1:4]:
             span_limited &= statement.span
@@ -75,14 +77,14 @@ class DeadCodeRemovalWarning(Warning):
 class InsertedReturnWarning(Warning):
     function: FunDeclNode
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         before = f"Added an empty return statement at the end of function {str(self.function.id)!r}."
         return self.create_message(self.function.id.span, before)
 
 
 @dataclass
 class NoMainFunctionWarning(Warning):
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         before = "No main function found. The given program will not execute."
         return self.create_message(Span(-1, (0, -1)), before)
 
@@ -91,6 +93,6 @@ class NoMainFunctionWarning(Warning):
 class MainCallWarning(Warning):
     function: FunCallNode
 
-    def __str__(self) -> str:
+    def describe(self) -> Message:
         before = "The function 'main' should not be called."
         return self.create_message(self.function.span, before)
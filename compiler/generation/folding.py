@@ -0,0 +1,265 @@
+from typing import Dict, List, Optional, Set
+
+from compiler.generation.peephole import INT_MIN
+from compiler.token import Token
+from compiler.tree.visitor import NodeTransformer, NodeVisitor
+from compiler.type import Type
+from compiler.util import Span
+
+from compiler.tree.tree import (  # isort:skip
+    ForNode,
+    FunCallNode,
+    FunDeclNode,
+    ListAbbrNode,
+    ListNode,
+    Node,
+    Op1Node,
+    Op2Node,
+    StmtAssNode,
+    VarDeclNode,
+)
+
+# List abbreviations with literal bounds of at most this many elements are written out as
+# a chain of `:`, rather than computed by a call to `_ListAbbr`
+MAX_ABBR_LENGTH = 16
+
+
+def wrap(value: int) -> int:
+    """Wrap `value` around to the 32-bit integers of SSM, e.g. 2**31 becomes -2**31."""
+    return (value - INT_MIN) % 2**32 + INT_MIN
+
+
+def truncate(left: int, right: int) -> int:
+    """Divide like SSM, i.e. rounding towards 0 rather than down."""
+    quotient = abs(left) // abs(right)
+    return quotient if (left < 0) == (right < 0) else -quotient
+
+
+def constant(node: Node | Token) -> Optional[int | bool | str]:
+    """The value of a literal, i.e. an int, bool or (unescaped) character, or None."""
+    if not isinstance(node, Token):
+        return None
+    match node.type:
+        case Type.DIGIT:
+            value = int(node.text)
+            # Leave literals that are too large to the OverFlowError of the generator
+            return value if value < 2**31 else None
+        case Type.TRUE:
+            return True
+        case Type.FALSE:
+            return False
+        case Type.CHARACTER:
+            return node.text[1:-1].encode().decode("unicode_escape")
+    return None
+
+
+def literal(value: int | bool | str, span: Span) -> Token:
+    """The literal for a value, i.e. the inverse of `constant`."""
+    if value is True:
+        return Token("True", Type.TRUE, span)
+    if value is False:
+        return Token("False", Type.FALSE, span)
+    if isinstance(value, str):
+        # Escape e.g. '\n' again, such that the generator can unescape it
+        return Token(
+            f"'{value.encode('unicode_escape').decode()}'", Type.CHARACTER, span
+        )
+    return Token(str(value), Type.DIGIT, span)
+
+
+def fold_binary(operator: Type, left, right) -> Optional[int | bool]:
+    """Compute `left operator right` for the values of two literals like SSM would, or
+    return None if the expression cannot be computed at compile time."""
+    match operator:
+        case Type.PLUS:
+            return wrap(left + right)
+        case Type.MINUS:
+            return wrap(left - right)
+        case Type.STAR:
+            return wrap(left * right)
+        case Type.SLASH if right != 0:
+            return wrap(truncate(left, right))
+        case Type.PERCENT if right != 0:
+            # The remainder has the sign of the left side
+            return wrap(left - right * truncate(left, right))
+        case Type.AND:
+            return left and right
+        case Type.OR:
+            return left or right
+        case Type.DEQUALS:
+            return left == right
+        case Type.NEQ:
+            return left != right
+        case Type.LT:
+            return left < right
+        case Type.GT:
+            return left > right
+        case Type.LEQ:
+            return left <= right
+        case Type.GEQ:
+            return left >= right
+    return None
+
+
+class AssignmentVisitor(NodeVisitor):
+    """Collect the names of the variables that are assigned to, including loop variables."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.names: Set[str] = set()
+
+    def collect(self, node: Node) -> Set[str]:
+        self.visit(node)
+        return self.names
+
+    def visit_StmtAssNode(self, node: StmtAssNode, *args, **kwargs):
+        self.names.add(node.id.id.text)
+        self.visit_children(node)
+
+    def visit_ForNode(self, node: ForNode, *args, **kwargs):
+        self.names.add(node.id.text)
+        self.visit_children(node)
+
+
+class ConstantFolder(NodeTransformer):
+    """
+    Replace expressions whose value is known at compile time by their value, e.g. `1 + 2 * 3`
+    by `7`, `!True` by `False` and `[1..3]` by `1 : 2 : 3 : []`. Local variables that are
+    initialized with a literal and never assigned to afterwards are replaced by that literal,
+    such that expressions that use them can be folded too. Arithmetic wraps around like in SSM,
+    and divisions by 0 are left to fail at runtime.
+
+    The number of folded expressions and replaced variables is kept in `folded`, and the
+    function declarations that they occurred in are kept in `changed`.
+
+    >>> folder = ConstantFolder()
+    >>> folder.fold(tree)
+    >>> folder.folded
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.folded = 0
+        self.changed: List[FunDeclNode] = []
+
+    def fold(self, tree: Node) -> Node:
+        """Fold the constant expressions of the typed `tree` in place."""
+        return self.visit(tree, constants={})
+
+    def visit_FunDeclNode(
+        self, node: FunDeclNode, *args, constants: Dict[str, Token], **kwargs
+    ) -> FunDeclNode:
+        folded = self.folded
+        assigned = AssignmentVisitor().collect(node)
+        constants = {}
+        for var_decl in node.var_decl:
+            # Variables can only be used in the declarations after their own
+            var_decl.exp = self.visit(var_decl.exp, constants=constants)
+            if constant(var_decl.exp) is not None:
+                if var_decl.id.text not in assigned:
+                    constants[var_decl.id.text] = var_decl.exp
+            else:
+                # A constant of a previous declaration may be shadowed by this variable
+                constants.pop(var_decl.id.text, None)
+
+        node.stmt[:] = [self.visit(stmt, constants=constants) for stmt in node.stmt]
+        if self.folded > folded:
+            self.changed.append(node)
+        return node
+
+    def visit_VarDeclNode(self, node: VarDeclNode, *args, **kwargs) -> VarDeclNode:
+        # Global variables, whose names are never replaced
+        node.exp = self.visit(node.exp, *args, **kwargs)
+        return node
+
+    def visit_ForNode(self, node: ForNode, *args, **kwargs) -> ForNode:
+        if not isinstance(node.loop, ListAbbrNode):
+            return self.visit_children(node, *args, **kwargs)
+        # Ranges that are looped over are counted through rather than built by the generator,
+        # so only their bounds are folded
+        self.visit_children(node.loop, *args, **kwargs)
+        node.body[:] = [self.visit(stmt, *args, **kwargs) for stmt in node.body]
+        return node
+
+    def visit_FunCallNode(self, node: FunCallNode, *args, **kwargs) -> FunCallNode:
+        # The name of the function is not a variable
+        if node.args:
+            self.visit(node.args, *args, **kwargs)
+        return node
+
+    def visit_Token(
+        self, node: Token, *args, constants: Dict[str, Token], **kwargs
+    ) -> Token:
+        if node.type == Type.ID and node.text in constants:
+            self.folded += 1
+            value = constants[node.text]
+            return Token(value.text, value.type, node.span)
+        return node
+
+    def visit_Op1Node(self, node: Op1Node, *args, **kwargs) -> Node | Token:
+        node.operand = self.visit(node.operand, *args, **kwargs)
+        value = constant(node.operand)
+        if value is None:
+            return node
+
+        self.folded += 1
+        if node.operator.type == Type.NOT:
+            return literal(not value, node.span)
+        return literal(wrap(-value), node.span)
+
+    def visit_Op2Node(self, node: Op2Node, *args, **kwargs) -> Node | Token:
+        if node.operator.type == Type.COLON:
+            # Long chains of `:` are folded iteratively, to avoid recursing once per element
+            current = node
+            while True:
+                current.left = self.visit(current.left, *args, **kwargs)
+                if not (
+                    isinstance(current.right, Op2Node)
+                    and current.right.operator.type == Type.COLON
+                ):
+                    break
+                current = current.right
+            current.right = self.visit(current.right, *args, **kwargs)
+            return node
+
+        node.left = self.visit(node.left, *args, **kwargs)
+        node.right = self.visit(node.right, *args, **kwargs)
+        left = constant(node.left)
+        right = constant(node.right)
+        if left is None or right is None:
+            return node
+
+        value = fold_binary(node.operator.type, left, right)
+        if value is None:
+            return node
+        self.folded += 1
+        return literal(value, node.span)
+
+    def visit_ListAbbrNode(self, node: ListAbbrNode, *args, **kwargs) -> Node:
+        node.left = self.visit(node.left, *args, **kwargs)
+        node.right = self.visit(node.right, *args, **kwargs)
+        left = constant(node.left)
+        right = constant(node.right)
+        if left is None or right is None:
+            return node
+
+        # The bounds are either both integers or both characters
+        is_char = isinstance(left, str)
+        if is_char:
+            left, right = ord(left), ord(right)
+        if abs(right - left) >= MAX_ABBR_LENGTH:
+            return node
+
+        # Like `_ListAbbr`, the list runs from the left bound to the right bound, inclusive,
+        # in either direction
+        step = 1 if left <= right else -1
+        chain = ListNode(None, span=node.span)
+        for value in range(right, left - step, -step):
+            chain = Op2Node(
+                literal(chr(value) if is_char else value, node.span),
+                Token(":", Type.COLON, node.span),
+                chain,
+                span=node.span,
+            )
+        self.folded += 1
+        return chain
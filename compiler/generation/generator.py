@@ -1,23 +1,41 @@
 import subprocess  # nosec
+from collections import Counter
 from itertools import groupby
 from pathlib import Path
-from typing import Iterator, List
+from typing import Iterable, Iterator, List, Optional
 
+from compiler.analysis import (
+    AnalysisManager,
+    FrameLayoutAnalysis,
+    FrameSizeAnalysis,
+    OwnershipAnalysis,
+)
+from compiler.built_in import BUILT_IN_FUNCTIONS, BuiltInFunction
 from compiler.error.communicator import Communicator
 from compiler.error.error import UnrecoverableError
 from compiler.error.generator_error import GeneratorException
+from compiler.generation.folding import constant
+from compiler.generation.inliner import INLINE_SIZE, Inliner
 from compiler.generation.instruction import Instruction
 from compiler.generation.line import Line
-from compiler.generation.std_lib import STD_LIB_LIST
-from compiler.generation.utils import ForCounterVisitor
+from compiler.generation.peephole import PEEPHOLE_RULES, PeepholeOptimizer, Rule
 from compiler.token import Token
 from compiler.tree.visitor import Boolean, NodeYielder, Variable
 from compiler.type import Type
+from compiler.util import SourceFile
 
 from compiler.error.generator_error import (  # isort:skip
     OverFlowError as CompilerOverFlowError,
 )
 
+from compiler.generation.std_lib import (  # isort:skip
+    STD_LIB_ARRAY,
+    STD_LIB_ARRAY_CALLS,
+    STD_LIB_LIST,
+    STD_LIB_LIST_CALLS,
+    ListLayout,
+)
+
 from compiler.tree.tree import (  # isort:skip
     BoolTypeNode,
     CharTypeNode,
@@ -31,12 +49,14 @@ from compiler.tree.tree import (  # isort:skip
     IntTypeNode,
     ListAbbrNode,
     ListNode,
+    Node,
     Op1Node,
     Op2Node,
     PolymorphicTypeNode,
     ReturnNode,
     SPLNode,
     StmtAssNode,
+    StringLiteralNode,
     TupleNode,
     TypeNode,
     VarDeclNode,
@@ -46,9 +66,34 @@ from compiler.tree.tree import (  # isort:skip
 )
 
 
+# The number of values of a string or list literal that are stored in a block at once
+BLOCK_CHUNK_SIZE = 64
+
+
 class Generator:
-    def __init__(self, program: str) -> None:
-        self.generator_yielder = GeneratorYielder(program)
+    def __init__(
+        self,
+        program: str | SourceFile,
+        analyses: AnalysisManager = None,
+        rules: Iterable[Rule] = PEEPHOLE_RULES,
+        annotate: bool = False,
+        lists: ListLayout = ListLayout.LINKED,
+        tail_calls: bool = True,
+        inline_size: int = INLINE_SIZE,
+    ) -> None:
+        # The runtime representation of lists, see `ListLayout`, and whether calls in
+        # `return` statements reuse the frame of the caller, see `GeneratorYielder.tail_call`
+        self.generator_yielder = GeneratorYielder(
+            program, analyses, ListLayout(lists), tail_calls
+        )
+        # Whether to print the nodes that lines were generated from as their comments
+        self.annotate = annotate
+        # Replaces calls to routines of at most `inline_size` instructions by their body, see
+        # `Inliner.report` for the inlined calls. A size of 0 disables the optimization.
+        self.inliner = Inliner(inline_size)
+        # Rewrites of the generated lines, see `PeepholeOptimizer.report` for their effect.
+        # No rules disables the optimization.
+        self.peephole = PeepholeOptimizer(rules)
 
     def generate(self, tree: SPLNode) -> str:
         """Convert the typed AST to SSM code, using a visitor pattern.
@@ -59,7 +104,15 @@ class Generator:
         Returns:
             str: Returns a string containing SSM instructions, separated by a new line.
         """
-        ssm_code = "\n".join(str(line) for line in self.generator_yielder.visit(tree))
+        lines = self.generator_yielder.visit(tree)
+        if self.inliner.size:
+            lines = self.inliner.inline(lines)
+        if self.peephole.rules:
+            lines = self.peephole.optimize(lines)
+        # The tree is not modified during generation, so nodes printed in comments reuse the
+        # renderings of their children, for as long as the analyses of the tree are valid
+        renderings = self.generator_yielder.analyses.renderings
+        ssm_code = "\n".join(line.render(self.annotate, renderings) for line in lines)
         # Raise all errors, if any, that may have accumulated during generation of SSM code.
         Communicator.communicate(GeneratorException)
         return ssm_code
@@ -95,33 +148,52 @@ def set_variable(var: Variable, value):
 
 
 class GeneratorYielder(NodeYielder):
-    def __init__(self, program) -> None:
+    def __init__(
+        self,
+        program: str | SourceFile,
+        analyses: AnalysisManager = None,
+        lists: ListLayout = ListLayout.LINKED,
+        tail_calls: bool = True,
+    ) -> None:
         super().__init__()
-        self.program = program
-        self.built_in_functions = {
-            "isEmpty",
-            "chr",
-            "ord",
-            "bool",
-            "length",
-            "print",
-            "println",
-            "get_Int",
-            "get_Chr",
-            "exit",
-        }
+        self.program = SourceFile.of(program)
+        self.lists = lists
+        self.tail_calls = tail_calls
+        # The routines that are included in the output, with the list routines of the layout
+        self.std_lib = (
+            {**STD_LIB_LIST, **STD_LIB_ARRAY}
+            if lists == ListLayout.ARRAY
+            else STD_LIB_LIST
+        )
+        # The routines that are called by the included routines of the layout
+        self.std_lib_calls = (
+            {**STD_LIB_LIST_CALLS, **STD_LIB_ARRAY_CALLS}
+            if lists == ListLayout.ARRAY
+            else STD_LIB_LIST_CALLS
+        )
+        # Cached analyses of the tree, e.g. shared with other passes by a PassManager
+        self.analyses = analyses or AnalysisManager()
         self.variables = {
             "global": {},
             "arguments": {},
             "local": {},
         }
+        # The offsets of the variables by name, computed once per function by the
+        # FrameLayoutAnalysis, while `variables` holds the types of the variables declared so far
+        self.offsets = {
+            "global": {},
+            "arguments": {},
+            "local": {},
+        }
         self.if_else_counter = 0
         self.while_counter = 0
         self.for_counter = 0
+        self.logic_counter = 0
         self.functions = []
         self.include_function = set()
-
-        self.for_visitor = ForCounterVisitor()
+        # The number of `:` operations per way their list is handled, i.e. "copied", "shared",
+        # or without a copy if it is "temporary" or "dead", see `Ownership`
+        self.copies = Counter()
 
     def types_to_label(self, types: List[TypeNode]) -> str:
         return (
@@ -134,9 +206,54 @@ class GeneratorYielder(NodeYielder):
             .replace("]", "")
         )
 
+    def load_list(self) -> Iterator[Line]:
+        """Replace the reference to a list on top of the stack by its length and a cursor to
+        its first element, which is moved along the list by `next_element`."""
+        # Stack: Length, List Pointer
+        yield Line(Instruction.LDMH, 0, 2)
+        if self.lists == ListLayout.ARRAY:
+            # The first element is the last of the `length` values in the block
+            yield Line(Instruction.LDS, -1)
+            yield Line(Instruction.ADD)
+            yield Line(Instruction.LDC, 1)
+            yield Line(Instruction.ADD)
+
+    def next_element(self, cursor: int) -> Iterator[Line]:
+        """Push the element that the cursor in local `cursor` points to, and move the cursor
+        to the next element."""
+        yield Line(Instruction.LDL, cursor)
+        if self.lists == ListLayout.ARRAY:
+            yield Line(Instruction.LDA, 0)
+            yield Line(Instruction.LDL, cursor)
+            yield Line(Instruction.LDC, 1)
+            yield Line(Instruction.SUB)
+        else:
+            # Stack: Value, Next Pointer
+            yield Line(Instruction.LDMH, 0, 2)
+        yield Line(Instruction.STL, cursor)
+
+    def element_address(
+        self, index: Node | Token = None, *args, **kwargs
+    ) -> Iterator[Line]:
+        """Replace the reference to a list on top of the stack by the address of the element
+        at `index`, or of its head, for the ARRAY layout."""
+        yield Line(Instruction.LDMH, 0, 2)
+        yield Line(Instruction.ADD)
+        yield Line(Instruction.LDC, 1)
+        yield Line(Instruction.ADD)
+        if index is not None:
+            yield from self.visit(index, *args, **kwargs)
+            yield Line(Instruction.SUB)
+
     def visit_SPLNode(self, node: SPLNode, *args, **kwargs):
+        self.ownership = self.analyses.get(OwnershipAnalysis, node)
         var_decls = [node for node in node.body if isinstance(node, VarDeclNode)]
         if var_decls:
+            # Global variables are positive relative to Global Pointer (GP), starting from 1
+            self.offsets["global"] = {
+                var_decl.id.text: offset
+                for offset, var_decl in enumerate(var_decls, start=1)
+            }
             yield Line(Instruction.LINK, len(var_decls))
             yield Line(Instruction.LDR, "MP")
             yield Line(Instruction.STR, "R5", comment="Globals Pointer (GP)")
@@ -179,9 +296,11 @@ class GeneratorYielder(NodeYielder):
                     yield from self.visit(fun_decl, *args, types=types, **kwargs)
             implemented.add(label)
 
+        for function in list(self.include_function):
+            self.include_function |= self.std_lib_calls.get(function, set())
         while self.include_function:
             function = self.include_function.pop()
-            yield from STD_LIB_LIST[function]
+            yield from self.std_lib[function]
 
     def visit_FunDeclNode(self, node: FunDeclNode, *args, types=None, **kwargs):
         # Mark a label from this point onwards
@@ -189,8 +308,13 @@ class GeneratorYielder(NodeYielder):
         # print(f"Defining {label}")
         yield Line(label=label)
         # Link to conveniently move MP and SP
-        n_local_vars = len(node.var_decl) + self.for_visitor.count(node)
-        yield Line(Instruction.LINK, n_local_vars)
+        yield Line(Instruction.LINK, self.analyses.get(FrameSizeAnalysis, node))
+        layout = self.analyses.get(FrameLayoutAnalysis, node)
+        self.offsets["arguments"] = layout.arguments
+        # Copied, as the variables of for loops are added while generating the loops
+        self.offsets["local"] = dict(layout.locals)
+        self.layout = layout
+
         # Set the function arguments, this is the order that they are above the MP
         if node.args:
             self.variables["arguments"] = {
@@ -214,8 +338,6 @@ class GeneratorYielder(NodeYielder):
     def visit_VarDeclNode(self, node: VarDeclNode, *args, in_func=False, **kwargs):
         # No need to pass the in_func any deeper
         exp_type = Variable(None)
-        # Set self.get_list_addr=True, such that we know whether a new address should be created for a list
-        self.var_decl_assignment = node.id
         yield from self.visit(node.exp, *args, exp_type=exp_type, **kwargs)
 
         if in_func:
@@ -304,21 +426,17 @@ class GeneratorYielder(NodeYielder):
 
             # Special print for strings
             case ListNode(CharTypeNode()):
-                # Load the length and list pointer
-                yield Line(Instruction.LDMH, 0, 2)
+                # Load the length and a cursor to the first element
+                yield from self.load_list()
                 # Store them
-                yield Line(Instruction.STL, 2)  # (Next) List pointer
+                yield Line(Instruction.STL, 2)  # Cursor
                 yield Line(Instruction.STL, 1)  # Length
 
                 # Start loop body, starting with check for length
                 yield Line(Instruction.LDL, 1, label=label + "_loop")
                 yield Line(Instruction.BRF, label + "_end")
-                # Load list address again
-                yield Line(Instruction.LDL, 2)
-                # Load next value, pointer
-                yield Line(Instruction.LDMH, 0, 2)
-                # Update list pointer
-                yield Line(Instruction.STL, 2)
+                # Load the next value
+                yield from self.next_element(2)
                 # Recursively print the value
                 self.functions.append({"name": "_print", "type": [var_type.body]})
                 yield Line(
@@ -340,21 +458,17 @@ class GeneratorYielder(NodeYielder):
                 yield Line(Instruction.LDC, 91, comment="Load '['")
                 yield Line(Instruction.TRAP, 1, comment="Print '['")
                 if var_type.body:
-                    # Load the length and list pointer
-                    yield Line(Instruction.LDMH, 0, 2)
+                    # Load the length and a cursor to the first element
+                    yield from self.load_list()
                     # Store them
-                    yield Line(Instruction.STL, 2)  # (Next) List pointer
+                    yield Line(Instruction.STL, 2)  # Cursor
                     yield Line(Instruction.STL, 1)  # Length
 
                     # Start loop body, starting with check for length
                     yield Line(Instruction.LDL, 1, label=label + "_loop")
                     yield Line(Instruction.BRF, label + "_end")
-                    # Load list address again
-                    yield Line(Instruction.LDL, 2)
-                    # Load next value, pointer
-                    yield Line(Instruction.LDMH, 0, 2)
-                    # Update list pointer
-                    yield Line(Instruction.STL, 2)
+                    # Load the next value
+                    yield from self.next_element(2)
                     # Recursively print the value
                     self.functions.append({"name": "_print", "type": [var_type.body]})
                     yield Line(
@@ -448,101 +562,150 @@ class GeneratorYielder(NodeYielder):
                 yield from self.visit(arg, *args, exp_type=arg_type, **kwargs)
                 arg_types.append(arg_type.var)
 
-        # if node.func.text == "print":
-        #     # Store this function to be implemented
-        #     self.functions.append({"name": node.func.text, "type": node.type})
-
-        #     # Branch to the function that is being called
-        #     label = node.func.text + self.types_to_label(node.type.types)
-        #     yield Line(
-        #         Instruction.BSR,
-        #         label,
-        #         comment=str(node),
-        #     )
-        if node.func.text == "isEmpty":
-            self.include_function.add("_is_empty")
-            yield Line(Instruction.BSR, "_is_empty")
-            yield Line(Instruction.AJS, -1)
-            yield Line(Instruction.LDR, "RR")
-            set_variable(exp_type, node.type.ret_type)
-        elif node.func.text == "length":
-            self.include_function.add("_length")
-            yield Line(Instruction.BSR, "_length")
-            yield Line(Instruction.AJS, -1)
-            yield Line(Instruction.LDR, "RR")
-            set_variable(exp_type, node.type.ret_type)
-        elif node.func.text == "get_Int":
-            yield Line(Instruction.TRAP, 10)
-            set_variable(exp_type, node.type.ret_type)
-        elif node.func.text == "get_Chr":
-            yield Line(Instruction.TRAP, 11)
-            set_variable(exp_type, node.type.ret_type)
-        elif node.func.text == "get_Str":
-            self.functions.append({"name": "_ListAbbr", "type": []})
-            self.include_function |= {
-                "_get_Str",
-                "_prepend_element",
-                "_index",
-                "_length",
-                "_reverse_List_Char",
-            }
-            # Get the input
-            yield Line(Instruction.BSR, "_get_Str")
-            yield Line(Instruction.LDR, "RR")
-            # Reverse the list
-            yield Line(Instruction.BSR, "_reverse_List_Char")
-            yield Line(Instruction.AJS, -1)
-            yield Line(Instruction.LDR, "RR")
-
-            set_variable(exp_type, node.type.ret_type)
-        elif node.func.text == "exit":
-            yield Line(Instruction.HALT)
-        elif node.func.text == "println":
-            self.functions.append({"name": "_print", "type": arg_types})
-            label = "_print" + self.types_to_label(arg_types)
-            yield Line(Instruction.BSR, label)
-            # print \n
-            yield Line(Instruction.LDC, 10)
-            yield Line(Instruction.TRAP, 1)
-            # Reset SP to before LDC
-            yield Line(Instruction.AJS, -1)
-        elif node.func.text == "ord" or node.func.text == "chr":
-            set_variable(exp_type, node.type.ret_type)
+        built_in = BUILT_IN_FUNCTIONS.get(node.func.text)
+        if built_in:
+            self.include_function |= built_in.std_lib
+            yield from getattr(self, f"built_in_{built_in.codegen}")(
+                node, built_in, arg_types, exp_type
+            )
         else:
             # Create a label
             label = node.func.text + self.types_to_label(arg_types)
             # Store this function to be implemented
-            if node.func.text in self.built_in_functions:
-                self.functions.append({"name": "_" + node.func.text, "type": arg_types})
-                label = "_" + label
-            else:
-                self.functions.append({"name": node.func.text, "type": arg_types})
+            self.functions.append({"name": node.func.text, "type": arg_types})
+            yield from self.call(node, label, exp_type)
 
-            # Branch to the function that is being called
-            yield Line(Instruction.BSR, label, comment=str(node))
+    def call(
+        self,
+        node: FunCallNode,
+        label: str,
+        exp_type: Variable,
+        load_return: bool = True,
+    ) -> Iterator[Line]:
+        # Branch to the function that is being called
+        yield Line(Instruction.BSR, label, comment=node)
+
+        # Clean up the stack that still has the function call arguments on it
+        if node.args:
+            yield Line(Instruction.AJS, -len(node.args.items))
 
-            # Clean up the stack that still has the function call arguments on it
-            if node.args:
-                yield Line(Instruction.AJS, -len(node.args.items))
+        if load_return:
+            # Place the function return back on the stack
+            yield Line(Instruction.LDR, "RR")
 
-            if node.func.text != "print":
-                # Place the function return back on the stack
-                yield Line(Instruction.LDR, "RR")
+            # Set the return value as the expression type, if requested higher
+            # on the tree
+            set_variable(exp_type, node.type.ret_type)
+
+    def built_in_specialized(
+        self,
+        node: FunCallNode,
+        built_in: BuiltInFunction,
+        arg_types: List[TypeNode],
+        exp_type: Variable,
+    ) -> Iterator[Line]:
+        # Call an implementation of the built-in function for these argument types
+        self.functions.append({"name": "_" + built_in.name, "type": arg_types})
+        label = "_" + built_in.name + self.types_to_label(arg_types)
+        yield from self.call(
+            node,
+            label,
+            exp_type,
+            load_return=not isinstance(built_in.type.ret_type, VoidTypeNode),
+        )
+
+    def built_in_std_lib_call(
+        self,
+        node: FunCallNode,
+        built_in: BuiltInFunction,
+        arg_types: List[TypeNode],
+        exp_type: Variable,
+    ) -> Iterator[Line]:
+        yield Line(Instruction.BSR, built_in.operand)
+        yield Line(Instruction.AJS, -1)
+        yield Line(Instruction.LDR, "RR")
+        set_variable(exp_type, node.type.ret_type)
 
-                # Set the return value as the expression type, if requested higher
-                # on the tree
-                set_variable(exp_type, node.type.ret_type)
+    def built_in_trap(
+        self,
+        node: FunCallNode,
+        built_in: BuiltInFunction,
+        arg_types: List[TypeNode],
+        exp_type: Variable,
+    ) -> Iterator[Line]:
+        yield Line(Instruction.TRAP, built_in.operand)
+        set_variable(exp_type, node.type.ret_type)
+
+    def built_in_identity(
+        self,
+        node: FunCallNode,
+        built_in: BuiltInFunction,
+        arg_types: List[TypeNode],
+        exp_type: Variable,
+    ) -> Iterator[Line]:
+        # The argument is already on the stack, and keeps its representation
+        yield from []
+        set_variable(exp_type, node.type.ret_type)
+
+    def built_in_halt(
+        self,
+        node: FunCallNode,
+        built_in: BuiltInFunction,
+        arg_types: List[TypeNode],
+        exp_type: Variable,
+    ) -> Iterator[Line]:
+        yield Line(Instruction.HALT)
+
+    def built_in_get_Str(
+        self,
+        node: FunCallNode,
+        built_in: BuiltInFunction,
+        arg_types: List[TypeNode],
+        exp_type: Variable,
+    ) -> Iterator[Line]:
+        if self.lists == ListLayout.ARRAY:
+            # The characters are read in the order of the values of a block
+            yield Line(Instruction.BSR, "_get_Str")
+            yield Line(Instruction.LDR, "RR")
+            set_variable(exp_type, node.type.ret_type)
+            return
+
+        self.functions.append({"name": "_ListAbbr", "type": []})
+        # Get the input
+        yield Line(Instruction.BSR, "_get_Str")
+        yield Line(Instruction.LDR, "RR")
+        # Reverse the list
+        self.include_function.add("_reverse_List_Char")
+        yield Line(Instruction.BSR, "_reverse_List_Char")
+        yield Line(Instruction.AJS, -1)
+        yield Line(Instruction.LDR, "RR")
+
+        set_variable(exp_type, node.type.ret_type)
+
+    def built_in_println(
+        self,
+        node: FunCallNode,
+        built_in: BuiltInFunction,
+        arg_types: List[TypeNode],
+        exp_type: Variable,
+    ) -> Iterator[Line]:
+        self.functions.append({"name": "_print", "type": arg_types})
+        label = "_print" + self.types_to_label(arg_types)
+        yield Line(Instruction.BSR, label)
+        # print \n
+        yield Line(Instruction.LDC, 10)
+        yield Line(Instruction.TRAP, 1)
+        # Reset SP to before LDC
+        yield Line(Instruction.AJS, -1)
 
     def visit_IfElseNode(self, node: IfElseNode, *args, **kwargs):
         then_label = f"_Then{self.if_else_counter}"
         else_label = f"_Else{self.if_else_counter}"
         end_label = f"_IfEnd{self.if_else_counter}"
         self.if_else_counter += 1
-        # Condition
-        yield from self.visit(node.cond, *args, **kwargs)
         if node.else_body:
             # Jump over the else body, if the condition is true
-            yield Line(Instruction.BRT, then_label)
+            yield from self.condition(node.cond, then_label, True, *args, **kwargs)
             # Execute the else branch
             yield Line(label=else_label)
             for stmt in node.else_body:
@@ -551,7 +714,7 @@ class GeneratorYielder(NodeYielder):
             yield Line(Instruction.BRA, end_label)
         else:
             # Jump over then branch, if there is no else branch to execute
-            yield Line(Instruction.BRF, end_label)
+            yield from self.condition(node.cond, end_label, False, *args, **kwargs)
 
         yield Line(label=then_label)
         for stmt in node.body:
@@ -561,7 +724,15 @@ class GeneratorYielder(NodeYielder):
     def visit_ForNode(self, node: ForNode, *args, exp_type=None, **kwargs):
         # Get the loop type
         exp_type = Variable(None)
-        yield from self.visit(node.loop, *args, exp_type=exp_type, **kwargs)
+        if isinstance(node.loop, ListAbbrNode):
+            # Ranges are counted through, rather than built as a list first, see
+            # `counted_loop`. The first word is reserved for the step
+            yield Line(Instruction.LDC, 0)
+            yield from self.visit(node.loop.left, *args, exp_type=exp_type, **kwargs)
+            yield from self.visit(node.loop.right, *args, **kwargs)
+            exp_type.set(ListNode(exp_type.var))
+        else:
+            yield from self.visit(node.loop, *args, exp_type=exp_type, **kwargs)
 
         loop_label = f"_ForLoop{self.for_counter}"
         end_label = f"_ForEndLink{self.for_counter}"
@@ -570,8 +741,39 @@ class GeneratorYielder(NodeYielder):
 
         # Store the variable as a local variable
         self.variables["local"][node.id] = exp_type.var.body
+        self.offsets["local"][node.id.text] = self.layout.offset(node)
+        offset = self.offsets["local"][node.id.text]
         # yield from self.visit(node.id, *args, **kwargs)
 
+        if isinstance(node.loop, ListAbbrNode):
+            yield from self.counted_loop(node, loop_label, true_end_label, offset)
+        elif self.lists == ListLayout.ARRAY:
+            yield from self.array_loop(node, loop_label, true_end_label, offset)
+        else:
+            yield from self.linked_loop(node, loop_label, end_label, offset)
+
+        # Run loop body:
+        for stmt in node.body:
+            kwargs["loop_type"] = "for"
+            yield from self.visit(stmt, *args, **kwargs)
+
+        # Continue the loop
+        yield Line(Instruction.BRA, loop_label)
+
+        # Remove the counter, or unlink and remove the list length and pointer
+        if isinstance(node.loop, ListAbbrNode):
+            yield Line(Instruction.AJS, -3, label=true_end_label)
+        else:
+            if self.lists == ListLayout.LINKED:
+                yield Line(Instruction.UNLINK, label=end_label)
+            yield Line(Instruction.AJS, -2, label=true_end_label)
+
+        del self.variables["local"][node.id]
+        del self.offsets["local"][node.id.text]
+
+    def linked_loop(
+        self, node: ForNode, loop_label: str, end_label: str, offset: int
+    ) -> Iterator[Line]:
         # Stack: List Pointer 1
         yield Line(Instruction.LDMH, 0, 2)
         # Stack: Length, List Pointer 2
@@ -594,24 +796,62 @@ class GeneratorYielder(NodeYielder):
         # Stack: Length, Value, List Pointer 2
         yield Line(Instruction.SWP)
         # Stack: Length, List Pointer 2, Value
-        index = list(self.variables["local"]).index(node.id)
-        offset = index + 1
-        yield Line(Instruction.STL, offset, comment=str(node))
+        yield Line(Instruction.STL, offset, comment=node)
         # Stack: Length, List Pointer 2
 
-        # Run loop body:
-        for stmt in node.body:
-            kwargs["loop_type"] = "for"
-            yield from self.visit(stmt, *args, **kwargs)
-
-        # Continue the loop
-        yield Line(Instruction.BRA, loop_label)
-
-        # Unlink and remove the list length and pointer for this for loop
-        yield Line(Instruction.UNLINK, label=end_label)
-        yield Line(Instruction.AJS, -2, label=true_end_label)
+    def array_loop(
+        self, node: ForNode, loop_label: str, end_label: str, offset: int
+    ) -> Iterator[Line]:
+        # The cursor moves down through the block until it reaches the word before the
+        # values. Both are kept on top of the stack, such that no link is needed
+        yield from self.load_list()
+        yield Line(Instruction.LDS, 0)
+        yield Line(Instruction.LDS, -2)
+        yield Line(Instruction.SUB)
+        yield Line(Instruction.STS, -2)
+        # Stack: End, Cursor
+        yield Line(Instruction.LDS, 0, label=loop_label)
+        yield Line(Instruction.LDS, -2)
+        yield Line(Instruction.NE)
+        yield Line(Instruction.BRF, end_label)
+        # Store the value, and move the cursor to the next element
+        yield Line(Instruction.LDS, 0)
+        yield Line(Instruction.LDA, 0)
+        yield Line(Instruction.STL, offset, comment=node)
+        yield Line(Instruction.LDC, 1)
+        yield Line(Instruction.SUB)
+        # Stack: End, Cursor
+
+    def counted_loop(
+        self, node: ForNode, loop_label: str, end_label: str, offset: int
+    ) -> Iterator[Line]:
+        # Like `_ListAbbr`, the values run from the left bound to the right bound, inclusive,
+        # in either direction. The step is kept negated, and the counter starts one step
+        # before the left bound, such that it is compared to the right bound before it is
+        # updated
+        # Stack: 0, Left, Right
+        yield Line(Instruction.LDS, -1)
+        yield Line(Instruction.LDS, -1)
+        yield Line(Instruction.LT)
+        # -1 if the values ascend, otherwise 1
+        yield Line(Instruction.LDC, 1)
+        yield Line(Instruction.OR)
+        yield Line(Instruction.STS, -3)
+        yield Line(Instruction.SWP)
+        # Stack: -Step, Right, Left
+        yield Line(Instruction.LDS, -2)
+        yield Line(Instruction.ADD)
+        # Stack: -Step, Right, Counter
 
-        del self.variables["local"][node.id]
+        yield Line(Instruction.LDS, 0, label=loop_label)
+        yield Line(Instruction.LDS, -2)
+        yield Line(Instruction.EQ)
+        yield Line(Instruction.BRT, end_label)
+        yield Line(Instruction.LDS, -2)
+        yield Line(Instruction.SUB)
+        yield Line(Instruction.LDS, 0)
+        yield Line(Instruction.STL, offset, comment=node)
+        # Stack: -Step, Right, Counter
 
     def visit_WhileNode(self, node: WhileNode, *args, **kwargs):
         condition_label = f"_WhileCond{self.while_counter}"
@@ -621,9 +861,8 @@ class GeneratorYielder(NodeYielder):
 
         # Condition
         yield Line(label=condition_label)
-        yield from self.visit(node.cond, *args, **kwargs)
         # Jump over while body if condition is false
-        yield Line(Instruction.BRF, end_label)
+        yield from self.condition(node.cond, end_label, False, *args, **kwargs)
         # While body
         yield Line(label=body_label)
         for stmt in node.body:
@@ -649,32 +888,25 @@ class GeneratorYielder(NodeYielder):
                 **kwargs,
             )
             if still_store.var:
-                yield Line(Instruction.STA, 0, comment=str(node))
+                yield Line(Instruction.STA, 0, comment=node)
 
         elif node.id.id in self.variables["local"]:
-            # Local variables are positive relative to MP, starting from 1
-            index = list(self.variables["local"]).index(node.id.id)
-            offset = index + 1
-            yield Line(Instruction.STL, offset, comment=str(node))
+            offset = self.offsets["local"][node.id.id.text]
+            yield Line(Instruction.STL, offset, comment=node)
             self.variables["local"][node.id.id] = exp_type.var
 
         elif node.id.id in self.variables["arguments"]:
-            # Index 0 means we need to get the first argument, so the furthest away one
-            # The last argument is at -2
-            index = list(self.variables["arguments"]).index(node.id.id)
-            offset = index - 1 - len(self.variables["arguments"])
-            # Load the function argument using the offset from MP
-            yield Line(Instruction.STL, offset, comment=str(node))
+            # The first argument is the furthest away one, the last argument is at -2
+            offset = self.offsets["arguments"][node.id.id.text]
+            yield Line(Instruction.STL, offset, comment=node)
             self.variables["arguments"][node.id.id] = exp_type.var
 
         elif node.id.id in self.variables["global"]:
-            # Global variables are positive relative to Global Pointer (GP), starting from 1
-            index = list(self.variables["global"]).index(node.id.id)
-            offset = index + 1
+            offset = self.offsets["global"][node.id.id.text]
 
             # Load heap address, and then store the value there
             yield Line(Instruction.LDR, "R5", comment="Load Global Pointer (GP)")
-            yield Line(Instruction.STA, offset, comment=str(node))
+            yield Line(Instruction.STA, offset, comment=node)
             self.variables["global"][node.id.id] = exp_type.var
 
         else:
@@ -720,17 +952,20 @@ class GeneratorYielder(NodeYielder):
                         yield Line(
                             Instruction.LDH,
                             -1 if field.type == Type.FST else 0,
-                            comment=str(field),
+                            comment=field,
                         )
 
                 case Token(type=Type.HD):
                     # SP points to the variable on which we are applying the .hd/.tl
-                    yield Line(Instruction.BSR, "_head")
-                    self.include_function.add("_head")
-                    yield Line(
-                        Instruction.AJS, -1
-                    )  # Clear up address of which head was gotten
-                    yield Line(Instruction.LDR, "RR")
+                    if self.lists == ListLayout.ARRAY:
+                        yield from self.element_address()
+                    else:
+                        yield Line(Instruction.BSR, "_head")
+                        self.include_function.add("_head")
+                        yield Line(
+                            Instruction.AJS, -1
+                        )  # Clear up address of which head was gotten
+                        yield Line(Instruction.LDR, "RR")
                     # No need to update if we're on the left side of the assignment, i.e.
                     # if get_addr is True
                     if exp_type and not get_addr:
@@ -740,6 +975,24 @@ class GeneratorYielder(NodeYielder):
                     if not get_addr or i != len(node.fields):
                         yield Line(Instruction.LDA, 0)
 
+                case Token(type=Type.TL) if self.lists == ListLayout.ARRAY and (
+                    get_addr
+                    and all(
+                        isinstance(rest, Token) and rest.type == Type.TL
+                        for rest in node.fields[i - 1 :]
+                    )
+                ):
+                    # We are assigning to the last `.tl` fields, so the elements before
+                    # them are kept, and copied to a new block together with the new tail
+                    yield Line(Instruction.LDC, len(node.fields) - i + 1)
+                    yield Line(Instruction.BSR, "_set_tail")
+                    self.include_function.add("_set_tail")
+                    # Clean up the value we assigned, the list and the count
+                    yield Line(Instruction.AJS, -3)
+                    if still_store is not None:
+                        still_store.set(False)
+                    return
+
                 case Token(type=Type.TL):
                     # We are assigning
                     if get_addr and i == len(node.fields):
@@ -805,6 +1058,14 @@ class GeneratorYielder(NodeYielder):
                         )  # Clear up address of which tail was gotten
                         yield Line(Instruction.LDR, "RR")
 
+                case IndexNode() if self.lists == ListLayout.ARRAY:
+                    yield from self.element_address(field.exp, *args, **kwargs)
+                    # Load the value, unless it is assigned to
+                    if not get_addr or i != len(node.fields):
+                        yield Line(Instruction.LDA, 0)
+                    if exp_type and not get_addr:
+                        exp_type.set(exp_type.var.body)
+
                 case IndexNode():
                     # Discard length and take only list pointer
                     yield Line(Instruction.LDH, 0)
@@ -839,6 +1100,17 @@ class GeneratorYielder(NodeYielder):
         yield from []
 
     def visit_ReturnNode(self, node: ReturnNode, *args, in_main=False, **kwargs):
+        if (
+            self.tail_calls
+            and not in_main
+            and isinstance(node.exp, FunCallNode)
+            and node.exp.func.text not in BUILT_IN_FUNCTIONS
+            and len(node.exp.args.items if node.exp.args else [])
+            == len(self.layout.arguments)
+        ):
+            yield from self.tail_call(node.exp, *args, **kwargs)
+            return
+
         # Recurse into children
         if node.exp:
             yield from self.visit(node.exp, *args, **kwargs)
@@ -850,7 +1122,29 @@ class GeneratorYielder(NodeYielder):
         yield Line(Instruction.UNLINK)
         # Actually return, but only if we're not in main
         if not in_main:
-            yield Line(Instruction.RET, comment=str(node))
+            yield Line(Instruction.RET, comment=node)
+
+    def tail_call(self, node: FunCallNode, *args, **kwargs) -> Iterator[Line]:
+        """Call a function with as many arguments as the current function as its last
+        action, by replacing the arguments of the current function and branching to the
+        called function, rather than calling it with a new frame. The called function then
+        returns to the caller of the current function directly, so recursion in `return`
+        statements does not grow the stack, e.g. for `return f(n - 1, acc * n);`."""
+        arg_types = []
+        items = node.args.items if node.args else []
+        for arg in items:
+            arg_type = Variable(None)
+            yield from self.visit(arg, *args, exp_type=arg_type, **kwargs)
+            arg_types.append(arg_type.var)
+
+        # All arguments are computed before any is replaced, as they may use each other
+        for index in reversed(range(len(items))):
+            yield Line(Instruction.STL, index - len(items) - 1)
+        # Like a return, except that the called function returns in our place
+        yield Line(Instruction.UNLINK)
+        label = node.func.text + self.types_to_label(arg_types)
+        self.functions.append({"name": node.func.text, "type": arg_types})
+        yield Line(Instruction.BRA, label, comment=node)
 
     def visit_IntTypeNode(self, node: IntTypeNode, *args, exp_type=None, **kwargs):
         # No need to generate code for this node or its children
@@ -883,13 +1177,56 @@ class GeneratorYielder(NodeYielder):
         set_variable(exp_type, node)
         yield from STD_LIB_LIST["_get_empty_list"]
 
+    def visit_StringLiteralNode(
+        self, node: StringLiteralNode, *args, exp_type=None, **kwargs
+    ):
+        set_variable(exp_type, ListNode(CharTypeNode()))
+        if self.lists == ListLayout.ARRAY:
+            values = [
+                Line(Instruction.LDC, ord(char), comment=repr(char))
+                for char in reversed(node.chars)
+            ]
+            yield from self.array_block(values, node)
+            return
+
+        # Construct the (value, next*) pairs directly, starting from the last character,
+        # rather than prepending every character to the empty list using `_prepend_element`
+        yield Line(Instruction.LDC, 0xBABE, comment=node)
+        for char in reversed(node.chars):
+            yield Line(Instruction.LDC, ord(char), comment=repr(char))
+            yield Line(Instruction.SWP)
+            yield Line(Instruction.STMH, 2)
+        # Create the (length, next*) pair that refers to the list
+        yield Line(Instruction.LDC, len(node.chars))
+        yield Line(Instruction.SWP)
+        yield Line(Instruction.STMH, 2)
+
+    def array_block(self, values: List[Line], comment: Node) -> Iterator[Line]:
+        """Construct a full block directly, given lines that each load a value, starting with
+        the value of the last element."""
+        yield Line(Instruction.LDC, len(values), comment=comment)  # Capacity
+        yield Line(Instruction.LDC, len(values))  # Used
+        yield Line(Instruction.STMH, 2)
+        # Store the values in chunks, to keep the stack small for long lists
+        for start in range(0, len(values), BLOCK_CHUNK_SIZE):
+            chunk = values[start : start + BLOCK_CHUNK_SIZE]
+            yield from chunk
+            yield Line(Instruction.STMH, len(chunk))
+            yield Line(Instruction.AJS, -1)
+        # Create the (length, block) pair that refers to the list
+        yield Line(Instruction.LDC, 1)
+        yield Line(Instruction.SUB)
+        yield Line(Instruction.LDC, len(values))
+        yield Line(Instruction.SWP)
+        yield Line(Instruction.STMH, 2)
+
     def visit_TupleNode(self, node: TupleNode, *args, exp_type=None, **kwargs):
         left_exp_type = Variable(None)
         yield from self.visit(node.left, *args, exp_type=left_exp_type, **kwargs)
         right_exp_type = Variable(None)
         yield from self.visit(node.right, *args, exp_type=right_exp_type, **kwargs)
         set_variable(exp_type, TupleNode(left_exp_type.var, right_exp_type.var))
-        yield Line(Instruction.STMH, 2, comment=str(node))
+        yield Line(Instruction.STMH, 2, comment=node)
 
     def eq(self, var_type: TypeNode) -> Iterator[Line]:
         label = "_eq" + self.types_to_label([var_type, var_type])
@@ -917,16 +1254,15 @@ class GeneratorYielder(NodeYielder):
                 # Skip if lengths are not equal
                 yield Line(Instruction.BRF, label + "_end")
 
-                # Load 4 local variables: length, list 1 (next) pointer, list 2 (next) pointer, True
-                yield Line(Instruction.LDL, -3)
-                yield Line(Instruction.LDH, -1)  # Get length of list 1
-                yield Line(Instruction.STL, 1)  # And store it
+                # Load 4 local variables: length, list 1 cursor, list 2 cursor, True
                 yield Line(Instruction.LDL, -3)  # Get list 1
-                yield Line(Instruction.LDH, 0)
-                yield Line(Instruction.STL, 2)  # And store it
+                yield from self.load_list()
+                yield Line(Instruction.STL, 2)  # Store the cursor
+                yield Line(Instruction.STL, 1)  # And the length
                 yield Line(Instruction.LDL, -2)  # Get list 2
-                yield Line(Instruction.LDH, 0)
-                yield Line(Instruction.STL, 3)  # And store it
+                yield from self.load_list()
+                yield Line(Instruction.STL, 3)  # Store the cursor
+                yield Line(Instruction.AJS, -1)  # The length is the same
                 yield Line(Instruction.LDC, -1)  # True
                 yield Line(Instruction.STL, 4)  # And store it
                 # True is the partial result so far
@@ -936,19 +1272,12 @@ class GeneratorYielder(NodeYielder):
                 yield Line(Instruction.BRF, label + "_end")
 
                 # Start loop body
-                # Load list 1 address again
-                yield Line(Instruction.LDL, 2, label=label + "_loop")
-                # Load next value, pointer
-                yield Line(Instruction.LDMH, 0, 2)
-                # Update list pointer
-                yield Line(Instruction.STL, 2)
+                yield Line(label=label + "_loop")
+                # Load the next value
+                yield from self.next_element(2)
                 # Stack: Value from List 1
-                # Load list 2 address again
-                yield Line(Instruction.LDL, 3)
-                # Load next value, pointer
-                yield Line(Instruction.LDMH, 0, 2)
-                # Update list pointer
-                yield Line(Instruction.STL, 3)
+                # Load the next value
+                yield from self.next_element(3)
                 # Stack: Value from List 1, Value from List 2
                 self.functions.append(
                     {"name": "_eq", "type": [var_type.body, var_type.body]}
@@ -1041,7 +1370,99 @@ class GeneratorYielder(NodeYielder):
         yield Line(Instruction.UNLINK)
         yield Line(Instruction.RET)
 
+    def condition(
+        self, node: Node | Token, target: str, jump_if: bool, *args, **kwargs
+    ) -> Iterator[Line]:
+        """Jump to `target` if the boolean expression `node` evaluates to `jump_if`, and
+        continue with the next line otherwise, without leaving the value on the stack.
+
+        `&&` and `||` short-circuit: their right side is not evaluated if the left side
+        decides the outcome, like when their value is computed in `visit_Op2Node`.
+        """
+        match node:
+            case Token(type=Type.TRUE | Type.FALSE):
+                if (node.type == Type.TRUE) == jump_if:
+                    yield Line(Instruction.BRA, target, comment=node)
+
+            case Op1Node(operator=Token(type=Type.NOT)):
+                yield from self.condition(
+                    node.operand, target, not jump_if, *args, **kwargs
+                )
+
+            case Op2Node(operator=Token(type=Type.AND | Type.OR)):
+                # If the left side of `&&` is false, or the left side of `||` is true, then
+                # that is the outcome
+                outcome = node.operator.type == Type.OR
+                if outcome == jump_if:
+                    yield from self.condition(
+                        node.left, target, jump_if, *args, **kwargs
+                    )
+                    yield from self.condition(
+                        node.right, target, jump_if, *args, **kwargs
+                    )
+                else:
+                    skip_label = f"_CondSkip{self.logic_counter}"
+                    self.logic_counter += 1
+                    yield from self.condition(
+                        node.left, skip_label, outcome, *args, **kwargs
+                    )
+                    yield from self.condition(
+                        node.right, target, jump_if, *args, **kwargs
+                    )
+                    yield Line(label=skip_label)
+
+            case _:
+                yield from self.visit(node, *args, **kwargs)
+                branch = Instruction.BRT if jump_if else Instruction.BRF
+                yield Line(branch, target)
+
+    def logic(self, node: Op2Node, *args, **kwargs) -> Iterator[Line]:
+        """Compute the value of `&&` or `||`, only evaluating the right side if the left side
+        does not decide the outcome, i.e. is True for `&&` or False for `||`."""
+        end_label = f"_LogicEnd{self.logic_counter}"
+        self.logic_counter += 1
+
+        yield from self.visit(node.left, *args, **kwargs)
+        # Keep the value of the left side as outcome, if it decides the outcome
+        yield Line(Instruction.LDS, 0)
+        branch = Instruction.BRF if node.operator.type == Type.AND else Instruction.BRT
+        yield Line(branch, end_label)
+        yield Line(Instruction.AJS, -1)
+        yield from self.visit(node.right, *args, **kwargs)
+        yield Line(label=end_label)
+
+    def literal_list(self, node: Op2Node) -> Optional[List[Token]]:
+        """The elements of a chain of `:` that ends in `[]`, if they are all literals."""
+        elements = []
+        while isinstance(node, Op2Node) and node.operator.type == Type.COLON:
+            if constant(node.left) is None:
+                return None
+            elements.append(node.left)
+            node = node.right
+        if isinstance(node, ListNode) and node.body is None:
+            return elements
+        return None
+
     def visit_Op2Node(self, node: Op2Node, *args, exp_type=None, **kwargs):
+        if node.operator.type == Type.COLON and self.lists == ListLayout.ARRAY:
+            elements = self.literal_list(node)
+            if elements:
+                # Literals have no side effects, so they can be loaded from last to first
+                element_type = Variable(None)
+                values = [
+                    line
+                    for element in reversed(elements)
+                    for line in self.visit(element, exp_type=element_type)
+                ]
+                set_variable(exp_type, ListNode(element_type.var))
+                yield from self.array_block(values, node)
+                return
+
+        if node.operator.type in (Type.AND, Type.OR):
+            set_variable(exp_type, BoolTypeNode())
+            yield from self.logic(node, *args, **kwargs)
+            return
+
         # First recurse into both children
         left_exp_type = Variable(None)
         yield from self.visit(node.left, *args, exp_type=left_exp_type, **kwargs)
@@ -1049,30 +1470,22 @@ class GeneratorYielder(NodeYielder):
         yield from self.visit(node.right, *args, exp_type=right_exp_type, **kwargs)
 
         match node.operator:
-            # Boolean operations
-            case Token(type=Type.AND):
-                set_variable(exp_type, BoolTypeNode())
-                yield Line(Instruction.AND, comment=str(node))
-            case Token(type=Type.OR):
-                set_variable(exp_type, BoolTypeNode())
-                yield Line(Instruction.OR, comment=str(node))
-
             # Arithmetic operations
             case Token(type=Type.PLUS):
                 set_variable(exp_type, IntTypeNode())
-                yield Line(Instruction.ADD, comment=str(node))
+                yield Line(Instruction.ADD, comment=node)
             case Token(type=Type.MINUS):
                 set_variable(exp_type, IntTypeNode())
-                yield Line(Instruction.SUB, comment=str(node))
+                yield Line(Instruction.SUB, comment=node)
             case Token(type=Type.STAR):
                 set_variable(exp_type, IntTypeNode())
-                yield Line(Instruction.MUL, comment=str(node))
+                yield Line(Instruction.MUL, comment=node)
             case Token(type=Type.SLASH):
                 set_variable(exp_type, IntTypeNode())
-                yield Line(Instruction.DIV, comment=str(node))
+                yield Line(Instruction.DIV, comment=node)
             case Token(type=Type.PERCENT):
                 set_variable(exp_type, IntTypeNode())
-                yield Line(Instruction.MOD, comment=str(node))
+                yield Line(Instruction.MOD, comment=node)
 
             # Equality
             case Token(type=Type.DEQUALS) | Token(type=Type.NEQ):
@@ -1096,7 +1509,7 @@ class GeneratorYielder(NodeYielder):
                 self.functions.append({"name": "_eq", "type": types})
                 # Branch to the function that is being called
                 label = "_eq" + self.types_to_label(types)
-                yield Line(Instruction.BSR, label, comment=str(node))
+                yield Line(Instruction.BSR, label, comment=node)
 
                 # Clean up the stack that still has the function call arguments on it
                 yield Line(Instruction.AJS, -2)
@@ -1105,21 +1518,21 @@ class GeneratorYielder(NodeYielder):
                 yield Line(Instruction.LDR, "RR")
 
                 if node.operator.type == Type.NEQ:
-                    yield Line(Instruction.NOT, comment=str(node))
+                    yield Line(Instruction.NOT, comment=node)
 
             # Arithmetic Equality
             case Token(type=Type.LT):
                 set_variable(exp_type, BoolTypeNode())
-                yield Line(Instruction.LT, comment=str(node))
+                yield Line(Instruction.LT, comment=node)
             case Token(type=Type.GT):
                 set_variable(exp_type, BoolTypeNode())
-                yield Line(Instruction.GT, comment=str(node))
+                yield Line(Instruction.GT, comment=node)
             case Token(type=Type.LEQ):
                 set_variable(exp_type, BoolTypeNode())
-                yield Line(Instruction.LE, comment=str(node))
+                yield Line(Instruction.LE, comment=node)
             case Token(type=Type.GEQ):
                 set_variable(exp_type, BoolTypeNode())
-                yield Line(Instruction.GE, comment=str(node))
+                yield Line(Instruction.GE, comment=node)
 
             # Lists
             case Token(type=Type.COLON):
@@ -1127,41 +1540,14 @@ class GeneratorYielder(NodeYielder):
                 # Assume Stack is like:
                 #   Value to prepend to list
                 #   Pointer to (length, next*)
-                """
-                We should copy the entire array if either the left or the right side of colon operator contains an ID,
-                and that ID is different from the ID we are assigning to.
-                """
-                copy_left = (
+                # `_prepend_element` modifies the list it prepends to, so a list that may be
+                # used elsewhere is copied first, unless the OwnershipAnalysis shows otherwise
+                if (
                     isinstance(node.left, Token)
                     and node.left.type == Type.ID
-                    and node.left.text != self.var_decl_assignment.text
-                )
-                copy_right = (
-                    isinstance(node.right, Token)
-                    and node.right.type == Type.ID
-                    and node.right.text != self.var_decl_assignment.text
-                )
-
-                if copy_left:
-                    type_left = exp_type.var
-                    yield Line(
-                        Instruction.BSR, "_deep_copy" + self.types_to_label([type_left])
-                    )
-                    yield Line(Instruction.AJS, -1)
-                    yield Line(Instruction.LDR, "RR")
-
-                    self.functions.append({"name": "_deepcopy", "type": [type_left]})
-
-                if copy_right:
-                    type_right = exp_type.var
-                    yield Line(
-                        Instruction.BSR,
-                        "_deep_copy" + self.types_to_label([type_right]),
-                    )
-                    yield Line(Instruction.AJS, -1)
-                    yield Line(Instruction.LDR, "RR")
-
-                    self.functions.append({"name": "_deepcopy", "type": [type_right]})
+                    or (isinstance(node.right, Token) and node.right.type == Type.ID)
+                ):
+                    yield from self.copy_list(node, ListNode(left_exp_type.var))
 
                 # Prepend the element to the list
                 yield Line(Instruction.BSR, "_prepend_element")
@@ -1174,11 +1560,30 @@ class GeneratorYielder(NodeYielder):
                     self.include_function.add("_prepend_element")
 
                 # if not isinstance(node.right, ListNode):
-                # yield Line(Instruction.STMH, 2, comment=str(node))
+                # yield Line(Instruction.STMH, 2, comment=node)
                 yield from []
             case _:
                 raise NotImplementedError(repr(node.operator))
 
+    def copy_list(self, node: Op2Node, list_type: ListNode) -> Iterator[Line]:
+        """Copy the list on top of the stack that `node` prepends to, if necessary."""
+        eliminated = self.ownership.eliminated.get(id(node))
+        if eliminated:
+            self.copies[eliminated[1]] += 1
+        elif not self.ownership.writes:
+            # Elements are never modified, so lists can share them, and only the
+            # (length, next*) pair that `_prepend_element` modifies is copied
+            self.copies["shared"] += 1
+            yield Line(Instruction.LDMH, 0, 2)
+            yield Line(Instruction.STMH, 2)
+        else:
+            self.copies["copied"] += 1
+            label = "_deep_copy" + self.types_to_label([list_type])
+            yield Line(Instruction.BSR, label)
+            yield Line(Instruction.AJS, -1)
+            yield Line(Instruction.LDR, "RR")
+            self.functions.append({"name": "_deepcopy", "type": [list_type]})
+
     def deep_copy(self, node: ListNode) -> Iterator[Line]:
         # Assumes the variable to be copied is on top of the stack
         label = "_deep_copy" + self.types_to_label([node])
@@ -1205,25 +1610,13 @@ class GeneratorYielder(NodeYielder):
                 yield Line(Instruction.EQ)
                 # Jump to end of loop if local length == 0
                 yield Line(Instruction.BRT, f"_return_new_list_{label}")
-                # Set current reference to copy from
+                # Set a cursor to the first element to copy from
                 yield Line(Instruction.LDL, -2)
-                # Update reference to first element
-                # Get reference
-                yield Line(Instruction.LDL, 2)
-                # Get new reference
-                yield Line(Instruction.LDA, 0)
-                # Update reference
-                yield Line(Instruction.STL, 2)
+                yield from self.load_list()
+                yield Line(Instruction.STS, -1)
                 yield Line(label=f"_load_loop_{label}")
                 # Recursively load all elements of list
-                # Get reference
-                yield Line(Instruction.LDL, 2)
-                # Get element
-                yield Line(Instruction.LDA, -1)
-                # Update reference
-                yield Line(Instruction.LDL, 2)
-                yield Line(Instruction.LDA, 0)
-                yield Line(Instruction.STL, 2)
+                yield from self.next_element(2)
 
                 # Decrement length of remaining element
                 # Get length
@@ -1313,6 +1706,11 @@ class GeneratorYielder(NodeYielder):
                 yield Line(Instruction.UNLINK)
                 # Replace the pointer with a new pointer
                 yield Line(Instruction.RET)
+            case ListNode() if self.lists == ListLayout.ARRAY:
+                # The values are not lists, so they are copied with the block
+                yield Line(label=label)
+                yield Line(Instruction.BRA, "_array_duplicate")
+                self.include_function.add("_array_duplicate")
             case ListNode():
                 yield Line(label=label)
                 yield Line(Instruction.LINK, 0)
@@ -1331,25 +1729,13 @@ class GeneratorYielder(NodeYielder):
                 yield Line(Instruction.EQ)
                 # Jump to end of loop if local length == 0
                 yield Line(Instruction.BRT, f"_return_new_list_{label}")
-                # Set current reference to copy from
+                # Set a cursor to the first element to copy from
                 yield Line(Instruction.LDL, -2)
-                # Update reference to first element
-                # Get reference
-                yield Line(Instruction.LDL, 2)
-                # Get new reference
-                yield Line(Instruction.LDA, 0)
-                # Update reference
-                yield Line(Instruction.STL, 2)
+                yield from self.load_list()
+                yield Line(Instruction.STS, -1)
                 yield Line(label=f"_load_loop_{label}")
                 # Recursively load all elements of list
-                # Get reference
-                yield Line(Instruction.LDL, 2)
-                # Get element
-                yield Line(Instruction.LDA, -1)
-                # Update reference
-                yield Line(Instruction.LDL, 2)
-                yield Line(Instruction.LDA, 0)
-                yield Line(Instruction.STL, 2)
+                yield from self.next_element(2)
 
                 # Decrement length of remaining element
                 # Get length
@@ -1437,11 +1823,11 @@ class GeneratorYielder(NodeYielder):
         match node.operator:
             case Token(type=Type.NOT):
                 set_variable(exp_type, BoolTypeNode())
-                yield Line(Instruction.NOT, comment=str(node))
+                yield Line(Instruction.NOT, comment=node)
 
             case Token(type=Type.MINUS):
                 set_variable(exp_type, IntTypeNode())
-                yield Line(Instruction.NEG, comment=str(node))
+                yield Line(Instruction.NEG, comment=node)
 
             case _:
                 raise NotImplementedError(repr(node.operator))
@@ -1528,40 +1914,33 @@ class GeneratorYielder(NodeYielder):
             case Token(type=Type.TRUE):
                 # True is encoded as -1
                 set_variable(exp_type, BoolTypeNode())
-                yield Line(Instruction.LDC, -1, comment=str(node))
+                yield Line(Instruction.LDC, -1, comment=node)
 
             case Token(type=Type.FALSE):
                 # True is encoded as 0
                 set_variable(exp_type, BoolTypeNode())
-                yield Line(Instruction.LDC, 0, comment=str(node))
+                yield Line(Instruction.LDC, 0, comment=node)
 
             case Token(type=Type.ID):
                 if node in self.variables["local"]:
-                    # Local variables are positive relative to MP, starting from 1
-                    index = list(self.variables["local"]).index(node)
-                    offset = index + 1
+                    offset = self.offsets["local"][node.text]
                     set_variable(exp_type, self.variables["local"][node])
-                    yield Line(Instruction.LDL, offset, comment=str(node))
+                    yield Line(Instruction.LDL, offset, comment=node)
 
                 elif node in self.variables["arguments"]:
-                    # Index 0 means we need to get the first argument, so the furthest away one
-                    # The last argument is at -2
-                    index = list(self.variables["arguments"]).index(node)
-                    offset = index - 1 - len(self.variables["arguments"])
+                    # The first argument is the furthest away one, the last argument is at -2
+                    offset = self.offsets["arguments"][node.text]
                     # Load the function argument using the offset from MP
                     set_variable(exp_type, self.variables["arguments"][node])
-                    yield Line(Instruction.LDL, offset, comment=str(node))
+                    yield Line(Instruction.LDL, offset, comment=node)
 
                 elif node in self.variables["global"]:
-                    # Global variables are positive relative to Global Pointer (GP), starting from 1
-                    index = list(self.variables["global"]).index(node)
-                    offset = index + 1
-
+                    offset = self.offsets["global"][node.text]
                     set_variable(exp_type, self.variables["global"][node])
                     yield Line(
                         Instruction.LDR, "R5", comment="Load Global Pointer (GP)"
                     )
-                    yield Line(Instruction.LDA, offset, comment=str(node))
+                    yield Line(Instruction.LDA, offset, comment=node)
 
                 else:
                     raise UnrecoverableError(f"Variable {node.text!r} does not exist")
@@ -1572,7 +1951,7 @@ class GeneratorYielder(NodeYielder):
                 if integer_value >= 2**31:
                     CompilerOverFlowError(self.program, node.span, integer_value)
                 set_variable(exp_type, IntTypeNode())
-                yield Line(Instruction.LDC, int(node.text), comment=str(node))
+                yield Line(Instruction.LDC, int(node.text), comment=node)
 
             case Token(type=Type.CHARACTER):
                 # Get the character range. Can be larger than length 1 if '\\n' etc.
@@ -1580,7 +1959,7 @@ class GeneratorYielder(NodeYielder):
                 # Remove duplicate escaping, i.e. '\\n' -> '\n'
                 character = character.encode().decode("unicode_escape")
                 set_variable(exp_type, CharTypeNode())
-                yield Line(Instruction.LDC, ord(character), comment=str(node))
+                yield Line(Instruction.LDC, ord(character), comment=node)
 
             case Token(type=Type.CONTINUE):
                 if loop_type == "for":
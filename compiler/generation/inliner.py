@@ -0,0 +1,410 @@
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from compiler.generation.instruction import Instruction
+from compiler.generation.line import Line
+
+# Routines of at most this many instructions are inlined, e.g. `_is_empty`, `_tail` or small
+# user functions
+INLINE_SIZE = 24
+
+# The change of the stack pointer per instruction, for instructions without operands that
+# affect it. Instructions that are not listed here and are not handled by `stack_effect`
+# prevent a routine from being inlined, e.g. instructions that use MP or SP.
+BINARY = (
+    Instruction.ADD,
+    Instruction.MUL,
+    Instruction.SUB,
+    Instruction.DIV,
+    Instruction.MOD,
+    Instruction.AND,
+    Instruction.OR,
+    Instruction.XOR,
+    Instruction.EQ,
+    Instruction.NE,
+    Instruction.LT,
+    Instruction.LE,
+    Instruction.GT,
+    Instruction.GE,
+)
+FIXED_EFFECTS = {
+    **{instruction: -1 for instruction in BINARY},
+    Instruction.LDC: 1,
+    Instruction.LDS: 1,
+    Instruction.STS: -1,
+    Instruction.LDA: 0,
+    Instruction.STA: -2,
+    Instruction.LDH: 0,
+    Instruction.STH: 0,
+    Instruction.SWP: 0,
+    Instruction.NEG: 0,
+    Instruction.NOT: 0,
+    Instruction.NOP: 0,
+    Instruction.BRA: 0,
+    Instruction.BRF: -1,
+    Instruction.BRT: -1,
+    # The called routine returns with the stack as it was before the call
+    Instruction.BSR: 0,
+    Instruction.HALT: 0,
+}
+# Registers that the stack and frame are kept in, which inlined routines may not use
+FRAME_REGISTERS = ("PC", "SP", "MP")
+
+
+def stack_effect(instruction: Tuple) -> Optional[int]:
+    """The change of the stack pointer by `instruction`, or None if it is unknown."""
+    operation, *operands = instruction
+    match operation:
+        case Instruction.AJS:
+            return operands[0]
+        case Instruction.LDR if operands[0] not in FRAME_REGISTERS:
+            return 1
+        case Instruction.STR if operands[0] not in FRAME_REGISTERS:
+            return -1
+        case Instruction.LDMH | Instruction.LDMA:
+            return operands[1] - 1
+        case Instruction.STMH:
+            return 1 - operands[0]
+        case Instruction.STMA:
+            return -operands[1] - 1
+        case Instruction.TRAP if operands[0] in (0, 1):
+            return -1
+        case Instruction.TRAP if operands[0] in (10, 11):
+            return 1
+    return FIXED_EFFECTS.get(operation)
+
+
+def targets(line: Line) -> List[str]:
+    """The labels that `line` may jump to."""
+    if line.instruction and line.instruction[0] in (
+        Instruction.BRA,
+        Instruction.BRF,
+        Instruction.BRT,
+        Instruction.BSR,
+    ):
+        return [line.instruction[1]]
+    return []
+
+
+@dataclass
+class Routine:
+    """
+    A routine that can be inlined, i.e. a label followed by `LINK n`, after which it is left
+    through `UNLINK` and `RET`, and only uses its own frame relative to MP. `depths` holds the
+    number of values on the stack above the locals before the instructions after `LINK`, by
+    index in the lines, `entry` the indices of the label and `LINK`, and `exits` the indices
+    of `RET`.
+    """
+
+    label: str
+    locals: int
+    entry: range
+    depths: Dict[int, int]
+    exits: Set[int]
+
+    @property
+    def indices(self) -> Set[int]:
+        return {*self.entry, *self.depths, *self.exits}
+
+
+class Inliner:
+    """
+    Replace calls to short routines, i.e. `BSR label; AJS -k; LDR RR`, by the body of the
+    routine, such that the call and the frame of the routine are no longer needed. The
+    arguments stay on the stack, where the routine reads them with `LDS` rather than `LDL`,
+    and are replaced by the returned value. Routines that are no longer called afterwards are
+    removed.
+
+    The number of call sites that are inlined per routine is kept in `inlined`, and the
+    number of instructions that each inlined call saves when it is executed in `saved`.
+
+    >>> inliner = Inliner()
+    >>> lines = inliner.inline(GeneratorYielder(program).visit(tree))
+    >>> print(inliner.report())
+    """
+
+    def __init__(self, size: int = INLINE_SIZE) -> None:
+        self.size = size
+        self.inlined = Counter()
+        self.saved: Dict[str, int] = {}
+
+    def inline(self, lines: Iterable[Line]) -> List[Line]:
+        """Inline the calls to the routines of at most `size` instructions in `lines`.
+
+        Args:
+            lines (Iterable[Line]): The lines to inline calls in, e.g. from
+                `GeneratorYielder.visit`.
+
+        Returns:
+            List[Line]: The lines with inlined calls. The given lines are not modified.
+        """
+        lines = list(lines)
+        labels = {line.label: index for index, line in enumerate(lines) if line.label}
+        routines: Dict[Tuple[str, int], Optional[Routine]] = {}
+        # The lines with the index of the line they were copied from, or None for lines of
+        # inlined routines
+        output: List[Tuple[Optional[int], Line]] = []
+        index = 0
+        while index < len(lines):
+            call = self.call_site(lines, index)
+            if call is not None:
+                label, arguments, length = call
+                key = (label, arguments)
+                if key not in routines:
+                    routines[key] = self.routine(lines, labels, label, arguments)
+                routine = routines[key]
+                # Recursive calls are not inlined in the routine itself
+                if routine is not None and index not in routine.depths:
+                    expanded = self.expand(lines, routine, arguments, lines[index])
+                    output.extend((None, line) for line in expanded)
+                    self.inlined[label] += 1
+                    index += length
+                    continue
+            output.append((index, lines[index]))
+            index += 1
+
+        inlined = [routine for routine in routines.values() if routine is not None]
+        return self.remove_unused(output, inlined)
+
+    @staticmethod
+    def call_site(lines: List[Line], index: int) -> Optional[Tuple[str, int, int]]:
+        """The called label, the number of arguments and the number of lines of the call that
+        starts at `index`, if any."""
+        window = lines[index : index + 3]
+        if any(line.label for line in window[1:]):
+            return None
+        match [line.instruction for line in window]:
+            case [(Instruction.BSR, label), (Instruction.LDR, "RR"), *_]:
+                return label, 0, 2
+            case [
+                (Instruction.BSR, label),
+                (Instruction.AJS, offset),
+                (Instruction.LDR, "RR"),
+            ] if offset < 0:
+                return label, -offset, 3
+        return None
+
+    def routine(
+        self, lines: List[Line], labels: Dict[str, int], label: str, arguments: int
+    ) -> Optional[Routine]:
+        """Analyse the routine at `label` for calls with `arguments` arguments, or return
+        None if it cannot be inlined."""
+        if label not in labels:
+            return None
+        start = labels[label]
+        link = start
+        while link < len(lines) and not lines[link].instruction:
+            link += 1
+        if link == len(lines) or lines[link].instruction[0] != Instruction.LINK:
+            return None
+        locals = lines[link].instruction[1]
+
+        depths = {link + 1: 0}
+        work = [link + 1]
+        while work:
+            index = work.pop()
+            successors = self.successors(lines, labels, index, depths[index])
+            if successors is None:
+                return None
+            for successor, depth in successors:
+                if depth < 0 or successor >= len(lines):
+                    return None
+                if successor not in depths:
+                    depths[successor] = depth
+                    work.append(successor)
+                elif depths[successor] != depth:
+                    return None
+
+        # The arguments and locals of the frame are read and written on the stack instead,
+        # without the return address and MP in between, so the stack below the locals is off
+        # limits otherwise
+        for index, depth in depths.items():
+            operation, *operands = lines[index].instruction or (None,)
+            if operation in (Instruction.LDL, Instruction.STL):
+                if not (
+                    -arguments - 1 <= operands[0] <= -2 or 1 <= operands[0] <= locals
+                ):
+                    return None
+            elif operation in (Instruction.LDS, Instruction.STS):
+                if operands[0] <= -locals - depth:
+                    return None
+        if sum(1 for index in depths if lines[index].instruction) > self.size:
+            return None
+
+        exits = {
+            index + 1
+            for index in depths
+            if lines[index].instruction == (Instruction.UNLINK,)
+        }
+        routine = Routine(label, locals, range(start, link + 1), depths, exits)
+        # Other code may not jump into the routine, except to its label
+        inner = {lines[index].label for index in depths if lines[index].label}
+        for index, line in enumerate(lines):
+            if index not in depths and inner.intersection(targets(line)):
+                return None
+        return routine
+
+    @staticmethod
+    def successors(
+        lines: List[Line], labels: Dict[str, int], index: int, depth: int
+    ) -> Optional[List[Tuple[int, int]]]:
+        """The lines that can be executed after the line at `index` of a routine, with the
+        number of values above the locals before them, or None if this is unknown."""
+        line = lines[index]
+        if not line.instruction:
+            return [(index + 1, depth)]
+        operation = line.instruction[0]
+        if operation == Instruction.UNLINK:
+            # The routine must be left right away
+            after = lines[index + 1] if index + 1 < len(lines) else Line()
+            if after.instruction != (Instruction.RET,) or after.label:
+                return None
+            return []
+        if operation == Instruction.LDL:
+            return [(index + 1, depth + 1)]
+        if operation == Instruction.STL:
+            return [(index + 1, depth - 1)]
+
+        change = stack_effect(line.instruction)
+        if change is None:
+            return None
+        successors = []
+        if operation not in (Instruction.BRA, Instruction.HALT):
+            successors.append((index + 1, depth + change))
+        if operation != Instruction.BSR:
+            for target in targets(line):
+                if target not in labels:
+                    return None
+                successors.append((labels[target], depth + change))
+        return successors
+
+    def expand(
+        self, lines: List[Line], routine: Routine, arguments: int, call: Line
+    ) -> List[Line]:
+        """The body of `routine` for a call with `arguments` arguments on the stack."""
+        suffix = f"_inline_{sum(self.inlined.values())}"
+        end = routine.label + suffix
+
+        def offset(line: Line, depth: int) -> int:
+            # The offset relative to SP of an argument or local, given the number of values
+            # above the locals
+            offset = line.instruction[1]
+            if offset < 0:
+                return offset + 2 - routine.locals - depth
+            return offset - routine.locals - depth
+
+        output = [Line(label=call.label, comment=call.comment)]
+        if routine.locals:
+            output.append(Line(Instruction.AJS, routine.locals))
+        saved = []
+        for index in sorted(routine.depths):
+            line = lines[index]
+            depth = routine.depths[index]
+            operation = line.instruction[0] if line.instruction else None
+            if operation == Instruction.LDL:
+                new = [Line(Instruction.LDS, offset(line, depth))]
+            elif operation == Instruction.STL:
+                new = [Line(Instruction.STS, offset(line, depth))]
+            elif operation in (Instruction.BRA, Instruction.BRF, Instruction.BRT):
+                new = [Line(operation, line.instruction[1] + suffix)]
+            elif operation == Instruction.UNLINK:
+                new, removed = self.exit(lines, index, routine, arguments, depth)
+                new.append(Line(Instruction.BRA, end))
+                saved.append(removed - len(new) - bool(routine.locals))
+            elif operation == Instruction.RET or returns(lines, index):
+                # The returned value is kept on the stack instead, see `exit`
+                new = [Line()]
+            else:
+                new = [Line(*line.instruction)]
+            new[0].label = line.label + suffix if line.label else ""
+            new[-1].comment = new[-1].comment or line.comment
+            output.extend(new)
+
+        # The last exit continues with the lines after the call without branching
+        if output[-1].instruction == (Instruction.BRA, end):
+            output.pop()
+            saved[-1] += 1
+        if any(end in targets(line) for line in output):
+            output.append(Line(label=end))
+        self.saved[routine.label] = min(saved, default=0)
+        return [line for line in output if line.instruction or line.label]
+
+    @staticmethod
+    def exit(
+        lines: List[Line], index: int, routine: Routine, arguments: int, depth: int
+    ) -> Tuple[List[Line], int]:
+        """The lines that replace `UNLINK; RET` at `index` and the rest of the call site,
+        and the number of instructions that they replace when executed."""
+        frame = arguments + routine.locals + depth
+        # BSR, LINK, UNLINK, RET, LDR RR, and AJS if there are arguments
+        removed = 5 + bool(arguments)
+        if not returns(lines, index - 1):
+            new = [Line(Instruction.AJS, -frame)] if frame else []
+            return new + [Line(Instruction.LDR, "RR")], removed
+
+        # The returned value replaces the first argument, rather than being stored in RR
+        frame += 1
+        new = []
+        if frame > 1:
+            new.append(Line(Instruction.STS, 1 - frame))
+        if frame > 2:
+            new.append(Line(Instruction.AJS, 2 - frame))
+        return new, removed + 1
+
+    @staticmethod
+    def remove_unused(
+        output: List[Tuple[Optional[int], Line]], routines: List[Routine]
+    ) -> List[Line]:
+        """Remove the routines that are no longer called or jumped to by other lines, and
+        that are not reached from the lines before them."""
+        while True:
+            removed = None
+            for routine in routines:
+                indices = routine.indices
+                used = any(
+                    routine.label in targets(line)
+                    for index, line in output
+                    if index not in indices
+                )
+                positions = [
+                    position
+                    for position, (index, _) in enumerate(output)
+                    if index in indices
+                ]
+                if used or not positions:
+                    continue
+                before = output[positions[0] - 1][1] if positions[0] else Line()
+                if before.instruction[:1] in (
+                    (Instruction.RET,),
+                    (Instruction.BRA,),
+                    (Instruction.HALT,),
+                ):
+                    removed = set(positions)
+                    break
+            if removed is None:
+                return [line for _, line in output]
+            output = [
+                item for position, item in enumerate(output) if position not in removed
+            ]
+
+    def report(self) -> str:
+        """Format the number of inlined calls per routine, and the number of instructions
+        that each of those calls saves at least when it is executed."""
+        width = max((len(label) for label in self.inlined), default=5)
+        lines = [f"{'':<{width}}  {'calls':>6}  {'saved':>6}"]
+        lines.extend(
+            f"{label:<{width}}  {calls:6d}  {self.saved[label]:6d}"
+            for label, calls in self.inlined.most_common()
+        )
+        lines.append(f"{'Total':<{width}}  {sum(self.inlined.values()):6d}")
+        return "\n".join(lines)
+
+
+def returns(lines: List[Line], index: int) -> bool:
+    """Whether the line at `index` stores the returned value right before `UNLINK`."""
+    return (
+        lines[index].instruction == (Instruction.STR, "RR")
+        and lines[index + 1].instruction == (Instruction.UNLINK,)
+        and not lines[index + 1].label
+    )
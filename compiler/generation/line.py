@@ -2,23 +2,45 @@ from dataclasses import dataclass
 from typing import Tuple
 
 from compiler.generation.instruction import Instruction
+from compiler.token import Token
+from compiler.tree.printer import Printer, Renderings
+from compiler.tree.tree import Node
 
 
 @dataclass
 class Line:
     label: str
     instruction: Tuple[str]
-    comment: str
+    # Either a fixed comment, or the node that the line was generated from, which is only
+    # printed if the line is rendered with annotations
+    comment: str | Node | Token
 
     def __init__(
-        self, *instruction: Tuple[Instruction | str], label: str = "", comment: str = ""
+        self,
+        *instruction: Tuple[Instruction | str],
+        label: str = "",
+        comment: str | Node | Token = "",
     ) -> None:
         self.label = label
         self.instruction = instruction
-        self.comment = comment.replace("\n", "")
+        self.comment = comment
+
+    def render(self, annotate: bool = True, renderings: Renderings = None) -> str:
+        """Format the line as SSM code, with the node it was generated from as comment if
+        `annotate` is True. Nodes are printed reusing `renderings`, see `Printer.render`."""
+        comment = self.comment
+        if not annotate:
+            comment = comment if isinstance(comment, str) else ""
+        elif isinstance(comment, Node):
+            comment = Printer.render(comment, renderings)
+        elif isinstance(comment, Token):
+            comment = str(comment)
 
-    def __repr__(self) -> str:
         label = f"\n{self.label}:\t" if self.label else "\t"
         instruction = " ".join(str(instruction) for instruction in self.instruction)
-        comment = f"\t\t\t; {self.comment}" if self.comment else ""
+        if comment:
+            comment = "\t\t\t; " + comment.replace("\n", "")
         return label + instruction + comment
+
+    def __repr__(self) -> str:
+        return self.render()
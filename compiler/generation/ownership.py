@@ -0,0 +1,407 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from compiler.token import Token
+from compiler.tree.visitor import NodeVisitor
+from compiler.type import Type
+
+from compiler.tree.tree import (  # isort:skip
+    BoolTypeNode,
+    CharTypeNode,
+    ForNode,
+    FunCallNode,
+    FunDeclNode,
+    IfElseNode,
+    IntTypeNode,
+    ListAbbrNode,
+    ListNode,
+    Node,
+    Op2Node,
+    ReturnNode,
+    SPLNode,
+    StmtAssNode,
+    StmtNode,
+    StringLiteralNode,
+    VariableNode,
+    WhileNode,
+)
+
+# Built-in functions that only inspect the list they are given, rather than keeping it
+INSPECTING_FUNCTIONS = {"print", "println", "isEmpty", "length"}
+
+
+def is_id(node: Node | Token) -> bool:
+    return isinstance(node, Token) and node.type == Type.ID
+
+
+def is_colon(node: Node | Token) -> bool:
+    return isinstance(node, Op2Node) and node.operator.type == Type.COLON
+
+
+@dataclass
+class Ownership:
+    """
+    The `:` operations of a program that can prepend to their list without copying it first.
+    `_prepend_element` modifies the (length, next*) pair of the list it prepends to, so the
+    generator copies lists that may still be used elsewhere. That copy is unnecessary if the
+    list is a temporary, e.g. `1 : []`, or if it is stored in a local variable that owns it and
+    is not used afterwards, e.g. `acc` in `acc = x : acc`.
+
+    If the program never assigns to the fields of a list, e.g. `xs.hd = 1`, then lists can
+    share their elements, and the remaining copies only copy the (length, next*) pair.
+    """
+
+    # Whether the program assigns to list or tuple fields in place
+    writes: bool
+    # The `:` operations that do not copy their list, with the reason, by node id
+    eliminated: Dict[int, Tuple[Op2Node, str]] = field(default_factory=dict)
+
+    def report(self) -> str:
+        """Format the eliminated copies with their line and reason."""
+        lines = [
+            f"{node.span.start_ln:4d}  {reason:<9}  {node}"
+            for node, reason in sorted(
+                self.eliminated.values(), key=lambda item: item[0].span.start_ln
+            )
+        ]
+        lines.append(f"Eliminated {len(self.eliminated)} copies")
+        return "\n".join(lines)
+
+
+class FieldWriteVisitor(NodeVisitor):
+    """Find whether any assignment stores into a field, e.g. `xs.tl = ys`."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.writes = False
+
+    def find(self, node: Node) -> bool:
+        self.visit(node)
+        return self.writes
+
+    def visit_StmtAssNode(self, node: StmtAssNode, *args, **kwargs):
+        if node.id.field and node.id.field.fields:
+            self.writes = True
+
+
+class ReturnVisitor(NodeVisitor):
+    """Collect the returned expressions of a function."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.returned: List[Node | Token] = []
+
+    def collect(self, node: FunDeclNode) -> List[Node | Token]:
+        self.visit_children(node)
+        return self.returned
+
+    def visit_ReturnNode(self, node: ReturnNode, *args, **kwargs):
+        if node.exp is not None:
+            self.returned.append(node.exp)
+
+
+class ReadVisitor(NodeVisitor):
+    """
+    Count the reads of variables in an expression, and collect its `:` operations. Reads
+    that may let the list of a variable be stored elsewhere, e.g. `ys = xs` or `f(xs)`, are
+    collected in `escapes`.
+    """
+
+    def __init__(self, functions: Set[str], writes: bool) -> None:
+        super().__init__()
+        self.functions = functions
+        self.writes = writes
+        self.reads = Counter()
+        self.escapes: Set[str] = set()
+        self.colons: List[Op2Node] = []
+
+    def collect(self, node: Optional[Node | Token], allowed: bool = False):
+        if node is not None:
+            self.visit(node, allowed=allowed)
+        return self
+
+    def visit_children(self, node: Node | Token, *args, **kwargs):
+        # E.g. storing a list in a tuple lets it escape
+        super().visit_children(node, allowed=False)
+
+    def visit_Token(self, node: Token, *args, allowed=False, **kwargs):
+        if node.type == Type.ID:
+            self.reads[node.text] += 1
+            if not allowed:
+                self.escapes.add(node.text)
+
+    def visit_VariableNode(self, node: VariableNode, *args, allowed=False, **kwargs):
+        if not (node.field and node.field.fields):
+            self.visit(node.id, allowed=allowed)
+            return
+        # The tail of a list shares its elements, which matters if elements are written
+        last = node.field.fields[-1]
+        shares = isinstance(last, Token) and last.type == Type.TL
+        self.visit(node.id, allowed=not (self.writes and shares))
+        for item in node.field.fields:
+            if not isinstance(item, Token):
+                self.visit(item, allowed=False)
+
+    def visit_FunCallNode(self, node: FunCallNode, *args, **kwargs):
+        # The name of the function is not a variable
+        allowed = (
+            node.func.text in INSPECTING_FUNCTIONS
+            and node.func.text not in self.functions
+        )
+        for arg in node.args.items if node.args else []:
+            self.visit(arg, allowed=allowed)
+
+    def visit_StmtAssNode(self, node: StmtAssNode, *args, **kwargs):
+        # Assigning to a variable does not read it, unless a field of it is assigned to
+        if node.id.field and node.id.field.fields:
+            self.visit(node.id, allowed=True)
+        self.visit(node.exp, allowed=False)
+
+    def visit_ReturnNode(self, node: ReturnNode, *args, **kwargs):
+        self.collect(node.exp, allowed=True)
+
+    def visit_ForNode(self, node: ForNode, *args, **kwargs):
+        self.visit(node.loop, allowed=True)
+        for stmt in node.body:
+            self.visit(stmt, allowed=False)
+
+    def visit_Op2Node(self, node: Op2Node, *args, **kwargs):
+        if is_colon(node):
+            # Long chains of `:` are visited iteratively, to avoid recursing once per element
+            while is_colon(node):
+                self.colons.append(node)
+                # The element is stored in the list
+                self.visit(node.left, allowed=False)
+                node = node.right
+            # The list is either copied or prepended to if it is not used afterwards
+            self.visit(node, allowed=True)
+            return
+        # Lists can be compared without storing them
+        allowed = node.operator.type in (Type.DEQUALS, Type.NEQ)
+        self.visit(node.left, allowed=allowed)
+        self.visit(node.right, allowed=allowed)
+
+
+def flat(node: Node | Token) -> bool:
+    """Whether `node` is the type of a list of integers, characters or booleans."""
+    return isinstance(node, ListNode) and isinstance(
+        node.body, (IntTypeNode, CharTypeNode, BoolTypeNode)
+    )
+
+
+class UnownedVisitor(NodeVisitor):
+    """Collect the variables that are assigned a list that may be referred to elsewhere, as
+    well as the variables of for loops."""
+
+    def __init__(self, fresh: Callable[[Node | Token], bool]) -> None:
+        super().__init__()
+        self.fresh = fresh
+        self.names: Set[str] = set()
+
+    def collect(self, node: FunDeclNode) -> Set[str]:
+        self.visit_children(node)
+        return self.names
+
+    def visit_StmtAssNode(self, node: StmtAssNode, *args, **kwargs):
+        if not (node.id.field and node.id.field.fields) and not self.fresh(node.exp):
+            self.names.add(node.id.id.text)
+
+    def visit_ForNode(self, node: ForNode, *args, **kwargs):
+        self.names.add(node.id.text)
+        self.visit_children(node)
+
+
+class OwnershipChecker:
+    """
+    Find the `:` operations of a program that can prepend to their list without copying it,
+    see `Ownership`. A local variable owns its list if every value assigned to it is a new
+    list, and its list is never stored elsewhere. A backward liveness analysis over the
+    statements of a function then finds whether the variable is used after the `:`.
+
+    >>> ownership = OwnershipChecker().check(tree)
+    >>> print(ownership.report())
+    """
+
+    def __init__(self) -> None:
+        self.ownership = Ownership(False)
+        self.functions: Set[str] = set()
+        # The functions that always return a list that nothing else refers to
+        self.fresh_functions: Set[str] = set()
+        # The locals of the current function that own their list
+        self.owned: Set[str] = set()
+        # The decision per `:` operation of the current function, which is overwritten until
+        # the liveness of the loops around it has converged
+        self.decisions: Dict[int, Tuple[Op2Node, Optional[str]]] = {}
+
+    def check(self, tree: SPLNode) -> Ownership:
+        self.ownership = Ownership(FieldWriteVisitor().find(tree))
+        fun_decls = [node for node in tree.body if isinstance(node, FunDeclNode)]
+        self.functions = {fun_decl.id.text for fun_decl in fun_decls}
+        # Recursive calls are assumed to return new lists, until a return shows otherwise
+        returned = {
+            fun_decl.id.text: ReturnVisitor().collect(fun_decl)
+            for fun_decl in fun_decls
+        }
+        self.fresh_functions = set(self.functions)
+        while True:
+            fresh_functions = {
+                name
+                for name in self.fresh_functions
+                if all(self.fresh(exp) for exp in returned[name])
+            }
+            if fresh_functions == self.fresh_functions:
+                break
+            self.fresh_functions = fresh_functions
+        for fun_decl in fun_decls:
+            self.check_function(fun_decl)
+        return self.ownership
+
+    def reads(self, node: Optional[Node | Token], allowed: bool = False) -> ReadVisitor:
+        return ReadVisitor(self.functions, self.ownership.writes).collect(node, allowed)
+
+    def fresh(self, node: Node | Token) -> bool:
+        """Whether `node` always evaluates to a list that nothing else refers to."""
+        if isinstance(node, VariableNode) and node.field and node.field.fields:
+            # `.tl` creates a new (length, next*) pair, but shares the elements
+            last = node.field.fields[-1]
+            return (
+                not self.ownership.writes
+                and isinstance(last, Token)
+                and last.type == Type.TL
+            )
+        # `:` returns the list it prepended to, which is new if it was copied
+        while is_colon(node):
+            if is_id(node.right):
+                return True
+            node = node.right
+        return isinstance(node, (ListNode, StringLiteralNode, ListAbbrNode)) or (
+            isinstance(node, FunCallNode) and node.func.text in self.fresh_functions
+        )
+
+    def check_function(self, node: FunDeclNode) -> None:
+        arguments = {token.text for token in node.args.items} if node.args else set()
+        body = [var_decl.exp for var_decl in node.var_decl] + node.stmt
+        escapes = set()
+        for part in body:
+            escapes |= self.reads(part).escapes
+        candidates = {
+            var_decl.id.text
+            for var_decl in node.var_decl
+            if self.fresh(var_decl.exp)
+            and (not self.ownership.writes or flat(var_decl.type))
+        }
+        self.owned = (
+            candidates - arguments - escapes - UnownedVisitor(self.fresh).collect(node)
+        )
+
+        self.decisions = {}
+        live = self.block(node.stmt, set(), None)
+        declared = {var_decl.id.text for var_decl in node.var_decl}
+        for var_decl in reversed(node.var_decl):
+            # The variable itself refers to an earlier declaration in its own expression
+            declared.discard(var_decl.id.text)
+            reads = self.evaluate(var_decl.exp, live, declared=declared)
+            live = (live - {var_decl.id.text}) | reads
+        for key, (colon, reason) in self.decisions.items():
+            if reason:
+                self.ownership.eliminated[key] = (colon, reason)
+
+    def evaluate(
+        self,
+        node: Optional[Node | Token],
+        live: Set[str],
+        allowed: bool = False,
+        assigned: Optional[str] = None,
+        declared: Optional[Set[str]] = None,
+    ) -> Set[str]:
+        """Decide for the `:` operations in `node` whether they copy their list, given the
+        variables that are `live` after `node` is evaluated, and return the variables read.
+        """
+        visitor = self.reads(node, allowed)
+        for colon in visitor.colons:
+            # The generator only copies lists if one of the sides is a variable
+            if not (is_id(colon.left) or is_id(colon.right)):
+                continue
+            reason = None
+            if self.fresh(colon.right):
+                reason = "temporary"
+            elif (
+                is_id(colon.right)
+                and colon.right.text in self.owned
+                and (declared is None or colon.right.text in declared)
+                and visitor.reads[colon.right.text] == 1
+                and (colon.right.text not in live or colon.right.text == assigned)
+            ):
+                reason = "dead"
+            self.decisions[id(colon)] = (colon, reason)
+        return set(visitor.reads)
+
+    def block(
+        self,
+        stmts: List[StmtNode],
+        live: Set[str],
+        loop: Optional[Tuple[Set[str], Set[str]]],
+    ) -> Set[str]:
+        """The variables that are live before `stmts`, given those that are live after.
+        `loop` holds the variables that are live after, and at the start of, the innermost
+        loop, for `break` and `continue`."""
+        for stmt in reversed(stmts):
+            live = self.statement(stmt, live, loop)
+        return live
+
+    def statement(
+        self,
+        node: Node | Token,
+        live: Set[str],
+        loop: Optional[Tuple[Set[str], Set[str]]],
+    ) -> Set[str]:
+        match node:
+            case StmtNode():
+                return self.statement(node.stmt, live, loop)
+
+            case StmtAssNode() if node.id.field and node.id.field.fields:
+                reads = self.evaluate(node.exp, live)
+                return live | reads | self.evaluate(node.id, live, allowed=True)
+
+            case StmtAssNode():
+                target = node.id.id.text
+                reads = self.evaluate(node.exp, live, assigned=target)
+                return (live - {target}) | reads
+
+            case ReturnNode():
+                return self.evaluate(node.exp, set(), allowed=True)
+
+            case IfElseNode():
+                branches = self.block(node.body, live, loop) | self.block(
+                    node.else_body or [], live, loop
+                )
+                return branches | self.evaluate(node.cond, branches)
+
+            case WhileNode():
+                start = set()
+                while True:
+                    body = self.block(node.body, start, (live, start))
+                    reads = self.evaluate(node.cond, body | live)
+                    if reads | body | live == start:
+                        return start
+                    start = reads | body | live
+
+            case ForNode():
+                start = set()
+                while True:
+                    body = self.block(node.body, start, (live, start))
+                    if body | live == start:
+                        break
+                    start = body | live
+                return start | self.evaluate(node.loop, start, allowed=True)
+
+            case Token(type=Type.BREAK) if loop:
+                return loop[0]
+
+            case Token(type=Type.CONTINUE) if loop:
+                return loop[1]
+
+            case FunCallNode():
+                return live | self.evaluate(node, live)
+        return live
@@ -0,0 +1,331 @@
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from compiler.generation.inliner import BINARY
+from compiler.generation.instruction import Instruction
+from compiler.generation.line import Line
+
+# The range of integers in SSM, whose arithmetic wraps around
+INT_MIN = -(2**31)
+INT_MAX = 2**31 - 1
+
+# Instructions that push exactly one word, without any other effect
+LOADS = (
+    Instruction.LDC,
+    Instruction.LDL,
+    Instruction.LDS,
+    Instruction.LDR,
+    Instruction.LDLA,
+    Instruction.LDSA,
+)
+# Instructions that replace the value on top of the stack, without any other effect
+UNARY = (
+    Instruction.LDA,
+    Instruction.LDAA,
+    Instruction.LDH,
+    Instruction.NEG,
+    Instruction.NOT,
+)
+# Instructions after which the next line is only reached by jumping to its label
+UNCONDITIONAL = (Instruction.BRA, Instruction.RET, Instruction.HALT)
+NEGATED_COMPARISON = {
+    Instruction.EQ: Instruction.NE,
+    Instruction.NE: Instruction.EQ,
+    Instruction.LT: Instruction.GE,
+    Instruction.GE: Instruction.LT,
+    Instruction.GT: Instruction.LE,
+    Instruction.LE: Instruction.GT,
+}
+
+
+@dataclass
+class Rule:
+    """
+    A rewrite of a window of `size` consecutive lines. `replace` is given the instructions of
+    the lines, i.e. tuples of an Instruction and its operands, and returns the replacement
+    instructions, or None if the rule does not apply.
+
+    Only the first line of a window may have a label, as lines that can be jumped to cannot be
+    merged with the lines before them, unless the rule handles `labels` itself. In that case
+    `replace` is given the lines rather than their instructions, and returns lines.
+    """
+
+    name: str
+    size: int
+    replace: Callable[[Tuple], Optional[List[Tuple]]]
+    labels: bool = False
+
+
+def constant(instruction: Tuple) -> Optional[int]:
+    if (
+        len(instruction) == 2
+        and instruction[0] == Instruction.LDC
+        and isinstance(instruction[1], int)
+    ):
+        return instruction[1]
+    return None
+
+
+def double_negation(first: Tuple, second: Tuple) -> Optional[List[Tuple]]:
+    # -(-x) == x and ~(~x) == x
+    if first == second and first in ((Instruction.NEG,), (Instruction.NOT,)):
+        return []
+    return None
+
+
+def identity(first: Tuple, second: Tuple) -> Optional[List[Tuple]]:
+    # x + 0 == x - 0 == x | 0 == x ^ 0 == x and x * 1 == x / 1 == x
+    match constant(first), second:
+        case 0, (Instruction.ADD | Instruction.SUB | Instruction.OR | Instruction.XOR,):
+            return []
+        case 1, (Instruction.MUL | Instruction.DIV,):
+            return []
+    return None
+
+
+def negated_constant(first: Tuple, second: Tuple) -> Optional[List[Tuple]]:
+    value = constant(first)
+    if value is not None and second == (Instruction.NEG,) and value != INT_MIN:
+        return [(Instruction.LDC, -value)]
+    return None
+
+
+def constant_arithmetic(first: Tuple, second: Tuple, third: Tuple):
+    left = constant(first)
+    right = constant(second)
+    if left is None or right is None:
+        return None
+    match third:
+        case (Instruction.ADD,):
+            value = left + right
+        case (Instruction.SUB,):
+            value = left - right
+        case (Instruction.MUL,):
+            value = left * right
+        case _:
+            return None
+    # Leave overflowing arithmetic to the machine
+    if INT_MIN <= value <= INT_MAX:
+        return [(Instruction.LDC, value)]
+    return None
+
+
+def increment(first: Tuple, second: Tuple) -> Optional[List[Tuple]]:
+    # x + k and x - k, as LDAA adds its operand to the value on top of the stack
+    match constant(first), second:
+        case int() as value, (Instruction.ADD,):
+            return [(Instruction.LDAA, value)]
+        case int() as value, (Instruction.SUB,) if value != INT_MIN:
+            return [(Instruction.LDAA, -value)]
+    return None
+
+
+def merge_increments(first: Tuple, second: Tuple) -> Optional[List[Tuple]]:
+    if first[0] == second[0] == Instruction.LDAA:
+        value = first[1] + second[1]
+        if INT_MIN <= value <= INT_MAX:
+            return [(Instruction.LDAA, value)] if value else []
+    return None
+
+
+def swap_and_pop(first: Tuple, second: Tuple) -> Optional[List[Tuple]]:
+    # Removing the second value from the top is the same as storing the top value over it
+    if first == (Instruction.SWP,) and second == (Instruction.AJS, -1):
+        return [(Instruction.STS, -1)]
+    return None
+
+
+def adjustment(offset: int) -> List[Tuple]:
+    return [(Instruction.AJS, offset)] if offset else []
+
+
+def empty_adjustment(instruction: Tuple) -> Optional[List[Tuple]]:
+    if instruction == (Instruction.AJS, 0):
+        return []
+    return None
+
+
+def adjust_stack(first: Tuple, second: Tuple) -> Optional[List[Tuple]]:
+    if first[0] == second[0] == Instruction.AJS:
+        return adjustment(first[1] + second[1])
+    return None
+
+
+def unused_load(first: Tuple, second: Tuple) -> Optional[List[Tuple]]:
+    # A value that is pushed and then immediately popped
+    if first[0] in LOADS and second[0] == Instruction.AJS and second[1] < 0:
+        return adjustment(second[1] + 1)
+    return None
+
+
+def register_round_trip(first: Tuple, second: Tuple) -> Optional[List[Tuple]]:
+    # Storing a register in itself, except for the program counter
+    if (
+        first[0] == Instruction.LDR
+        and first[1] != "PC"
+        and second == (Instruction.STR, first[1])
+    ):
+        return []
+    return None
+
+
+def negated_comparison(first: Tuple, second: Tuple) -> Optional[List[Tuple]]:
+    # Comparisons result in -1 or 0, so their complement is the opposite comparison. Other
+    # Bool values are not known to be -1 or 0, e.g. `bool` returns an Int unchanged
+    if (
+        second == (Instruction.NOT,)
+        and len(first) == 1
+        and first[0] in NEGATED_COMPARISON
+    ):
+        return [(NEGATED_COMPARISON[first[0]],)]
+    return None
+
+
+def copied_operand(first: Tuple, *rest: Tuple) -> Optional[List[Tuple]]:
+    # Replacing a copy of the top value, and storing the result over the original, e.g. in
+    # inlined routines with one argument
+    *operations, last = rest
+    if (
+        first == (Instruction.LDS, 0)
+        and last == (Instruction.STS, -1)
+        and all(operation[0] in UNARY for operation in operations)
+    ):
+        return operations
+    return None
+
+
+def copied_operands(
+    first: Tuple, second: Tuple, third: Tuple, fourth: Tuple, fifth: Tuple
+) -> Optional[List[Tuple]]:
+    # Combining copies of the two top values, and storing the result over the originals, e.g.
+    # in inlined routines with two arguments
+    if (
+        first == second == (Instruction.LDS, -1)
+        and len(third) == 1
+        and third[0] in BINARY
+        and fourth == (Instruction.STS, -2)
+        and fifth == (Instruction.AJS, -1)
+    ):
+        return [third]
+    return None
+
+
+def branch_to_next(first: Line, second: Line) -> Optional[List[Line]]:
+    if second.label and first.instruction == (Instruction.BRA, second.label):
+        return [Line(label=first.label), second] if first.label else [second]
+    return None
+
+
+def unreachable(first: Line, second: Line) -> Optional[List[Line]]:
+    # Lines without a label after an unconditional jump can never be executed
+    if first.instruction and first.instruction[0] in UNCONDITIONAL and not second.label:
+        return [first]
+    return None
+
+
+PEEPHOLE_RULES = (
+    Rule("double negation", 2, double_negation),
+    Rule("identity", 2, identity),
+    Rule("negated constant", 2, negated_constant),
+    Rule("constant arithmetic", 3, constant_arithmetic),
+    Rule("increment", 2, increment),
+    Rule("increment", 2, merge_increments),
+    Rule("swap and pop", 2, swap_and_pop),
+    Rule("adjust stack", 2, adjust_stack),
+    Rule("adjust stack", 1, empty_adjustment),
+    Rule("unused load", 2, unused_load),
+    Rule("register round trip", 2, register_round_trip),
+    Rule("negated comparison", 2, negated_comparison),
+    Rule("copied operand", 3, copied_operand),
+    Rule("copied operand", 4, copied_operand),
+    Rule("copied operands", 5, copied_operands),
+    Rule("branch to next", 2, branch_to_next, labels=True),
+    Rule("unreachable", 2, unreachable, labels=True),
+)
+
+
+class PeepholeOptimizer:
+    """
+    Rewrite generated lines with a table of rules that each replace a small window of lines
+    by fewer instructions. The number of instructions removed by each rule is kept in `removed`.
+
+    >>> optimizer = PeepholeOptimizer()
+    >>> lines = optimizer.optimize(GeneratorYielder(program).visit(tree))
+    >>> print(optimizer.report())
+    """
+
+    def __init__(self, rules: Iterable[Rule] = PEEPHOLE_RULES) -> None:
+        self.rules = list(rules)
+        self.removed = Counter()
+
+    def optimize(self, lines: Iterable[Line]) -> List[Line]:
+        """Apply the rules to `lines` until none apply anymore.
+
+        Every line is added to the output, after which the rules are applied to the windows at
+        the end of the output, such that a replacement can enable rules on the lines before it.
+
+        Args:
+            lines (Iterable[Line]): The lines to optimize, e.g. from `GeneratorYielder.visit`.
+
+        Returns:
+            List[Line]: The optimized lines. The given lines are not modified.
+        """
+        output = []
+        for line in lines:
+            output.append(line)
+            while self.rewrite(output):
+                pass
+        return output
+
+    def rewrite(self, output: List[Line]) -> bool:
+        """Apply the first rule that applies to a window at the end of `output`, if any."""
+        for rule in self.rules:
+            if len(output) < rule.size:
+                continue
+            window = output[-rule.size :]
+            if rule.labels:
+                replacement = rule.replace(*window)
+            elif all(line.instruction for line in window) and not any(
+                line.label for line in window[1:]
+            ):
+                instructions = rule.replace(*(line.instruction for line in window))
+                replacement = None
+                if instructions is not None:
+                    replacement = self.lines(window, instructions)
+            else:
+                continue
+
+            if replacement is not None:
+                self.removed[rule.name] += count(window) - count(replacement)
+                output[-rule.size :] = replacement
+                return True
+        return False
+
+    @staticmethod
+    def lines(window: List[Line], instructions: List[Tuple]) -> List[Line]:
+        # The label of the window is kept on the first line of the replacement, and the
+        # comment of the window on the last line
+        lines = [Line(*instruction) for instruction in instructions]
+        label = window[0].label
+        comment = next((line.comment for line in window[::-1] if line.comment), "")
+        if not lines:
+            return [Line(label=label)] if label else []
+        lines[0].label = label
+        lines[-1].comment = comment
+        return lines
+
+    def report(self) -> str:
+        """Format the number of instructions removed per rule."""
+        width = max((len(rule.name) for rule in self.rules), default=0)
+        lines = [
+            f"{name:<{width}}  {removed:6d}"
+            for name, removed in self.removed.most_common()
+        ]
+        lines.append(f"{'Total':<{width}}  {sum(self.removed.values()):6d}")
+        return "\n".join(lines)
+
+
+def count(lines: List[Line]) -> int:
+    """The number of instructions in `lines`, i.e. excluding lines with only a label."""
+    return sum(1 for line in lines if line.instruction)
@@ -1,6 +1,24 @@
+from enum import Enum
+
 from compiler.generation.instruction import Instruction
 from compiler.generation.line import Line
 
+
+class ListLayout(str, Enum):
+    """The representation of lists at runtime.
+
+    Both layouts refer to a list with a (length, pointer) pair on the heap, where the pointer
+    is 0xBABE for a list that has never held any elements. With the LINKED layout, the pointer
+    refers to the first of a chain of (value, next*) pairs. With the ARRAY layout, it refers to
+    a contiguous block of (capacity, used, values...), with the values stored from the last
+    element upwards, such that the head of a list of length n is at pointer + n + 1 and
+    prepending to the list writes the next free word of the block.
+    """
+
+    LINKED = "linked"
+    ARRAY = "array"
+
+
 STD_LIB_LIST = {
     # # # # # # # # # # # # # #
     # Checks if list is empty
@@ -249,33 +267,14 @@ STD_LIB_LIST = {
         Line(Instruction.UNLINK),
         Line(Instruction.RET),
     ],
+    # Returns the address of the first value, which does not exist for empty lists
     "_head": [
         Line(label="_head"),
         # Create space to perform computations
         Line(Instruction.LINK, 0),
-        # Get reference
-        Line(Instruction.LDL, -2),
-        # Get length
-        Line(Instruction.LDA, -1),
-        # Check if length == 0
-        Line(Instruction.LDC, 0),
-        Line(Instruction.EQ),
-        Line(Instruction.BRF, "_head_first"),
-        # If length == 0 -> return -1
-        Line(Instruction.LDC, -1),
-        # Store in RR
-        Line(Instruction.STR, "RR"),
-        # Clean-up
-        Line(Instruction.UNLINK),
-        # Yield empty list
-        Line(Instruction.LDC, 0),  # Length
-        Line(Instruction.LDC, 47806),  # Pointer
-        Line(Instruction.STMH, 2),  # Put on stack
-        # Return the first element
-        Line(label="_head_first"),
         # Get reference to (length, first*)
         Line(Instruction.LDL, -2),
-        # Get next*
+        # Get first*
         Line(Instruction.LDA, 0),
         # Yield address that stores value
         Line(Instruction.LDC, -1),
@@ -461,3 +460,308 @@ STD_LIB_LIST = {
         Line(Instruction.RET),
     ],
 }
+
+# The routines of STD_LIB_LIST that call other routines, which must be included with them
+STD_LIB_LIST_CALLS = {
+    "_reverse_List_Char": {"_length", "_index"},
+}
+
+# Replacements of routines of STD_LIB_LIST for the ARRAY layout of lists
+STD_LIB_ARRAY = {
+    # # # # # # # # # # # # # #
+    # Copies `count` words starting from address `source` to the top of the heap.
+    # Assumes stack layout:
+    # 	source
+    # 	count
+    "_array_copy": [
+        Line(label="_array_copy"),
+        Line(Instruction.LINK, 0),
+        # Stop if there is nothing left to copy
+        Line(Instruction.LDL, -2, label="_array_copy_loop"),
+        Line(Instruction.BRF, "_array_copy_end"),
+        # Copy the word to the heap
+        Line(Instruction.LDL, -3),
+        Line(Instruction.LDA, 0),
+        Line(Instruction.STH),
+        Line(Instruction.AJS, -1),
+        # Move to the next word
+        Line(Instruction.LDL, -3),
+        Line(Instruction.LDC, 1),
+        Line(Instruction.ADD),
+        Line(Instruction.STL, -3),
+        Line(Instruction.LDL, -2),
+        Line(Instruction.LDC, 1),
+        Line(Instruction.SUB),
+        Line(Instruction.STL, -2),
+        Line(Instruction.BRA, "_array_copy_loop"),
+        Line(Instruction.UNLINK, label="_array_copy_end"),
+        Line(Instruction.RET),
+    ],
+    # # # # # # # # # # # # # #
+    # Prepends element x to a list, in place.
+    # Assumes stack layout:
+    # 	x
+    # 	reference to list
+    # The element is written to the next free word of the block if the block is not full, and
+    # if no other list uses that word, i.e. if this list ends at the last used word of the
+    # block. Otherwise the elements are moved to a new block of twice the size.
+    "_prepend_element": [
+        Line(label="_prepend_element"),
+        # Locals: length, block, new block
+        Line(Instruction.LINK, 3),
+        Line(Instruction.LDL, -2),
+        Line(Instruction.LDMH, 0, 2),
+        Line(Instruction.STL, 2),
+        Line(Instruction.STL, 1),
+        # Grow if the list has no block yet
+        Line(Instruction.LDL, 2),
+        Line(Instruction.LDC, 0xBABE),
+        Line(Instruction.EQ),
+        Line(Instruction.BRT, "_prepend_grow"),
+        # Grow if the next word is used by another list
+        Line(Instruction.LDL, 2),
+        Line(Instruction.LDA, 1),
+        Line(Instruction.LDL, 1),
+        Line(Instruction.NE),
+        Line(Instruction.BRT, "_prepend_grow"),
+        # Grow if the block is full
+        Line(Instruction.LDL, 2),
+        Line(Instruction.LDA, 0),
+        Line(Instruction.LDL, 1),
+        Line(Instruction.LE),
+        Line(Instruction.BRT, "_prepend_grow"),
+        # Store x in the next free word, after the `length` values
+        Line(Instruction.LDL, -3),
+        Line(Instruction.LDL, 2),
+        Line(Instruction.LDL, 1),
+        Line(Instruction.ADD),
+        Line(Instruction.STA, 2),
+        Line(Instruction.BRA, "_prepend_end"),
+        # Create a new block with a capacity of 2 * length + 4
+        Line(label="_prepend_grow"),
+        Line(Instruction.LDL, 1),
+        Line(Instruction.LDC, 2),
+        Line(Instruction.MUL),
+        Line(Instruction.LDC, 4),
+        Line(Instruction.ADD),
+        Line(Instruction.LDL, 1),
+        Line(Instruction.STMH, 2),
+        Line(Instruction.LDC, 1),
+        Line(Instruction.SUB),
+        Line(Instruction.STL, 3),
+        # Copy the values, followed by x and the free space
+        Line(Instruction.LDL, 2),
+        Line(Instruction.LDC, 2),
+        Line(Instruction.ADD),
+        Line(Instruction.LDL, 1),
+        Line(Instruction.BSR, "_array_copy"),
+        Line(Instruction.AJS, -2),
+        Line(Instruction.LDL, -3),
+        Line(Instruction.STH),
+        Line(Instruction.AJS, -1),
+        # Skip the free space, which is never read before it is written
+        Line(Instruction.LDR, "HP"),
+        Line(Instruction.LDL, 1),
+        Line(Instruction.ADD),
+        Line(Instruction.LDC, 3),
+        Line(Instruction.ADD),
+        Line(Instruction.STR, "HP"),
+        # Point the list to the new block
+        Line(Instruction.LDL, 3),
+        Line(Instruction.STL, 2),
+        Line(Instruction.LDL, 3),
+        Line(Instruction.LDL, -2),
+        Line(Instruction.STA, 0),
+        # Increment the number of used words and the length by 1
+        Line(label="_prepend_end"),
+        Line(Instruction.LDL, 1),
+        Line(Instruction.LDC, 1),
+        Line(Instruction.ADD),
+        Line(Instruction.LDL, 2),
+        Line(Instruction.STA, 1),
+        Line(Instruction.LDL, 1),
+        Line(Instruction.LDC, 1),
+        Line(Instruction.ADD),
+        Line(Instruction.LDL, -2),
+        Line(Instruction.STA, -1),
+        Line(Instruction.UNLINK),
+        Line(Instruction.RET),
+    ],
+    # # # # # # # # # # # # # #
+    # Returns a new reference to the same block, with a length of 1 less, or the empty list
+    "_tail": [
+        Line(label="_tail"),
+        Line(Instruction.LINK, 0),
+        # Check if length <= 1, if so we return the empty list
+        Line(Instruction.LDL, -2),
+        Line(Instruction.LDA, -1),
+        Line(Instruction.LDC, 1),
+        Line(Instruction.LE),
+        Line(Instruction.BRF, "_tail_rest_of_list"),
+        Line(Instruction.LDC, 0),  # Length
+        Line(Instruction.LDC, 0xBABE),  # Pointer
+        Line(Instruction.STMH, 2),
+        Line(Instruction.STR, "RR"),
+        Line(Instruction.UNLINK),
+        Line(Instruction.RET),
+        # Else yield (length - 1, block), which excludes the head at the end of the values
+        Line(label="_tail_rest_of_list"),
+        Line(Instruction.LDL, -2),
+        Line(Instruction.LDMH, 0, 2),
+        Line(Instruction.SWP),
+        Line(Instruction.LDC, 1),
+        Line(Instruction.SUB),
+        Line(Instruction.SWP),
+        Line(Instruction.STMH, 2),
+        Line(Instruction.STR, "RR"),
+        Line(Instruction.UNLINK),
+        Line(Instruction.RET),
+    ],
+    # # # # # # # # # # # # # #
+    # xs.tl.tl = ys;
+    # Replaces everything after the first `count` elements of a list by a copy of a new tail.
+    # Assumes stack layout:
+    # 	reference to new tail
+    # 	reference to list
+    # 	count
+    "_set_tail": [
+        Line(label="_set_tail"),
+        # Locals: new length, new block
+        Line(Instruction.LINK, 2),
+        Line(Instruction.LDL, -4),
+        Line(Instruction.LDA, -1),
+        Line(Instruction.LDL, -2),
+        Line(Instruction.ADD),
+        Line(Instruction.STL, 1),
+        # Create a new block with a capacity of 2 * length + 4
+        Line(Instruction.LDL, 1),
+        Line(Instruction.LDC, 2),
+        Line(Instruction.MUL),
+        Line(Instruction.LDC, 4),
+        Line(Instruction.ADD),
+        Line(Instruction.LDL, 1),
+        Line(Instruction.STMH, 2),
+        Line(Instruction.LDC, 1),
+        Line(Instruction.SUB),
+        Line(Instruction.STL, 2),
+        # Copy the values of the new tail, which come last
+        Line(Instruction.LDL, -4),
+        Line(Instruction.LDA, 0),
+        Line(Instruction.LDC, 2),
+        Line(Instruction.ADD),
+        Line(Instruction.LDL, -4),
+        Line(Instruction.LDA, -1),
+        Line(Instruction.BSR, "_array_copy"),
+        Line(Instruction.AJS, -2),
+        # Followed by the first `count` values of the list, i.e. its last `count` words
+        Line(Instruction.LDL, -3),
+        Line(Instruction.LDMH, 0, 2),
+        Line(Instruction.ADD),
+        Line(Instruction.LDC, 2),
+        Line(Instruction.ADD),
+        Line(Instruction.LDL, -2),
+        Line(Instruction.SUB),
+        Line(Instruction.LDL, -2),
+        Line(Instruction.BSR, "_array_copy"),
+        Line(Instruction.AJS, -2),
+        # Skip the free space
+        Line(Instruction.LDR, "HP"),
+        Line(Instruction.LDL, 1),
+        Line(Instruction.ADD),
+        Line(Instruction.LDC, 4),
+        Line(Instruction.ADD),
+        Line(Instruction.STR, "HP"),
+        # Point the list to the new block
+        Line(Instruction.LDL, 1),
+        Line(Instruction.LDL, 2),
+        Line(Instruction.LDL, -3),
+        Line(Instruction.STMA, -1, 2),
+        Line(Instruction.UNLINK),
+        Line(Instruction.RET),
+    ],
+    # # # # # # # # # # # # # #
+    # Copies a list of values that are not lists, into a new block.
+    "_array_duplicate": [
+        Line(label="_array_duplicate"),
+        # Locals: length
+        Line(Instruction.LINK, 1),
+        Line(Instruction.LDL, -2),
+        Line(Instruction.LDA, -1),
+        Line(Instruction.STL, 1),
+        # Create a new block with a capacity of 2 * length + 4
+        Line(Instruction.LDL, 1),
+        Line(Instruction.LDC, 2),
+        Line(Instruction.MUL),
+        Line(Instruction.LDC, 4),
+        Line(Instruction.ADD),
+        Line(Instruction.LDL, 1),
+        Line(Instruction.STMH, 2),
+        # Copy the values, followed by the free space
+        Line(Instruction.LDL, -2),
+        Line(Instruction.LDA, 0),
+        Line(Instruction.LDC, 2),
+        Line(Instruction.ADD),
+        Line(Instruction.LDL, 1),
+        Line(Instruction.BSR, "_array_copy"),
+        Line(Instruction.AJS, -2),
+        Line(Instruction.LDR, "HP"),
+        Line(Instruction.LDL, 1),
+        Line(Instruction.ADD),
+        Line(Instruction.LDC, 4),
+        Line(Instruction.ADD),
+        Line(Instruction.STR, "HP"),
+        # Create the (length, block) pair that refers to the copy
+        Line(Instruction.LDC, 1),
+        Line(Instruction.SUB),
+        Line(Instruction.LDL, 1),
+        Line(Instruction.SWP),
+        Line(Instruction.STMH, 2),
+        Line(Instruction.STR, "RR"),
+        Line(Instruction.UNLINK),
+        Line(Instruction.RET),
+    ],
+    # # # # # # # # # # # # # #
+    # Reads a string, whose characters are pushed on the stack with the first character on
+    # top, which is the order of the values in a block
+    "_get_Str": [
+        Line(label="_get_Str"),
+        Line(Instruction.LINK, 0),
+        # Ask for input
+        Line(Instruction.TRAP, 12),
+        # Compute the length of the list, excluding the terminating 0 at MP + 1
+        Line(Instruction.LDR, "SP"),
+        Line(Instruction.LDR, "MP"),
+        Line(Instruction.LDC, 1),
+        Line(Instruction.ADD),
+        Line(Instruction.SUB),
+        Line(Instruction.STR, 7),
+        # Create a full block, and copy the characters from the stack
+        Line(Instruction.LDR, 7),
+        Line(Instruction.LDR, 7),
+        Line(Instruction.STMH, 2),
+        Line(Instruction.LDC, 1),
+        Line(Instruction.SUB),
+        Line(Instruction.STR, 6),
+        Line(Instruction.LDR, "MP"),
+        Line(Instruction.LDC, 2),
+        Line(Instruction.ADD),
+        Line(Instruction.LDR, 7),
+        Line(Instruction.BSR, "_array_copy"),
+        Line(Instruction.AJS, -2),
+        # Create the (length, block) pair that refers to the list
+        Line(Instruction.LDR, 7),
+        Line(Instruction.LDR, 6),
+        Line(Instruction.STMH, 2),
+        Line(Instruction.STR, "RR"),
+        Line(Instruction.UNLINK),
+        Line(Instruction.RET),
+    ],
+}
+
+# The routines of STD_LIB_ARRAY that call other routines, which must be included with them
+STD_LIB_ARRAY_CALLS = {
+    "_prepend_element": {"_array_copy"},
+    "_set_tail": {"_array_copy"},
+    "_get_Str": {"_array_copy"},
+    "_array_duplicate": {"_array_copy"},
+}
@@ -1,3 +1,5 @@
+from typing import Dict, Tuple
+
 from compiler.tree.tree import ForNode, Node
 from compiler.tree.visitor import NodeVisitor
 
@@ -28,3 +30,21 @@ class ForCounterVisitor(NodeVisitor):
         self.current_count += 1
         self.visit_children(node)
         self.current_count -= 1
+
+
+class ForDepthVisitor(NodeVisitor):
+    def __init__(self) -> None:
+        super().__init__()
+        self.depth = 0
+        self.loops: Dict[int, Tuple[ForNode, int]] = {}
+
+    def assign(self, node: Node) -> Dict[int, Tuple[ForNode, int]]:
+        """Find the nesting depth, starting from 1, of every ForNode, by node id."""
+        self.visit(node)
+        return self.loops
+
+    def visit_ForNode(self, node: ForNode, *args, **kwargs):
+        self.depth += 1
+        self.loops[id(node)] = (node, self.depth)
+        self.visit_children(node)
+        self.depth -= 1
@@ -4,7 +4,7 @@ from typing import List
 from compiler.token import Token
 from compiler.tree.visitor import Boolean, NodeTransformer
 from compiler.type import Type
-from compiler.util import Span
+from compiler.util import SourceFile, Span
 
 from compiler.error.typer_error import (  # isort:skip
     IllegalContinueBreakError,
@@ -21,9 +21,9 @@ from compiler.tree.tree import (  # isort:skip
     FunDeclNode,
     IfElseNode,
     ListNode,
-    Op2Node,
     ReturnNode,
     StmtNode,
+    StringLiteralNode,
     WhileNode,
 )
 
@@ -37,12 +37,12 @@ class AnalyzeTransformer(NodeTransformer):
         2. Insert an ReturnNode after every function that does not end every branch with a return.
         3. Give a warning if the main function is called.
     - Verify that all uses of `continue` and `break` occur inside of a for or while loop.
-    - Expand Strings into Op2Nodes of characters being appended together.
-        - i.e. "abc" -> 'a' : 'b' : 'c' : []
+    - Convert Strings into StringLiteralNodes holding the unescaped characters.
+        - i.e. "abc" -> StringLiteralNode("abc"), and "" -> []
     - Give a warning if `main` is called throughout the program.
     """
 
-    program: str
+    program: SourceFile
 
     def traverse_statements(
         self, stmts: List[StmtNode], reachable: Boolean, **kwargs
@@ -174,11 +174,7 @@ class AnalyzeTransformer(NodeTransformer):
             string = node.text[1:-1]
             # Remove duplicate escaping, i.e. '\\n' -> '\n'
             string = string.encode().decode("unicode_escape")
-            right = ListNode(None, span=node.span)
-            for char in string[::-1]:
-                left = Token(f"'{char}'", Type.CHARACTER, span=node.span)
-                right = Op2Node(
-                    left, Token(":", Type.COLON, span=node.span), right, span=node.span
-                )
-            return right
+            if not string:
+                return ListNode(None, span=node.span)
+            return StringLiteralNode(string, span=node.span)
         return node
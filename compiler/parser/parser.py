@@ -6,7 +6,7 @@ from compiler.parser.analyze import AnalyzeTransformer
 from compiler.parser.factory import DefaultFactory
 from compiler.token import Token
 from compiler.type import Type
-from compiler.util import Span
+from compiler.util import SourceFile, Span
 from parser_generator.grammar import Grammar
 
 from compiler.error.warning import (  # isort:skip
@@ -79,8 +79,8 @@ ALLOW_ERROR_EMPTY = (
 
 
 class Parser:
-    def __init__(self, program: str) -> None:
-        self.og_program = program
+    def __init__(self, program: str | SourceFile) -> None:
+        self.og_program = SourceFile.of(program)
 
         # Reset the Polymorphic IDs as we are now dealing with a new parser
         PolymorphicTypeNode.reset()
@@ -0,0 +1,169 @@
+from time import perf_counter
+from typing import Dict, Iterable, List, Optional, Tuple, Type
+
+from compiler.analysis import (
+    Analysis,
+    AnalysisManager,
+    CallGraphAnalysis,
+    ForNestingAnalysis,
+    FrameLayoutAnalysis,
+    FrameSizeAnalysis,
+    OwnershipAnalysis,
+)
+from compiler.generation.folding import ConstantFolder
+from compiler.generation.generator import Generator
+from compiler.parser.analyze import AnalyzeTransformer
+from compiler.tree.tree import Node, SPLNode
+from compiler.typer.cache import TypeCache
+from compiler.typer.typer import Typer
+from compiler.util import SourceFile
+
+# Used as `Pass.preserves` by passes that do not modify the tree
+ALL = None
+
+
+class Pass:
+    """
+    A step of the compilation that operates on the complete tree, run by a PassManager.
+
+    `requires` are the analyses that are computed before the pass is run, which the pass can
+    then get cheaply using `analyses.get`. `preserves` are the analyses that remain valid if
+    the pass changes the tree, or ALL if the pass never changes the tree.
+    """
+
+    requires: Tuple[Type[Analysis], ...] = ()
+    preserves: Optional[Tuple[Type[Analysis], ...]] = ()
+
+    @property
+    def name(self) -> str:
+        return self.__class__.__name__
+
+    def run(self, tree: SPLNode, analyses: AnalysisManager) -> bool | List[Node]:
+        """Run the pass on `tree`.
+
+        Returns:
+            bool | List[Node]: Whether the tree changed, or the nodes that changed, e.g.
+                the function declarations that were modified.
+        """
+        raise NotImplementedError()
+
+
+class AnalyzePass(Pass):
+    """Remove dead code, insert missing returns and convert strings, as done by the Parser."""
+
+    def __init__(self, program: str | SourceFile) -> None:
+        self.program = SourceFile.of(program)
+
+    def run(self, tree: SPLNode, analyses: AnalysisManager) -> bool:
+        AnalyzeTransformer(self.program).visit(tree)
+        return True
+
+
+class TypePass(Pass):
+    """Add type information to the tree, see `Typer`."""
+
+    # Typing does not change the structure of the tree
+    preserves = (
+        CallGraphAnalysis,
+        ForNestingAnalysis,
+        FrameLayoutAnalysis,
+        FrameSizeAnalysis,
+    )
+
+    def __init__(
+        self,
+        program: str | SourceFile,
+        cache: Optional[TypeCache] = None,
+        workers: int = 1,
+    ) -> None:
+        self.typer = Typer(program, cache, workers)
+        if workers > 1:
+            self.requires = (CallGraphAnalysis,)
+
+    def run(self, tree: SPLNode, analyses: AnalysisManager) -> bool:
+        call_graph = analyses.get(CallGraphAnalysis, tree) if self.requires else None
+        self.typer.type(tree, call_graph)
+        return True
+
+
+class FoldPass(Pass):
+    """Replace constant expressions in the typed tree by their value, see `ConstantFolder`.
+    The number of folded expressions is stored in `folded`."""
+
+    def __init__(self) -> None:
+        self.folded = 0
+
+    def run(self, tree: SPLNode, analyses: AnalysisManager) -> bool | List[Node]:
+        folder = ConstantFolder()
+        folder.fold(tree)
+        self.folded = folder.folded
+        # Folds outside of functions, i.e. in global variables, change the tree as a whole
+        return folder.changed or folder.folded > 0
+
+
+class GeneratePass(Pass):
+    """Generate SSM code for the typed tree, which is stored in `ssm_code`."""
+
+    requires = (FrameLayoutAnalysis, FrameSizeAnalysis, OwnershipAnalysis)
+    preserves = ALL
+
+    def __init__(self, program: str | SourceFile) -> None:
+        self.program = SourceFile.of(program)
+        self.ssm_code = None
+
+    def run(self, tree: SPLNode, analyses: AnalysisManager) -> bool:
+        self.ssm_code = Generator(self.program, analyses).generate(tree)
+        return False
+
+
+class PassManager:
+    """
+    Run passes over a tree in order, and keep the results of analyses cached between passes
+    until a pass changes the tree. The time spent in every pass, and in the analyses it
+    requires, is recorded in `timings`.
+
+    >>> manager = PassManager([TypePass(program), FoldPass(), GeneratePass(program)])
+    >>> manager.run(tree)
+    >>> print(manager.report())
+    """
+
+    def __init__(
+        self, passes: Iterable[Pass], analyses: Optional[AnalysisManager] = None
+    ) -> None:
+        self.passes = list(passes)
+        self.analyses = analyses or AnalysisManager()
+        self.timings: Dict[str, float] = {}
+
+    def run(self, tree: SPLNode) -> SPLNode:
+        for _pass in self.passes:
+            if _pass.requires:
+                start = perf_counter()
+                for analysis in _pass.requires:
+                    self.analyses.compute(analysis, tree)
+                self.time(f"{_pass.name} (analyses)", perf_counter() - start)
+
+            start = perf_counter()
+            changed = _pass.run(tree, self.analyses)
+            self.time(_pass.name, perf_counter() - start)
+
+            if changed and _pass.preserves is not ALL:
+                # Results of the program as a whole also change if any of its parts changed
+                nodes = None if changed is True else [tree, *changed]
+                self.analyses.invalidate(_pass.preserves, nodes)
+        return tree
+
+    def time(self, name: str, duration: float) -> None:
+        self.timings[name] = self.timings.get(name, 0) + duration
+
+    def report(self) -> str:
+        """Format the time spent per pass, and the number of reused analysis results."""
+        width = max((len(name) for name in self.timings), default=0)
+        lines = [
+            f"{name:<{width}}  {duration * 1000:8.2f} ms"
+            for name, duration in self.timings.items()
+        ]
+        lines.append(f"{'Total':<{width}}  {sum(self.timings.values()) * 1000:8.2f} ms")
+        lines.append(
+            f"Analyses: {self.analyses.hits} reused, {self.analyses.misses} computed"
+        )
+        return "\n".join(lines)
@@ -3,7 +3,7 @@ from typing import List
 
 from compiler.error.communicator import Communicator
 from compiler.token import Token
-from compiler.util import Span
+from compiler.util import SourceFile, Span
 
 from compiler.error.scanner_error import (  # isort:skip
     CharacterSlashError,
@@ -18,8 +18,10 @@ from compiler.error.scanner_error import (  # isort:skip
 
 
 class Scanner:
-    def __init__(self, program: str) -> None:
-        self.og_program = program
+    def __init__(self, program: str | SourceFile) -> None:
+        # The program as shared with the errors, and its text to scan
+        self.source = SourceFile.of(program)
+        self.og_program = self.source.text
 
         # Named regex groups
         self.pattern = re.compile(
@@ -76,14 +78,15 @@ class Scanner:
                 (?P<BREAK>)\bbreak\b|
                 (?P<ID>\b[a-zA-Z]\w*)|
                 (?P<DIGIT>\d+\b)|
-                (?P<STRING>)\"(?:[ -~]*?)\"|
+                (?P<STRING>)\"(?:\\[ -~]|[ !#-\[\]-~])*\"|
                 (?P<STRING_LONELY_ERROR>)\"|
                 (?P<CHARACTER_SLASH_ERROR>\'\\\')|
                 (?P<CHARACTER>)\'(?:\\a|\\b|\\n|\\r|\\t|\\\\|[ -~])\'|
                 (?P<QUOTE_EMPTY_ERROR>\'\')|
                 (?P<QUOTE_LONELY_ERROR>\')|
                 (?P<SPACE>[\ \r\t\f\v\n])|
-                (?P<ERROR>.)
+                # A run of characters that cannot start a token, or any other single character
+                (?P<ERROR>[^\w\s(){}\[\];:\-.,+*/^%=<>!&|"']+|.)
             """,
             flags=re.X,
         )
@@ -125,29 +128,45 @@ class Scanner:
         """
 
         tokens = []
+        # The span of consecutive unexpected characters, which are reported as one error
+        unexpected = None
         matches = self.pattern.finditer(line)
         for match in matches:
             if match is None or match.lastgroup is None:
-                UnmatchableTokenError(self.og_program, line_no)
+                UnmatchableTokenError(self.source, line_no)
 
             span = Span(line_no, match.span())
+            if unexpected and (
+                match.lastgroup != "ERROR" or unexpected.end_col != span.start_col
+            ):
+                UnexpectedCharacterError(self.source, unexpected)
+                unexpected = None
+
             match match.lastgroup:
                 case "SPACE":
                     continue
                 case "ERROR":
-                    UnexpectedCharacterError(self.og_program, span)
+                    # Unexpected characters are only reported, and do not become tokens
+                    if unexpected:
+                        unexpected.end_col = span.end_col
+                    else:
+                        unexpected = span
+                    continue
                 case ("COMMENT_OPEN" | "COMMENT_CLOSE"):
-                    DanglingMultiLineCommentError(self.og_program, span)
+                    DanglingMultiLineCommentError(self.source, span)
                 case "QUOTE_LONELY_ERROR":
-                    LonelyQuoteError(self.og_program, span)
+                    LonelyQuoteError(self.source, span)
                 case "QUOTE_EMPTY_ERROR":
-                    EmptyQuoteError(self.og_program, span)
+                    EmptyQuoteError(self.source, span)
                 case "STRING_LONELY_ERROR":
-                    LonelyQuoteError(self.og_program, span)
+                    LonelyQuoteError(self.source, span)
                 case "CHARACTER_SLASH_ERROR":
-                    CharacterSlashError(self.og_program, span)
+                    CharacterSlashError(self.source, span)
 
             tokens.append(Token(match[0], match.lastgroup, span))
+
+        if unexpected:
+            UnexpectedCharacterError(self.source, unexpected)
         return tokens
 
     def remove_comments(self, program: str) -> str:
@@ -194,9 +213,13 @@ class Scanner:
         if start_line >= 0:
             comment_spans.append((start_line, len(program)))
 
-        # Replace spans with spaces
-        for start, end in comment_spans[::-1]:
-            separator = re.sub("[^\r\n]", " ", program[start:end])
-            program = program[:start] + separator + program[end:]
+        # Replace spans with spaces, building the program from its pieces at once
+        pieces = []
+        end = 0
+        for start, next_end in comment_spans:
+            pieces.append(program[end:start])
+            pieces.append(re.sub("[^\r\n]", " ", program[start:next_end]))
+            end = next_end
+        pieces.append(program[end:])
 
-        return program
+        return "".join(pieces)
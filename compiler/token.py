@@ -6,7 +6,7 @@ from compiler.type import Type
 from compiler.util import Span
 
 
-@dataclass
+@dataclass(slots=True)
 class Token:
     text: str
     type: Type = field(repr=False)
@@ -0,0 +1,374 @@
+from __future__ import annotations
+
+from array import array
+from typing import Iterator, List, Tuple
+
+from compiler.token import Token
+from compiler.util import Span
+
+from compiler.tree.tree import (  # isort:skip
+    BoolTypeNode,
+    CharTypeNode,
+    CommaListNode,
+    FieldNode,
+    ForNode,
+    FunCallNode,
+    FunDeclNode,
+    FunTypeNode,
+    IfElseNode,
+    IndexNode,
+    IntTypeNode,
+    ListAbbrNode,
+    ListNode,
+    Node,
+    Op1Node,
+    Op2Node,
+    PolymorphicTypeNode,
+    ReturnNode,
+    SPLNode,
+    StmtAssNode,
+    StmtNode,
+    StringLiteralNode,
+    TupleNode,
+    VarDeclNode,
+    VariableNode,
+    VoidTypeNode,
+    WhileNode,
+    child_field_names,
+)
+
+# The kinds of rows in an arena. Besides the node classes, a row can represent a list of
+# children, a missing (None) child, a Token, or any other value stored as payload.
+LIST = 0
+NONE = 1
+TOKEN = 2
+VALUE = 3
+KINDS = [
+    list,
+    type(None),
+    Token,
+    object,
+    PolymorphicTypeNode,
+    SPLNode,
+    FunDeclNode,
+    VarDeclNode,
+    CommaListNode,
+    FunCallNode,
+    IfElseNode,
+    WhileNode,
+    ForNode,
+    StmtAssNode,
+    FieldNode,
+    IndexNode,
+    FunTypeNode,
+    StmtNode,
+    ReturnNode,
+    TupleNode,
+    VariableNode,
+    ListNode,
+    Op2Node,
+    Op1Node,
+    ListAbbrNode,
+    IntTypeNode,
+    CharTypeNode,
+    BoolTypeNode,
+    VoidTypeNode,
+    StringLiteralNode,
+]
+KIND_OF = {cls: kind for kind, cls in enumerate(KINDS)}
+
+# Marks a row without span, e.g. for fresh polymorphic types
+NO_SPAN = -2
+
+
+class Arena:
+    """
+    An array-backed representation of an AST. Every node, token, list and missing child is a
+    row in a set of parallel arrays, stored in pre-order, such that the descendants of row `i`
+    are exactly the rows in `range(i + 1, arena.end[i])`.
+
+    The children of a node row are its child fields in order (see `child_field_names`), so a
+    node with three fields always has three child rows, e.g. a NONE row for `else_body=None`.
+    Tokens store their text and type in `payloads`, and polymorphic types store their id and
+    printed name.
+
+    Shared subtrees, e.g. type nodes shared in a typed tree, are stored once per occurrence.
+    Polymorphic types keep their id, so the converted tree has the same meaning.
+    """
+
+    def __init__(self) -> None:
+        self.kind = array("b")
+        self.start_ln = array("i")
+        self.start_col = array("i")
+        self.end_ln = array("i")
+        self.end_col = array("i")
+        self.first_child = array("i")
+        self.next_sibling = array("i")
+        self.end = array("i")
+        self.payload = array("i")
+        self.payloads = []
+
+    def __len__(self) -> int:
+        return len(self.kind)
+
+    @classmethod
+    def from_node(cls, tree: Node) -> Arena:
+        """Convert an object AST into an arena, with `tree` as row 0.
+
+        Args:
+            tree (Node): The tree to convert.
+
+        Returns:
+            Arena: The arena, in which row 0 represents `tree`.
+        """
+        arena = cls()
+        last_child = array("i")
+        stack = [(tree, -1)]
+        while stack:
+            value, parent = stack.pop()
+            row = len(arena.kind)
+            children = []
+
+            match value:
+                case list():
+                    kind, span, payload = LIST, None, -1
+                    children = value
+                case None:
+                    kind, span, payload = NONE, None, -1
+                case Token():
+                    kind, span = TOKEN, value.span
+                    payload = arena.add_payload((value.text, value.type))
+                case PolymorphicTypeNode():
+                    kind, span = KIND_OF[PolymorphicTypeNode], value.span
+                    # Keep the name under which it was printed, if any
+                    payload = arena.add_payload((value.id, value._token))
+                    children = [value.name]
+                case Node():
+                    kind, span, payload = KIND_OF[value.__class__], value.span, -1
+                    children = [
+                        getattr(value, name)
+                        for name in child_field_names(value.__class__)
+                    ]
+                case _:
+                    kind, span = VALUE, None
+                    payload = arena.add_payload(value)
+
+            arena.kind.append(kind)
+            if span is None:
+                arena.start_ln.append(NO_SPAN)
+                arena.start_col.append(NO_SPAN)
+                arena.end_ln.append(NO_SPAN)
+                arena.end_col.append(NO_SPAN)
+            else:
+                arena.start_ln.append(span.start_ln)
+                arena.start_col.append(span.start_col)
+                arena.end_ln.append(span.end_ln)
+                arena.end_col.append(span.end_col)
+            arena.first_child.append(-1)
+            arena.next_sibling.append(-1)
+            arena.end.append(-1)
+            arena.payload.append(payload)
+            last_child.append(-1)
+
+            # Link this row to its parent and previous sibling
+            if parent >= 0:
+                if last_child[parent] < 0:
+                    arena.first_child[parent] = row
+                else:
+                    arena.next_sibling[last_child[parent]] = row
+                last_child[parent] = row
+
+            stack += [(child, row) for child in reversed(children)]
+
+        # The subtree of a row ends where the subtree of its last child ends
+        for row in reversed(range(len(arena.kind))):
+            child = last_child[row]
+            arena.end[row] = arena.end[child] if child >= 0 else row + 1
+        return arena
+
+    def add_payload(self, value) -> int:
+        self.payloads.append(value)
+        return len(self.payloads) - 1
+
+    def children(self, row: int) -> Iterator[int]:
+        """Iterate over the rows of the children of `row`."""
+        child = self.first_child[row]
+        while child >= 0:
+            yield child
+            child = self.next_sibling[child]
+
+    def span(self, row: int) -> Span:
+        if self.start_ln[row] == NO_SPAN:
+            return None
+        return Span(
+            line_no=(self.start_ln[row], self.end_ln[row]),
+            span=(self.start_col[row], self.end_col[row]),
+        )
+
+    def to_node(self, root: int = 0) -> Node:
+        """Convert the subtree at `root` back into an object AST.
+
+        Args:
+            root (int, optional): The row of the subtree to convert. Defaults to 0.
+
+        Returns:
+            Node: The object AST. Rows that represent a list or Token are converted to a list
+                or Token, respectively.
+        """
+        values = {}
+        # Build the rows bottom-up, such that the children of a row are already converted
+        for row in reversed(range(root, self.end[root])):
+            kind = self.kind[row]
+            children = [values.pop(child) for child in self.children(row)]
+            if kind == LIST:
+                value = children
+            elif kind == NONE:
+                value = None
+            elif kind == TOKEN:
+                text, _type = self.payloads[self.payload[row]]
+                value = Token(text, _type, span=self.span(row))
+            elif kind == VALUE:
+                value = self.payloads[self.payload[row]]
+            elif KINDS[kind] is PolymorphicTypeNode:
+                # Avoid `__init__`, which would draw a new id
+                value = PolymorphicTypeNode.__new__(PolymorphicTypeNode)
+                value.id, value._token = self.payloads[self.payload[row]]
+                value.name = children[0]
+                value.span = self.span(row)
+            else:
+                value = KINDS[kind](*children, span=self.span(row))
+            values[row] = value
+        return values[root]
+
+    def view(self, row: int = 0) -> NodeView | list | Token | None:
+        """Get a lightweight view of `row`, or a list of views, a Token or None for rows
+        that represent those."""
+        kind = self.kind[row]
+        if kind == LIST:
+            return [self.view(child) for child in self.children(row)]
+        if kind == NONE:
+            return None
+        if kind in (TOKEN, VALUE):
+            return self.to_node(row)
+        return NodeView(self, row)
+
+    def rows_of(self, node_class: type, root: int = 0) -> List[int]:
+        """Find all rows in the subtree of `root` of the given node class."""
+        kind = KIND_OF[node_class]
+        return [row for row in range(root, self.end[root]) if self.kind[row] == kind]
+
+    def max_nesting(self, node_class: type, root: int = 0) -> int:
+        """Compute the maximum number of nested nodes of `node_class` in the subtree of `root`,
+        e.g. the number of nested for loops, like the ForCounterVisitor."""
+        kind = KIND_OF[node_class]
+        ends = []
+        maximum = 0
+        for row in range(root, self.end[root]):
+            while ends and ends[-1] <= row:
+                ends.pop()
+            if self.kind[row] == kind:
+                ends.append(self.end[row])
+                maximum = max(maximum, len(ends))
+        return maximum
+
+    def unreachable_statements(self, root: int = 0) -> List[int]:
+        """Find the statements that can never be executed in the subtree of `root`, following
+        the return path analysis of the AnalyzeTransformer.
+
+        A statement list stops being reachable after a statement that always returns, i.e. a
+        return statement, or an if-else of which both branches always return. Statements
+        within unreachable statements are not reported separately.
+
+        Returns:
+            List[int]: The rows of the unreachable statements, in order.
+        """
+        stmt, if_else, return_ = (
+            KIND_OF[StmtNode],
+            KIND_OF[IfElseNode],
+            KIND_OF[ReturnNode],
+        )
+
+        # Determine bottom-up whether each row always returns
+        returns = {}
+        for row in reversed(range(root, self.end[root])):
+            kind = self.kind[row]
+            if kind == return_:
+                returns[row] = True
+            elif kind == stmt:
+                returns[row] = returns.get(self.first_child[row], False)
+            elif kind == if_else:
+                _cond, body, else_body = self.children(row)
+                returns[row] = returns.get(body, False) and returns.get(
+                    else_body, False
+                )
+            elif kind == LIST:
+                returns[row] = any(returns.get(child) for child in self.children(row))
+
+        candidates = []
+        for row in range(root, self.end[root]):
+            if self.kind[row] != LIST or not returns[row]:
+                continue
+            reachable = True
+            for child in self.children(row):
+                if not reachable:
+                    candidates.append(child)
+                reachable = reachable and not returns.get(child, False)
+
+        # Only keep the outermost unreachable statements
+        unreachable = []
+        dead_until = root
+        for row in sorted(candidates):
+            if row >= dead_until:
+                unreachable.append(row)
+                dead_until = self.end[row]
+        return unreachable
+
+
+class NodeView:
+    """
+    A view of a node row in an Arena, with the same field names as the node class, for passes
+    that have not been ported to the arena representation. Children are returned as views.
+    """
+
+    __slots__ = ("arena", "row")
+
+    def __init__(self, arena: Arena, row: int) -> None:
+        self.arena = arena
+        self.row = row
+
+    @property
+    def node_class(self) -> type:
+        return KINDS[self.arena.kind[self.row]]
+
+    @property
+    def span(self) -> Span:
+        return self.arena.span(self.row)
+
+    def __getattr__(self, name: str):
+        if self.node_class is PolymorphicTypeNode:
+            if name == "id":
+                return self.arena.payloads[self.arena.payload[self.row]][0]
+            names = ("name",)
+        else:
+            names = child_field_names(self.node_class)
+        if name not in names:
+            raise AttributeError(
+                f"{self.node_class.__name__!r} object has no attribute {name!r}"
+            )
+        for field_name, child in zip(names, self.arena.children(self.row)):
+            if field_name == name:
+                return self.arena.view(child)
+
+    def iter_fields(self) -> Iterator[Tuple[str, object]]:
+        yield "span", self.span
+        if self.node_class is not PolymorphicTypeNode:
+            for name, child in zip(
+                child_field_names(self.node_class), self.arena.children(self.row)
+            ):
+                yield name, self.arena.view(child)
+
+    def to_node(self) -> Node:
+        return self.arena.to_node(self.row)
+
+    def __repr__(self) -> str:
+        return f"NodeView({self.node_class.__name__}, row={self.row})"
@@ -1,5 +1,7 @@
+import re
+from dataclasses import dataclass
 from enum import Enum, auto
-from typing import Iterator
+from typing import Callable, Dict, Iterator, List, Optional, TextIO, Tuple
 
 from compiler.token import Token
 from compiler.tree.visitor import NodeYielder
@@ -25,11 +27,13 @@ from compiler.tree.tree import (  # isort:skip
     ReturnNode,
     StmtAssNode,
     StmtNode,
+    StringLiteralNode,
     TupleNode,
     VarDeclNode,
     VoidTypeNode,
     WhileNode,
     ListAbbrNode,
+    child_field_names,
 )
 
 LEFT_ATTACHED_TOKENS = {
@@ -64,92 +68,294 @@ class PrintingInfo(Enum):
 
 
 INDENT = " " * 4
+# The starts of the lines that are not empty, except for the first line
+NEWLINES = re.compile(r"\n(?=[^\n])")
+
+
+@dataclass
+class Child:
+    """A child node in the output of a visitor method, with the arguments to print it with."""
+
+    node: Node
+    kwargs: Dict[str, object]
+
+    @property
+    def key(self) -> Tuple:
+        return tuple(sorted(self.kwargs.items()))
+
+
+@dataclass
+class Fragment:
+    """
+    The rendering of a node, with what is needed to continue printing after it as if its
+    tokens were printed one by one: the items before its first visible token, which depend on
+    what was printed before the node, and the state of the Writer after its last token.
+    """
+
+    lead: List[Token | PrintingInfo]
+    first: Optional[Token]
+    text: str
+    last_token: Optional[Token | PrintingInfo]
+    pending: List[str]
+
+
+# Renderings of nodes by their id, with the node itself such that a reused id is not mistaken
+# for the same node, and the fragments of the node per key of the arguments it was printed with
+Renderings = Dict[int, Tuple[Node, Dict[Tuple, Fragment]]]
+
+
+class Writer:
+    """Write tokens with the whitespace between them, and without leading or trailing
+    whitespace. Whitespace is held back until the next visible text, as it is removed if it
+    ends up trailing."""
+
+    def __init__(self, write: Callable[[str], object]) -> None:
+        self.write = write
+        self.depth = 0
+        self.pending: List[str] = []
+        self.last_char = None
+        self.last_token = None
+        # The items before the first visible token, see `Fragment`
+        self.lead: List[Token | PrintingInfo] = []
+        self.first = None
+
+    def add(self, token: Token | PrintingInfo) -> None:
+        if self.last_char is None and (
+            isinstance(token, PrintingInfo) or not token.text.rstrip(" ")
+        ):
+            self.lead.append(token)
+
+        if token == PrintingInfo.NEWLINE:
+            self.pending.append("\n")
+        elif token == PrintingInfo.SPACE:
+            self.last_token = token
+        elif token == PrintingInfo.NOSPACE:
+            pending = self.pending
+            while pending and pending[-1].endswith(" "):
+                if stripped := pending.pop().rstrip(" "):
+                    pending.append(stripped)
+                    break
+        else:
+            self.token(token)
+
+    def token(self, token: Token, fragment: Optional[Fragment] = None) -> None:
+        """Write `token`, or the rendering of a node starting with `token`."""
+        pending = self.pending
+        # Modify depth before this token, which the renderings of nodes leave unchanged
+        if token.type == Type.RCB and fragment is None:  # }
+            self.depth -= 1
+
+        # Ensure indentation is correct
+        if (pending[-1][-1] if pending else self.last_char) == "\n" and self.depth > 0:
+            pending.append(INDENT * self.depth)
+
+        # Modify depth after this token
+        if token.type == Type.LCB and fragment is None:  # {
+            self.depth += 1
+
+        # Remove the last space if this is a tightly bound character, e.g. ';'
+        # OR if `token` is the `(` after an `id` (i.e. a function call)
+        if (
+            pending
+            and pending[-1][-1] == " "
+            and self.last_token != PrintingInfo.SPACE
+            and (
+                token.type in RIGHT_ATTACHED_TOKENS
+                or (
+                    self.last_token
+                    and self.last_token.type == Type.ID
+                    and token.type == Type.LRB
+                )
+            )
+        ):
+            if stripped := pending.pop()[:-1]:
+                pending.append(stripped)
+
+        if fragment is not None:
+            # The lines of the node are indented relative to the current depth
+            if self.first is None:
+                self.first = token
+            text = fragment.text
+            if self.depth > 0:
+                text = NEWLINES.sub("\n" + INDENT * self.depth, text)
+            self.flush(text)
+            self.pending = list(fragment.pending)
+            self.last_token = fragment.last_token
+            return
+
+        # Print this token, keeping its trailing spaces pending
+        text = token.text.rstrip(" ")
+        if text:
+            if self.first is None:
+                self.first = token
+            self.flush(text)
+        if len(text) < len(token.text):
+            self.pending.append(token.text[len(text) :])
+
+        # Print space that follows this token if applicable
+        if token.type not in LEFT_ATTACHED_TOKENS:
+            self.pending.append(" ")
+
+        # Print a newline if applicable
+        if token.type in {Type.RCB, Type.LCB, Type.SEMICOLON}:
+            self.pending.append("\n")
+
+        self.last_token = token
+
+    def flush(self, text: str) -> None:
+        """Write the pending whitespace followed by `text`."""
+        # Leading whitespace is never written
+        if self.last_char is not None:
+            self.write("".join(self.pending))
+        self.write(text)
+        self.last_char = text[-1]
+        self.pending = []
+
+    def splice(self, fragment: Fragment) -> None:
+        """Write the rendering of a node, as if its tokens are added one by one."""
+        for token in fragment.lead:
+            self.add(token)
+        if fragment.first is not None:
+            self.token(fragment.first, fragment)
+
+    def fragment(self, parts: List[str]) -> Fragment:
+        """The rendering of the tokens that were written to `parts`."""
+        return Fragment(
+            self.lead, self.first, "".join(parts), self.last_token, self.pending
+        )
 
 
 class Printer(NodeYielder):
-    def __init__(self) -> None:
+    """
+    Print trees as SPL code. Visitor methods yield tokens and printing information, and yield
+    their children as `Child`, such that `write` can print them in place, and `render` can
+    reuse their renderings.
+
+    Renderings are stored in `renderings`, which is only valid while the tree is not modified.
+    Its owner discards it when the tree changes, e.g. the AnalysisManager of a PassManager.
+    """
+
+    def __init__(self, renderings: Optional[Renderings] = None) -> None:
         super().__init__()
-        self.program = []
+        self.renderings = {} if renderings is None else renderings
+
+    def visit(self, node: Node | Token, **kwargs) -> Child | Token:
+        if isinstance(node, Token):
+            return node
+        return Child(node, kwargs)
+
+    def visit_children(self, node: Node, **kwargs) -> Iterator[Child | Token]:
+        for field in child_field_names(node.__class__):
+            value = getattr(node, field)
+            for item in value if isinstance(value, list) else [value]:
+                if isinstance(item, (Node, Token)):
+                    yield self.visit(item, **kwargs)
+
+    def items(self, child: Child) -> Iterator[Child | Token | PrintingInfo]:
+        """The output of the visitor method of a child."""
+        return super().visit(child.node, **child.kwargs)
+
+    @classmethod
+    def render(cls, node: Node, renderings: Optional[Renderings] = None) -> str:
+        """Print `node` in linear time, reusing the renderings of its descendants.
+
+        Args:
+            node (Node): The node to print.
+            renderings (Optional[Renderings], optional): Renderings of a tree that is not
+                modified while they are in use, which are reused and added to. Defaults to
+                None, i.e. only the renderings made while printing `node`.
+
+        Returns:
+            str: The node as SPL code.
+        """
+        return cls(renderings).fragment(Child(node, {})).text.strip()
+
+    def fragment(self, child: Child) -> Fragment:
+        fragment = self.cached(child)
+        if fragment is not None:
+            return fragment
+
+        # The children that are being rendered, with the parts of their rendering so far,
+        # as an explicit stack such that deep trees do not hit the recursion limit
+        parts = []
+        stack = [(child, parts, Writer(parts.append), self.items(child))]
+        while stack:
+            child, parts, writer, items = stack[-1]
+            for item in items:
+                if not isinstance(item, Child):
+                    writer.add(item)
+                elif (fragment := self.cached(item)) is not None:
+                    writer.splice(fragment)
+                else:
+                    parts = []
+                    stack.append((item, parts, Writer(parts.append), self.items(item)))
+                    break
+            else:
+                stack.pop()
+                fragment = writer.fragment(parts)
+                self.store(child, fragment)
+                if stack:
+                    stack[-1][2].splice(fragment)
+        return fragment
+
+    def cached(self, child: Child) -> Optional[Fragment]:
+        entry = self.renderings.get(id(child.node))
+        if entry is None or entry[0] is not child.node:
+            return None
+        return entry[1].get(child.key)
+
+    def store(self, child: Child, fragment: Fragment) -> None:
+        entry = self.renderings.get(id(child.node))
+        if entry is None or entry[0] is not child.node:
+            entry = self.renderings[id(child.node)] = (child.node, {})
+        entry[1][child.key] = fragment
 
     def print(self, tree: Node) -> str:
-        # Traverse the tree, collecting Tokens and printing information
-        depth = 0
-        program = ""
-        for token in self.visit(tree):
-            if token == PrintingInfo.NEWLINE:
-                program += "\n"
-            elif token == PrintingInfo.SPACE:
-                last_token = token
-            elif token == PrintingInfo.NOSPACE:
-                while program and program[-1] == " ":
-                    program = program[:-1]
+        program = []
+        self.write(tree, program)
+        return "".join(program).strip()
+
+    def write(self, tree: Node, stream: TextIO | List[str]) -> None:
+        """Print `tree` to `stream` in linear time, without leading or trailing whitespace.
+        Renderings are neither reused nor stored.
+
+        Args:
+            tree (Node): The tree to print.
+            stream (TextIO | List[str]): The stream to write to, or a list to append to.
+        """
+        writer = Writer(stream.append if isinstance(stream, list) else stream.write)
+        stack = [self.items(Child(tree, {}))]
+        while stack:
+            for item in stack[-1]:
+                if isinstance(item, Child):
+                    stack.append(self.items(item))
+                    break
+                writer.add(item)
             else:
-                # Modify depth before this token
-                if token.type == Type.RCB:  # }
-                    depth -= 1
-
-                # Ensure indentation is correct
-                if program and program[-1] == "\n":
-                    program += INDENT * depth
-
-                # Modify depth after this token
-                if token.type == Type.LCB:  # {
-                    depth += 1
-
-                # Remove the last space if this is a tightly bound character, e.g. ';'
-                # OR if `token` is the `(` after an `id` (i.e. a function call)
-                if (
-                    program
-                    and program[-1] == " "
-                    and last_token != PrintingInfo.SPACE
-                    and (
-                        token.type in RIGHT_ATTACHED_TOKENS
-                        or (
-                            last_token
-                            and last_token.type == Type.ID
-                            and token.type == Type.LRB
-                        )
-                    )
-                ):
-                    program = program[:-1]
-
-                # Print this token
-                program += token.text
-
-                # Print space that follows this token if applicable
-                if token.type not in LEFT_ATTACHED_TOKENS:
-                    program += " "
-
-                # Print a newline if applicable
-                if token.type in {Type.RCB, Type.LCB, Type.SEMICOLON}:
-                    program += "\n"
-
-                last_token = token
-
-        return program.strip()
+                stack.pop()
 
     def visit_FunDeclNode(self, node: FunDeclNode, **kwargs) -> Iterator[Token]:
         yield node.id
         yield Token("(", Type.LRB)
         if node.args:
-            yield from self.visit(node.args)
+            yield self.visit(node.args)
         yield Token(")", Type.RRB)
         if node.type:
             yield Token("::", Type.DOUBLE_COLON)
-            yield from self.visit(node.type)
+            yield self.visit(node.type)
         yield Token("{", Type.LCB)
         for var_decl in node.var_decl:
-            yield from self.visit(var_decl)
+            yield self.visit(var_decl)
         for stmt in node.stmt:
-            yield from self.visit(stmt)
+            yield self.visit(stmt)
         yield Token("}", Type.RCB)
         yield PrintingInfo.NEWLINE
 
     def visit_VarDeclNode(self, node: VarDeclNode, **kwargs) -> Iterator[Token]:
-        yield from self.visit(node.type)
-        yield from self.visit(node.id)
+        yield self.visit(node.type)
+        yield self.visit(node.id)
         yield Token("=", Type.EQ)
-        yield from self.visit(node.exp)
+        yield self.visit(node.exp)
         yield Token(";", Type.SEMICOLON)
 
     def visit_IntTypeNode(self, node: IntTypeNode, **kwargs) -> Iterator[Token]:
@@ -172,156 +378,153 @@ class Printer(NodeYielder):
     def visit_IndexNode(self, node: IndexNode, **kwargs) -> Iterator[Token]:
         yield PrintingInfo.NOSPACE
         yield Token("[", Type.LSB)
-        yield from self.visit(node.exp)
+        yield self.visit(node.exp)
         yield Token("]", Type.RSB)
 
     def visit_ListNode(self, node: ListNode, **kwargs) -> Iterator[Token]:
         yield Token("[", Type.LSB)
         if node.body:
-            yield from self.visit(node.body)
+            yield self.visit(node.body)
         yield Token("]", Type.RSB)
 
     def visit_Op2Node(
-        self, node: Op2Node, previous_precedence: int = None, first=True, **kwargs
+        self, node: Op2Node, previous_precedence: int = None, **kwargs
     ) -> Iterator[Token]:
 
-        # Custom printing for strings
-        if isinstance(node.left, Token) and node.left.type == Type.CHARACTER:
-            if first:
-                yield Token('"', Type.STRING)
-            yield Token(node.left.text[1:-1], Type.STRING)
-            if not isinstance(node.right, ListNode):
-                yield from self.visit(node.right, first=False, **kwargs)
-            if first:
-                # As opposed to STRING, STRING_LONELY_ERROR is not left attached
-                # which allows a space after the string is over
-                yield Token('"', Type.STRING_LONELY_ERROR)
-
         # Special bracket handling for right associative operators
-        elif node.operator.type in right_associative:
+        if node.operator.type in right_associative:
             # We want brackets on the left side whenever that left side is another Op2Node,
             # rather than a Token
             brackets = not isinstance(node.left, Token)
             if brackets:
                 yield Token("(", Type.LRB)
-            yield from self.visit(node.left)
+            yield self.visit(node.left)
             if brackets:
                 yield Token(")", Type.RRB)
             yield node.operator
-            yield from self.visit(node.right)
+            yield self.visit(node.right)
 
         else:
             precedence = operator_precedence[node.operator.type]
             if previous_precedence and (precedence > previous_precedence):
                 yield Token("(", Type.LRB)
-                yield from self.visit(node.left, previous_precedence=precedence)
+                yield self.visit(node.left, previous_precedence=precedence)
                 yield node.operator
-                yield from self.visit(node.right, previous_precedence=precedence)
+                yield self.visit(node.right, previous_precedence=precedence)
                 yield Token(")", Type.RRB)
             else:
-                yield from self.visit(node.left, previous_precedence=precedence)
+                yield self.visit(node.left, previous_precedence=precedence)
                 yield node.operator
-                yield from self.visit(node.right, previous_precedence=precedence)
+                yield self.visit(node.right, previous_precedence=precedence)
 
     def visit_Op1Node(self, node: Op1Node, **kwargs) -> Iterator[Token]:
         if isinstance(node.operand, Op2Node):
             yield node.operator
             yield PrintingInfo.NOSPACE
             yield Token("(", Type.LRB)
-            yield from self.visit(node.operand)
+            yield self.visit(node.operand)
             yield Token(")", Type.RRB)
         else:
             yield node.operator
             yield PrintingInfo.NOSPACE
-            yield from self.visit(node.operand)
+            yield self.visit(node.operand)
 
     def visit_TupleNode(self, node: TupleNode, **kwargs) -> Iterator[Token]:
         yield Token("(", Type.LRB)
-        yield from self.visit(node.left)
+        yield self.visit(node.left)
         yield Token(",", Type.COMMA)
-        yield from self.visit(node.right)
+        yield self.visit(node.right)
         yield Token(")", Type.RRB)
 
     def visit_ReturnNode(self, node: ReturnNode, **kwargs) -> Iterator[Token]:
         yield Token("return", Type.RETURN)
         if node.exp:
-            yield from self.visit(node.exp)
+            yield self.visit(node.exp)
         yield Token(";", Type.SEMICOLON)
 
     def visit_StmtNode(self, node: StmtNode, **kwargs) -> Iterator[Token]:
-        yield from self.visit(node.stmt)
+        yield self.visit(node.stmt)
         match node.stmt:
             case FunCallNode() | Token(type=Type.CONTINUE) | Token(type=Type.BREAK):
                 yield Token(";", Type.SEMICOLON)
 
     def visit_FunTypeNode(self, node: FunTypeNode, **kwargs) -> Iterator[Token]:
         for _type in node.types:
-            yield from self.visit(_type)
+            yield self.visit(_type)
             yield PrintingInfo.SPACE
         yield Token("->", Type.ARROW)
-        yield from self.visit(node.ret_type)
+        yield self.visit(node.ret_type)
 
     def visit_StmtAssNode(self, node: StmtAssNode, **kwargs) -> Iterator[Token]:
-        yield from self.visit(node.id)
+        yield self.visit(node.id)
         yield Token("=", Type.EQ)
-        yield from self.visit(node.exp)
+        yield self.visit(node.exp)
         yield Token(";", Type.SEMICOLON)
 
     def visit_WhileNode(self, node: WhileNode, **kwargs) -> Iterator[Token]:
         yield Token("while", Type.WHILE)
         yield Token("(", Type.LRB)
-        yield from self.visit(node.cond)
+        yield self.visit(node.cond)
         yield Token(")", Type.RRB)
         yield Token("{", Type.LCB)
         for stmt in node.body:
-            yield from self.visit(stmt)
+            yield self.visit(stmt)
         yield Token("}", Type.RCB)
 
     def visit_ForNode(self, node: ForNode, **kwargs) -> Iterator[Token]:
         yield Token("for", Type.FOR)
-        yield from self.visit(node.id)
+        yield self.visit(node.id)
         yield Token("in", Type.IN)
-        yield from self.visit(node.loop)
+        yield self.visit(node.loop)
         yield Token("{", Type.LCB)
         for stmt in node.body:
-            yield from self.visit(stmt)
+            yield self.visit(stmt)
         yield Token("}", Type.RCB)
 
     def visit_IfElseNode(self, node: IfElseNode, **kwargs) -> Iterator[Token]:
         yield Token("if", Type.IF)
         yield Token("(", Type.LRB)
-        yield from self.visit(node.cond)
+        yield self.visit(node.cond)
         yield Token(")", Type.RRB)
         yield Token("{", Type.LCB)
         for stmt in node.body:
-            yield from self.visit(stmt)
+            yield self.visit(stmt)
         yield Token("}", Type.RCB)
         if node.else_body:
             yield Token("else", Type.ELSE)
             yield Token("{", Type.LCB)
             for stmt in node.else_body:
-                yield from self.visit(stmt)
+                yield self.visit(stmt)
             yield Token("}", Type.RCB)
 
     def visit_FunCallNode(self, node: FunCallNode, **kwargs) -> Iterator[Token]:
         yield node.func
         yield Token("(", Type.LRB)
         if node.args:
-            yield from self.visit(node.args)
+            yield self.visit(node.args)
         yield Token(")", Type.RRB)
 
     def visit_CommaListNode(self, node: CommaListNode, **kwargs) -> Iterator[Token]:
-        yield from self.visit(node.items[0])
+        yield self.visit(node.items[0])
         for token in node.items[1:]:
             yield Token(",", Type.COMMA)
             # yield PrintingInfo.SPACE
-            yield from self.visit(token)
+            yield self.visit(token)
+
+    def visit_StringLiteralNode(
+        self, node: StringLiteralNode, **kwargs
+    ) -> Iterator[Token]:
+        # Escape the characters again, i.e. '\n' -> '\\n' and '"' -> '\\"'
+        chars = node.chars.encode("unicode_escape").decode().replace('"', '\\"')
+        # As opposed to STRING, STRING_LONELY_ERROR is not left attached
+        # which allows a space after the string is over
+        yield Token(f'"{chars}"', Type.STRING_LONELY_ERROR)
 
     def visit_ListAbbrNode(self, node: ListAbbrNode, **kwargs) -> Iterator[Token]:
         yield Token("[", Type.LSB)
-        yield from self.visit(node.left)
+        yield self.visit(node.left)
         yield Token("..", Type.DDOT)
-        yield from self.visit(node.right)
+        yield self.visit(node.right)
         yield Token("]", Type.RSB)
 
     def visit_Token(self, node: Token, **kwargs) -> Iterator[Token]:
@@ -0,0 +1,488 @@
+from __future__ import annotations
+
+import re
+import sys
+from array import array
+from io import BytesIO
+from itertools import accumulate
+from operator import add
+from typing import BinaryIO, Callable, Iterator, List, Optional, Tuple
+
+from compiler.token import Token
+from compiler.tree.arena import KIND_OF, KINDS, LIST, NONE, TOKEN, VALUE
+from compiler.tree.tree import Node, PolymorphicTypeNode, child_field_names
+from compiler.type import Type
+from compiler.util import Span
+
+# A compact binary format for (typed) ASTs, e.g. to store trees or move them between processes.
+#
+# A stream starts with MAGIC and the format VERSION, followed by any number of frames, each
+# consisting of the length of the frame and one encoded tree. Within a frame, values are
+# encoded in pre-order, and every value has its kind from `compiler.tree.arena.KINDS`:
+# - list: The number of items, followed by the items.
+# - None: Nothing.
+# - str: The string, e.g. the characters of a StringLiteralNode.
+# - Token: Its text as string, its Type and its span.
+# - PolymorphicTypeNode: Its id, its printed name as optional string, its span and its `name`
+#   child.
+# - Other nodes: Their span, followed by their child fields in order.
+#
+# The parts of the values are stored in separate sections, such that each section is decoded
+# at once, and all tokens are created before the nodes. A frame starts with the lengths of
+# its SECTIONS:
+# - kinds: One byte per value.
+# - integers: Varints, i.e. the lengths of lists, the strings of str values, and the ids and
+#   optional printed names of type variables.
+# - texts: The strings of the tokens, as an array.
+# - types: The Type of every token, one byte per token.
+# - spans: The spans of the tokens, followed by those of the nodes, as five arrays: the start
+#   line relative to the start line of the previous span, the number of lines, the start
+#   column, the number of columns, and the positions of missing spans.
+# - string lengths: The length in bytes of every string that is new in this frame.
+# - strings: The UTF-8 bytes of the new strings.
+#
+# Arrays consist of their `array` typecode, their length as varint, and their little-endian
+# items, of the smallest signed type that fits all items. Strings are interned across the
+# stream: A string is encoded as its index in the table of previous strings, which is extended
+# with the new strings of every frame. Optional strings are encoded as 0, or their index plus 1.
+# Type variables keep their id, such that type variables that were equal remain equal when
+# decoded.
+#
+# As every kind of node has a fixed number of children, and every kind of value a fixed number
+# of integers, a frame is decoded in reverse, such that the children of a node are decoded
+# before the node itself.
+
+MAGIC = b"SPLT"
+# Increment whenever the encoding changes, including changes to `KINDS` or `Type`
+VERSION = 3
+SECTIONS = 7
+
+TYPES = list(Type)
+TYPE_INDEX = {_type: i for i, _type in enumerate(TYPES)}
+POLYMORPHIC = KIND_OF[PolymorphicTypeNode]
+NODE_KINDS = {
+    cls: kind
+    for kind, cls in enumerate(KINDS)
+    if issubclass(cls, Node) and cls is not PolymorphicTypeNode
+}
+# The class and child fields of every kind of node, or None for other kinds of values
+NODE_FIELDS = [
+    (cls, child_field_names(cls)) if cls in NODE_KINDS else None for cls in KINDS
+]
+# The bytes of the varints that take more than one byte
+MULTI_BYTE_VARINT = re.compile(rb"[\x80-\xff]+[\x00-\x7f]")
+# The typecodes of the signed integers of 1, 2, 4 and 8 bytes
+ARRAY_TYPECODES = "bhiq"
+
+
+class SerializationError(Exception):
+    pass
+
+
+def write_varint(buffer: bytearray, value: int) -> None:
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varints(data: bytes) -> List[int]:
+    """Decode a sequence of varints at once."""
+    if data and data[-1] >= 0x80:
+        raise SerializationError("Unexpected end of stream.")
+    # Most values fit in a single byte, which is then the value itself
+    values = []
+    end = 0
+    for match in MULTI_BYTE_VARINT.finditer(data):
+        start = match.start()
+        values += data[end:start]
+        value = shift = 0
+        for byte in match.group():
+            value |= (byte & 0x7F) << shift
+            shift += 7
+        values.append(value)
+        end = match.end()
+    values += data[end:]
+    return values
+
+
+def write_array(buffer: bytearray, values: List[int]) -> None:
+    """Write `values` as array of the smallest signed type that fits all of them."""
+    largest = max(max(values, default=0), -1 - min(values, default=0))
+    for typecode in ARRAY_TYPECODES:
+        if largest < 2 ** (array(typecode).itemsize * 8 - 1):
+            break
+    items = array(typecode, values)
+    if sys.byteorder == "big":
+        items.byteswap()
+    buffer += typecode.encode()
+    write_varint(buffer, len(items))
+    buffer += items.tobytes()
+
+
+def read_array(data: bytes, pos: int = 0) -> Tuple[array, int]:
+    """Read the array that starts at `pos` in `data`, and the position after it."""
+    typecode = chr(data[pos])
+    if typecode not in ARRAY_TYPECODES:
+        raise SerializationError("The frame is not an encoded tree.")
+    length = shift = 0
+    while True:
+        pos += 1
+        length |= (data[pos] & 0x7F) << shift
+        if data[pos] < 0x80:
+            break
+        shift += 7
+    items = array(typecode)
+    start = pos + 1
+    pos = start + length * items.itemsize
+    if pos > len(data):
+        raise SerializationError("Unexpected end of stream.")
+    items.frombytes(data[start:pos])
+    if sys.byteorder == "big":
+        items.byteswap()
+    return items, pos
+
+
+def new_token(text: str, _type: Type, span: Span) -> Token:
+    # Avoid `__init__` and `__post_init__`, as the type is known to be a Type
+    token = Token.__new__(Token)
+    token.text = text
+    token.type = _type
+    token.span = span
+    return token
+
+
+def new_span(start_ln: int, end_ln: int, start_col: int, end_col: int) -> Span:
+    # Avoid `__init__`, which accepts tuples as well as integers
+    span = Span.__new__(Span)
+    span.start_ln = start_ln
+    span.end_ln = end_ln
+    span.start_col = start_col
+    span.end_col = end_col
+    return span
+
+
+class SpanColumns:
+    """Collect spans as columns."""
+
+    def __init__(self) -> None:
+        self.lines = []
+        self.line_counts = []
+        self.cols = []
+        self.col_counts = []
+        self.missing = []
+
+    def __len__(self) -> int:
+        return len(self.lines) + len(self.missing)
+
+    def __add__(self, other: SpanColumns) -> SpanColumns:
+        columns = SpanColumns()
+        columns.lines = self.lines + other.lines
+        columns.line_counts = self.line_counts + other.line_counts
+        columns.cols = self.cols + other.cols
+        columns.col_counts = self.col_counts + other.col_counts
+        columns.missing = self.missing + [len(self) + index for index in other.missing]
+        return columns
+
+    def add(self, span: Span) -> None:
+        if span is None:
+            self.missing.append(len(self))
+            return
+        self.lines.append(span.start_ln)
+        self.line_counts.append(span.end_ln - span.start_ln)
+        self.cols.append(span.start_col)
+        self.col_counts.append(span.end_col - span.start_col)
+
+    def encode(self) -> bytearray:
+        buffer = bytearray()
+        # Every start line relative to the start line of the previous span
+        lines = [
+            line - previous for line, previous in zip(self.lines, [0, *self.lines])
+        ]
+        for column in (
+            lines,
+            self.line_counts,
+            self.cols,
+            self.col_counts,
+            self.missing,
+        ):
+            write_array(buffer, column)
+        return buffer
+
+
+class Encoder:
+    """Encode trees into a binary stream, one frame per tree."""
+
+    def __init__(self, stream: BinaryIO) -> None:
+        self.stream = stream
+        self.strings = {}
+        header = bytearray(MAGIC)
+        write_varint(header, VERSION)
+        stream.write(header)
+
+    def string(self, text: str) -> int:
+        """The index of `text` in the table of strings, adding it if it is new."""
+        index = self.strings.get(text)
+        if index is None:
+            index = self.strings[text] = len(self.strings)
+            data = text.encode()
+            write_varint(self.lengths, len(data))
+            self.chars += data
+        return index
+
+    def write(self, tree: Node) -> None:
+        """Encode `tree` as the next frame of the stream."""
+        kinds = bytearray()
+        ints = bytearray()
+        texts = []
+        types = bytearray()
+        token_spans = SpanColumns()
+        node_spans = SpanColumns()
+        self.lengths = bytearray()
+        self.chars = bytearray()
+
+        stack = [tree]
+        while stack:
+            value = stack.pop()
+            cls = value.__class__
+            if cls is Token:
+                kinds.append(TOKEN)
+                texts.append(self.string(value.text))
+                types.append(TYPE_INDEX[value.type])
+                token_spans.add(value.span)
+            elif cls is list:
+                kinds.append(LIST)
+                write_varint(ints, len(value))
+                stack += reversed(value)
+            elif value is None:
+                kinds.append(NONE)
+            elif cls is str:
+                kinds.append(VALUE)
+                write_varint(ints, self.string(value))
+            elif cls is PolymorphicTypeNode:
+                kinds.append(POLYMORPHIC)
+                write_varint(ints, value.id)
+                # The name under which it was printed, if any
+                if value._token is None:
+                    ints.append(0)
+                else:
+                    write_varint(ints, self.string(value._token.text) + 1)
+                node_spans.add(value.span)
+                stack.append(value.name)
+            elif cls in NODE_KINDS:
+                kinds.append(NODE_KINDS[cls])
+                node_spans.add(value.span)
+                stack += [getattr(value, name) for name in child_field_names(cls)][::-1]
+            else:
+                raise SerializationError(f"Cannot serialize {value!r}")
+
+        indices = bytearray()
+        write_array(indices, texts)
+        sections = (
+            kinds,
+            ints,
+            indices,
+            types,
+            (token_spans + node_spans).encode(),
+            self.lengths,
+            self.chars,
+        )
+        header = bytearray()
+        for section in sections:
+            write_varint(header, len(section))
+        frame = bytearray()
+        write_varint(frame, len(header) + sum(len(section) for section in sections))
+        self.stream.write(frame + header)
+        for section in sections:
+            self.stream.write(section)
+
+
+class Decoder:
+    """Decode trees from a binary stream created by an Encoder."""
+
+    def __init__(self, stream: BinaryIO) -> None:
+        self.stream = stream
+        self.strings = []
+        if stream.read(len(MAGIC)) != MAGIC:
+            raise SerializationError("The stream is not an encoded tree.")
+        version = self.read_stream_varint()
+        if version != VERSION:
+            raise SerializationError(
+                f"The stream uses version {version} of the format, but version {VERSION} is required."
+            )
+
+    def read_stream_varint(self) -> int:
+        """Read a varint directly from the stream, or return None at the end of the stream."""
+        value = shift = 0
+        while True:
+            byte = self.stream.read(1)
+            if not byte:
+                if shift:
+                    raise SerializationError("Unexpected end of stream.")
+                return None
+            value |= (byte[0] & 0x7F) << shift
+            if byte[0] < 0x80:
+                return value
+            shift += 7
+
+    def __iter__(self) -> Iterator[Node]:
+        while (tree := self.read()) is not None:
+            yield tree
+
+    @staticmethod
+    def read_sections(data: bytes) -> List[bytes]:
+        """Split a frame into its sections, see the format above."""
+        lengths = []
+        pos = 0
+        while len(lengths) < SECTIONS:
+            value = shift = 0
+            while True:
+                if pos >= len(data):
+                    raise SerializationError("Unexpected end of stream.")
+                byte = data[pos]
+                pos += 1
+                value |= (byte & 0x7F) << shift
+                if byte < 0x80:
+                    break
+                shift += 7
+            lengths.append(value)
+        if pos + sum(lengths) != len(data):
+            raise SerializationError("The frame does not match its sections.")
+
+        sections = []
+        for length in lengths:
+            sections.append(data[pos : pos + length])
+            pos += length
+        return sections
+
+    @staticmethod
+    def read_spans(data: bytes) -> List[Span]:
+        """Decode the spans of a section, in order."""
+        columns = []
+        pos = 0
+        for _ in range(5):
+            column, pos = read_array(data, pos)
+            columns.append(column)
+        if pos != len(data):
+            raise SerializationError("The frame is not an encoded tree.")
+
+        lines, line_counts, cols, col_counts, missing = columns
+        lines = list(accumulate(lines))
+        spans = list(
+            map(
+                new_span,
+                lines,
+                map(add, lines, line_counts),
+                cols,
+                map(add, cols, col_counts),
+            )
+        )
+        for index in missing:
+            spans.insert(index, None)
+        return spans
+
+    def read(self) -> Node:
+        """Decode the next tree from the stream, or return None at the end of the stream."""
+        length = self.read_stream_varint()
+        if length is None:
+            return None
+        data = self.stream.read(length)
+        if len(data) != length:
+            raise SerializationError("Unexpected end of stream.")
+        kinds, ints, texts, types, spans, lengths, chars = self.read_sections(data)
+
+        # Extend the table of strings with the new strings of this frame
+        strings = self.strings
+        pos = 0
+        for size in read_varints(lengths):
+            strings.append(chars[pos : pos + size].decode())
+            pos += size
+
+        try:
+            # The spans of the tokens precede those of the nodes
+            spans = self.read_spans(spans)
+            tokens = list(
+                map(
+                    new_token,
+                    [strings[index] for index in read_array(texts)[0]],
+                    [TYPES[index] for index in types],
+                    spans[: len(types)],
+                )
+            )
+            return self.read_values(
+                kinds,
+                reversed(read_varints(ints)).__next__,
+                reversed(tokens).__next__,
+                reversed(spans[len(types) :]).__next__,
+            )
+        except (IndexError, StopIteration, TypeError):
+            raise SerializationError("The frame is not an encoded tree.") from None
+
+    def read_values(
+        self,
+        kinds: bytes,
+        next_int: Callable[[], int],
+        next_token: Callable[[], Token],
+        next_span: Callable[[], Span],
+    ) -> Node:
+        """Decode the values of a frame in reverse, taking their integers, tokens and spans
+        from the end of the decoded sections."""
+        strings = self.strings
+        max_id = -1
+        # The decoded values, of which the last one is the next child of the node being decoded
+        stack = []
+        pop = stack.pop
+        for kind in reversed(kinds):
+            fields = NODE_FIELDS[kind]
+            if fields is not None:
+                # Avoid `__init__`, which takes several times as long
+                cls, names = fields
+                value = cls.__new__(cls)
+                for name in names:
+                    setattr(value, name, pop())
+                value.span = next_span()
+            elif kind == TOKEN:
+                value = next_token()
+            elif kind == LIST:
+                length = next_int()
+                value = stack[: -length - 1 : -1]
+                del stack[len(stack) - length :]
+            elif kind == NONE:
+                value = None
+            elif kind == VALUE:
+                value = strings[next_int()]
+            elif kind == POLYMORPHIC:
+                printed = next_int()
+                _id = next_int()
+                max_id = max(max_id, _id)
+                printed = strings[printed - 1] if printed else None
+                value = self.polymorphic(pop(), next_span(), _id, printed)
+            stack.append(value)
+
+        if len(stack) != 1:
+            raise SerializationError("The frame is not an encoded tree.")
+        # Ensure that fresh polymorphic types do not clash with decoded ones
+        PolymorphicTypeNode.next_id = max(PolymorphicTypeNode.next_id, max_id + 1)
+        return stack[0]
+
+    @staticmethod
+    def polymorphic(name: Token, span: Span, _id: int, printed: Optional[str]) -> Node:
+        # Avoid `__init__`, which would draw a new id
+        node = PolymorphicTypeNode.__new__(PolymorphicTypeNode)
+        node.id = _id
+        node._token = None if printed is None else Token(printed, Type.ID)
+        node.name = name
+        node.span = span
+        return node
+
+
+def dumps(tree: Node) -> bytes:
+    """Encode a single tree into bytes."""
+    stream = BytesIO()
+    Encoder(stream).write(tree)
+    return stream.getvalue()
+
+
+def loads(data: bytes) -> Node:
+    """Decode a single tree from bytes created by `dumps`."""
+    return Decoder(BytesIO(data)).read()
@@ -2,14 +2,14 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field, fields
 from string import ascii_lowercase
-from typing import Iterator, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from compiler.token import Token
 from compiler.type import Type
 from compiler.util import Span
 
 
-@dataclass
+@dataclass(slots=True)
 class Node:
     span: Span = field(
         repr=False, kw_only=True, compare=False, default_factory=Span.default
@@ -18,8 +18,7 @@ class Node:
     def __str__(self) -> str:
         from compiler.tree.printer import Printer
 
-        printer = Printer()
-        return printer.print(self)
+        return Printer.render(self)
 
     def __contains__(self, element: Node) -> bool:
         if self == element:
@@ -30,80 +29,100 @@ class Node:
         )
 
     def iter_fields(self, **kwargs) -> Iterator[Token]:
-        # Yield the dataclass field.
-        # Throws a TypeError if self is not a dataclass, just ignore if so
-        try:
-            for _field in fields(self):
-                yield _field.name, getattr(self, _field.name)
-        except TypeError:
-            pass
+        # Yield the dataclass fields
+        for name in field_names(self.__class__):
+            yield name, getattr(self, name)
 
 
-@dataclass
+# Mapping of Node classes to the names of their dataclass fields, and to the names of
+# the fields that may contain children, i.e. all except `span`. Computed once per class.
+FIELD_NAMES: Dict[type, Tuple[str, ...]] = {}
+CHILD_FIELD_NAMES: Dict[type, Tuple[str, ...]] = {}
+
+
+def field_names(cls: type) -> Tuple[str, ...]:
+    try:
+        return FIELD_NAMES[cls]
+    except KeyError:
+        names = FIELD_NAMES[cls] = tuple(_field.name for _field in fields(cls))
+        return names
+
+
+def child_field_names(cls: type) -> Tuple[str, ...]:
+    try:
+        return CHILD_FIELD_NAMES[cls]
+    except KeyError:
+        names = CHILD_FIELD_NAMES[cls] = tuple(
+            name for name in field_names(cls) if name != "span"
+        )
+        return names
+
+
+@dataclass(slots=True)
 class CommaListNode(Node):
     items: List[Node]
 
 
-@dataclass
+@dataclass(slots=True)
 class FunCallNode(Node):
     func: Token
     args: Optional[CommaListNode]
     type: Optional[TypeNode] = field(default=None)
 
 
-@dataclass
+@dataclass(slots=True)
 class IfElseNode(Node):
     cond: Node
     body: List[StmtNode]
     else_body: List[StmtNode]
 
 
-@dataclass
+@dataclass(slots=True)
 class WhileNode(Node):
     cond: Node
     body: List[StmtNode]
 
 
-@dataclass
+@dataclass(slots=True)
 class ForNode(Node):
     id: Token
     loop: Node
     body: List[StmtNode]
 
 
-@dataclass
+@dataclass(slots=True)
 class StmtAssNode(Node):
     id: VariableNode
     exp: Node
 
 
-@dataclass
+@dataclass(slots=True)
 class FieldNode(Node):
     fields: List[Token]
 
 
-@dataclass
+@dataclass(slots=True)
 class IndexNode(Node):
     exp: Node
 
 
-@dataclass
+@dataclass(slots=True)
 class FunTypeNode(Node):
     types: List[Node]
     ret_type: Node
 
 
-@dataclass
+@dataclass(slots=True)
 class StmtNode(Node):
     stmt: Node
 
 
-@dataclass
+@dataclass(slots=True)
 class ReturnNode(Node):
     exp: Optional[Node | Token]
 
 
-@dataclass
+@dataclass(slots=True)
 class TupleNode(Node):
     left: Node
     right: Node
@@ -112,12 +131,12 @@ class TupleNode(Node):
         return f"({str(self.left)}, {str(self.right)})"
 
 
-@dataclass
+@dataclass(slots=True)
 class SPLNode(Node):
     body: List[Node]
 
 
-@dataclass
+@dataclass(slots=True)
 class FunDeclNode(Node):
     id: Token
     args: Optional[CommaListNode]
@@ -126,47 +145,50 @@ class FunDeclNode(Node):
     stmt: List[StmtNode]
 
 
-@dataclass
+@dataclass(slots=True)
 class VarDeclNode(Node):
     type: Token | Node
     id: Token
     exp: Node
 
 
-@dataclass
+@dataclass(slots=True)
 class IntTypeNode(Node):
     def __str__(self) -> str:
         return "Int"
 
 
-@dataclass
+@dataclass(slots=True)
 class CharTypeNode(Node):
     def __str__(self) -> str:
         return "Char"
 
 
-@dataclass
+@dataclass(slots=True)
 class BoolTypeNode(Node):
     def __str__(self) -> str:
         return "Bool"
 
 
-@dataclass
+@dataclass(slots=True)
 class VoidTypeNode(Node):
     def __str__(self) -> str:
         return "Void"
 
 
 class PolymorphicTypeNode(Node):
-    id = 0
+    __slots__ = ("_token", "name", "id")
+
+    # The id of the next (fresh) polymorphic type
+    next_id = 0
     print_id = 0
 
     def __init__(self, name=None, span=None) -> None:
         self._token = None
         self.name = name
         self.span = span
-        self.id = PolymorphicTypeNode.id
-        PolymorphicTypeNode.id += 1
+        self.id = PolymorphicTypeNode.next_id
+        PolymorphicTypeNode.next_id += 1
 
     @property
     def token(self):
@@ -183,7 +205,7 @@ class PolymorphicTypeNode(Node):
 
     @classmethod
     def reset(cls):
-        cls.id = 0
+        cls.next_id = 0
         cls.print_id = 0
 
     def __eq__(self, __o: object) -> bool:
@@ -203,18 +225,18 @@ class PolymorphicTypeNode(Node):
         return hash(int(self.id))
 
 
-@dataclass
+@dataclass(slots=True)
 class VariableNode(Node):
     id: Token
     field: Optional[FieldNode] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ListNode(Node):
     body: Optional[Node]
 
 
-@dataclass
+@dataclass(slots=True)
 class Op2Node(Node):
     left: Node
     operator: Token
@@ -231,18 +253,24 @@ class Op2Node(Node):
             raise Exception()
 
 
-@dataclass
+@dataclass(slots=True)
 class Op1Node(Node):
     operator: Token
     operand: Node
 
 
-@dataclass
+@dataclass(slots=True)
 class ListAbbrNode(Node):
     left: Node
     right: Node
 
 
+@dataclass(slots=True)
+class StringLiteralNode(Node):
+    # The (unescaped) characters of the string, stored flat rather than as a chain of `:`
+    chars: str
+
+
 TypeNode = (
     FunTypeNode
     | ListNode
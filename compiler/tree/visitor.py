@@ -1,8 +1,8 @@
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Callable, Dict
 
 from compiler.token import Token
-from compiler.tree.tree import Node
+from compiler.tree.tree import Node, child_field_names
 
 
 class NodeVisitor:
@@ -10,17 +10,35 @@ class NodeVisitor:
     For visiting nodes in our AST
     """
 
+    # Mapping of node classes to the (unbound) visit method for that class, per visitor class.
+    # Filled on the first visit of each node class, e.g. `IntTypeNode` -> `visit_IntTypeNode`.
+    dispatch: Dict[type, Callable] = {}
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls.dispatch = {}
+
+    @classmethod
+    def find_visitor(cls, node_class: type) -> Callable:
+        """Find and store the method to visit instances of `node_class` with."""
+        visitor = getattr(cls, "visit_" + node_class.__name__, cls.visit_children)
+        cls.dispatch[node_class] = visitor
+        return visitor
+
     def visit(self, node: Node | Token, *args, **kwargs):
         """Visit a node."""
-        method = "visit_" + node.__class__.__name__
-        visitor = getattr(self, method, self.visit_children)
-        return visitor(node, *args, **kwargs)
+        try:
+            visitor = self.dispatch[node.__class__]
+        except KeyError:
+            visitor = self.find_visitor(node.__class__)
+        return visitor(self, node, *args, **kwargs)
 
     def visit_children(self, node: Node | Token, *args, **kwargs):
         """Called if no explicit visitor function exists for a node."""
         if isinstance(node, Token):
             return
-        for field, value in node.iter_fields():
+        for field in child_field_names(node.__class__):
+            value = getattr(node, field)
             if isinstance(value, list):
                 for item in value:
                     if isinstance(item, (Node, Token)):
@@ -38,7 +56,8 @@ class NodeTransformer(NodeVisitor):
         if isinstance(node, Token):
             return node
 
-        for field, old_value in node.iter_fields():
+        for field in child_field_names(node.__class__):
+            old_value = getattr(node, field)
             if isinstance(old_value, list):
                 new_values = []
                 for value in old_value:
@@ -67,9 +86,11 @@ class NodeYielder(NodeVisitor):
 
     def visit(self, node: Node | Token, *args, **kwargs):
         """Visit a node."""
-        method = "visit_" + node.__class__.__name__
-        visitor = getattr(self, method, self.visit_children)
-        yield from visitor(node, *args, **kwargs)
+        try:
+            visitor = self.dispatch[node.__class__]
+        except KeyError:
+            visitor = self.find_visitor(node.__class__)
+        yield from visitor(self, node, *args, **kwargs)
 
     def visit_children(self, node: Node | Token, *args, **kwargs):
         """Called if no explicit visitor function exists for a node."""
@@ -80,7 +101,8 @@ class NodeYielder(NodeVisitor):
         if isinstance(node, list):
             node = node[0]
 
-        for field, value in node.iter_fields():
+        for field in child_field_names(node.__class__):
+            value = getattr(node, field)
             if isinstance(value, list):
                 for item in value:
                     if isinstance(item, (Node, Token)):
@@ -0,0 +1,335 @@
+import hashlib
+import pickle  # nosec
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from compiler.token import Token
+from compiler.tree.visitor import NodeVisitor
+from compiler.type import Type
+
+from compiler.tree.tree import (  # isort:skip
+    FunCallNode,
+    FunDeclNode,
+    FunTypeNode,
+    ListNode,
+    Node,
+    PolymorphicTypeNode,
+    TupleNode,
+    TypeNode,
+    VarDeclNode,
+)
+
+# Increment whenever the layout of `CacheEntry` or the hashing scheme changes,
+# such that caches persisted by older versions are ignored.
+CACHE_VERSION = 1
+
+
+def structural_hash(node: Node) -> str:
+    """Compute a hash of the structure of `node`, ignoring spans and type information
+    that was inferred by the Typer.
+
+    Args:
+        node (Node): The (untyped) node to hash, generally a FunDeclNode.
+
+    Returns:
+        str: A hexadecimal digest, equal for structurally equal nodes.
+    """
+    digest = hashlib.sha256()
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        match node:
+            case Token():
+                digest.update(f"T{node.type.name}:{node.text}\0".encode())
+            case PolymorphicTypeNode():
+                # Only polymorphic types that were written by the programmer are in an untyped tree
+                name = node.name.text if node.name else ""
+                digest.update(f"P{name}\0".encode())
+            case list():
+                digest.update(f"L{len(node)}\0".encode())
+                stack += reversed(node)
+            case Node():
+                digest.update(f"N{node.__class__.__name__}\0".encode())
+                stack += reversed([value for _, value in node.iter_fields()])
+            case str():
+                digest.update(f"S{len(node)}:{node}\0".encode())
+            case None:
+                digest.update(b"0\0")
+    return digest.hexdigest()
+
+
+def canonical_type(node: TypeNode, ordinals: Dict[int, int]) -> str:
+    """Convert a type to a string in which polymorphic types are numbered in the order in which
+    they are first encountered, rather than by their global id.
+
+    Args:
+        node (TypeNode): The type to convert.
+        ordinals (Dict[int, int]): A mapping of PolymorphicTypeNode ids to their number,
+            which is extended with the newly encountered polymorphic types.
+
+    Returns:
+        str: The canonical string representation of `node`.
+    """
+    match node:
+        case PolymorphicTypeNode():
+            return f"'{ordinals.setdefault(node.id, len(ordinals))}"
+        case ListNode():
+            return f"[{canonical_type(node.body, ordinals)}]"
+        case TupleNode():
+            return f"({canonical_type(node.left, ordinals)}, {canonical_type(node.right, ordinals)})"
+        case FunTypeNode():
+            types = " ".join(canonical_type(_type, ordinals) for _type in node.types)
+            return f"{types} -> {canonical_type(node.ret_type, ordinals)}"
+        case None:
+            return "None"
+    return str(node)
+
+
+class ReferenceCollector(NodeVisitor):
+    """Collect the names of the functions called and the variables used in a subtree, as well as
+    the nodes that receive type information from the Typer, in a deterministic order."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.functions = set()
+        self.variables = set()
+        self.typed_nodes = []
+
+    def collect(self, node: Node) -> "ReferenceCollector":
+        if isinstance(node, FunDeclNode):
+            for var_decl in node.var_decl:
+                self.visit(var_decl)
+            for stmt in node.stmt:
+                self.visit(stmt)
+        else:
+            self.visit(node)
+        return self
+
+    def visit_VarDeclNode(self, node: VarDeclNode, *args, **kwargs) -> None:
+        self.typed_nodes.append(node)
+        self.visit(node.exp)
+
+    def visit_FunCallNode(self, node: FunCallNode, *args, **kwargs) -> None:
+        self.typed_nodes.append(node)
+        self.functions.add(node.func.text)
+        if node.args:
+            self.visit(node.args)
+
+    def visit_Token(self, node: Token, *args, **kwargs) -> None:
+        if node.type == Type.ID:
+            self.variables.add(node.text)
+
+
+@dataclass
+class CacheKey:
+    """The key of a function in the TypeCache, along with the polymorphic types from outside of the
+    function that its typing depends on, e.g. from the signatures of the functions that it calls."""
+
+    digest: str
+    # The outside polymorphic types, in the order of their canonical number
+    externals: List[PolymorphicTypeNode]
+    # The nodes of the function body that receive type information
+    typed_nodes: List[Node]
+
+
+@dataclass
+class CacheEntry:
+    """The result of typing a single function declaration, prior to typing the function calls
+    to this function that occurred before its declaration."""
+
+    fun_type: FunTypeNode
+    transformations: List[Tuple[PolymorphicTypeNode, TypeNode]]
+    node_types: List[Optional[TypeNode]]
+    # Mapping of PolymorphicTypeNode ids used in this entry to the canonical number
+    # of the outside polymorphic type that they represent
+    externals: Dict[int, int]
+
+
+@dataclass
+class TypeCache:
+    """
+    A cache of inferred function types, such that only the functions that changed, or for which
+    the types of the functions they call changed, need to be typed again.
+
+    The same instance can be passed to multiple Typer instances to keep the cache in memory,
+    and it can be persisted using `save` and `load`.
+    """
+
+    entries: Dict[str, CacheEntry] = field(default_factory=dict)
+    hits: int = field(default=0, compare=False)
+    misses: int = field(default=0, compare=False)
+
+    def key(
+        self,
+        fun_decl: FunDeclNode,
+        var_context: Dict[str, TypeNode],
+        fun_context: Dict[str, TypeNode],
+        exp_type: TypeNode,
+    ) -> Optional[CacheKey]:
+        """Compute the key of a function declaration, prior to typing it.
+
+        The key consists of the structure of the function, and the current types of the functions
+        it calls and of the global variables it uses.
+
+        Args:
+            fun_decl (FunDeclNode): The function declaration that is about to be typed.
+            var_context (Dict[str, TypeNode]): The variables defined in this context.
+            fun_context (Dict[str, TypeNode]): The functions defined.
+            exp_type (TypeNode): The expected type for `fun_decl`.
+
+        Returns:
+            Optional[CacheKey]: The key, or None if the function cannot be cached, i.e. if it
+                calls a function that has not been declared yet.
+        """
+        references = ReferenceCollector().collect(fun_decl)
+
+        ordinals = {}
+        canonical_type(exp_type, ordinals)
+        parts = [structural_hash(fun_decl)]
+        for name in sorted(references.functions - {fun_decl.id.text}):
+            # The typing of calls to functions that are not yet declared is postponed,
+            # which cannot be recreated from the cache.
+            if name not in fun_context:
+                return None
+            parts.append(f"{name} :: {canonical_type(fun_context[name], ordinals)}")
+        for name in sorted(references.variables & var_context.keys()):
+            parts.append(f"{name} = {canonical_type(var_context[name], ordinals)}")
+
+        externals = [None] * len(ordinals)
+        for node in self.polymorphic_types(
+            [exp_type]
+            + [
+                fun_context[name]
+                for name in references.functions
+                if name in fun_context
+            ]
+            + [var_context[name] for name in references.variables & var_context.keys()]
+        ):
+            externals[ordinals[node.id]] = node
+
+        digest = hashlib.sha256("\n".join(parts).encode()).hexdigest()
+        return CacheKey(digest, externals, references.typed_nodes)
+
+    def get(self, key: CacheKey) -> Optional[CacheEntry]:
+        entry = self.entries.get(key.digest)
+        if entry:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return entry
+
+    def put(
+        self,
+        key: CacheKey,
+        fun_type: FunTypeNode,
+        transformations: List[Tuple[PolymorphicTypeNode, TypeNode]],
+    ) -> CacheEntry:
+        """Create an entry from the result of typing a function. The entry is copied, such that
+        later (in-place) transformations do not affect it. The entry is only stored once
+        `commit` is called, i.e. once the program has been typed without errors.
+        """
+        externals = {node.id: i for i, node in enumerate(key.externals)}
+        node_types = [node.type for node in key.typed_nodes]
+        fun_type, transformations, node_types = self.instantiate(
+            (fun_type, transformations, node_types), lambda node: node
+        )
+        return CacheEntry(fun_type, transformations, node_types, externals)
+
+    def commit(self, entries: Dict[str, CacheEntry]) -> None:
+        self.entries.update(entries)
+
+    def restore(
+        self, key: CacheKey, entry: CacheEntry
+    ) -> Tuple[FunTypeNode, List[Tuple[PolymorphicTypeNode, TypeNode]]]:
+        """Recreate the typing of a function from a cache entry, and place the types of the
+        function body in the tree.
+
+        Polymorphic types that originate from outside of the function are replaced by the
+        corresponding current types, while the others are replaced by fresh ones.
+
+        Returns:
+            Tuple[FunTypeNode, List[Tuple[PolymorphicTypeNode, TypeNode]]]: The function type
+                and the transformations that typing the function would have produced.
+        """
+        fresh = {}
+
+        def replace(node: PolymorphicTypeNode) -> PolymorphicTypeNode:
+            if node.id in entry.externals:
+                return key.externals[entry.externals[node.id]]
+            return fresh.setdefault(node.id, PolymorphicTypeNode.fresh())
+
+        fun_type, transformations, node_types = self.instantiate(
+            (entry.fun_type, entry.transformations, entry.node_types), replace
+        )
+        for node, node_type in zip(key.typed_nodes, node_types):
+            node.type = node_type
+        return fun_type, transformations
+
+    @staticmethod
+    def instantiate(value, replace):
+        """Copy the (nested tuples or lists of) types in `value`, and replace every
+        PolymorphicTypeNode using `replace`. Types that were shared in `value` remain shared,
+        as transformations are applied in-place."""
+        copies = {}
+
+        def copy(value):
+            if id(value) in copies:
+                return copies[id(value)]
+            match value:
+                case PolymorphicTypeNode():
+                    result = replace(value)
+                case list() | tuple():
+                    result = type(value)(copy(item) for item in value)
+                case ListNode():
+                    result = ListNode(copy(value.body), span=value.span)
+                case TupleNode():
+                    result = TupleNode(
+                        copy(value.left), copy(value.right), span=value.span
+                    )
+                case FunTypeNode():
+                    result = FunTypeNode(
+                        copy(value.types), copy(value.ret_type), span=value.span
+                    )
+                case Node():
+                    result = value.__class__(span=value.span)
+                case _:
+                    result = value
+            copies[id(value)] = result
+            return result
+
+        return copy(value)
+
+    @staticmethod
+    def polymorphic_types(nodes: List[TypeNode]) -> List[PolymorphicTypeNode]:
+        polymorphic = []
+        stack = list(nodes)
+        while stack:
+            node = stack.pop()
+            match node:
+                case PolymorphicTypeNode():
+                    polymorphic.append(node)
+                case ListNode():
+                    stack.append(node.body)
+                case TupleNode():
+                    stack += [node.left, node.right]
+                case FunTypeNode():
+                    stack += [*node.types, node.ret_type]
+        return polymorphic
+
+    def save(self, path: str) -> None:
+        """Persist the cache entries to `path`."""
+        with open(path, "wb") as f:
+            pickle.dump((CACHE_VERSION, self.entries), f)
+
+    @classmethod
+    def load(cls, path: str) -> "TypeCache":
+        """Load a cache that was persisted using `save`. An empty cache is returned if `path`
+        does not exist, or if it was created by an incompatible version of the compiler."""
+        try:
+            with open(path, "rb") as f:
+                version, entries = pickle.load(f)  # nosec
+        except FileNotFoundError:
+            return cls()
+        if version != CACHE_VERSION:
+            return cls()
+        return cls(entries)
@@ -0,0 +1,87 @@
+from typing import Dict, List, Tuple
+
+from compiler.tree.tree import FunDeclNode, SPLNode, VarDeclNode
+from compiler.typer.cache import ReferenceCollector
+
+
+class CallGraph:
+    """
+    The dependencies between the top-level declarations of a program, i.e. which declarations
+    call a function or use a global variable declared by another declaration.
+
+    Declarations that are not (indirectly) connected through these dependencies share no part of
+    the variable or function context while typing, so these groups can be typed independently.
+    """
+
+    def __init__(self, tree: SPLNode) -> None:
+        self.declarations = tree.body
+
+        # Union-find structure over the declaration indices
+        self.parents = list(range(len(self.declarations)))
+
+        # Map each declared name to the first declaration that declares it. Declarations
+        # of the same name are joined, such that redefinitions are still detected.
+        declared: Dict[Tuple[str, str], int] = {}
+        for i, declaration in enumerate(self.declarations):
+            if name := self.declared_name(declaration):
+                self.join(i, declared.setdefault(name, i))
+
+        for i, declaration in enumerate(self.declarations):
+            references = ReferenceCollector().collect(declaration)
+            for name in references.functions:
+                if ("fun", name) in declared:
+                    self.join(i, declared[("fun", name)])
+            for name in references.variables:
+                if ("var", name) in declared:
+                    self.join(i, declared[("var", name)])
+
+    @staticmethod
+    def declared_name(declaration) -> Tuple[str, str]:
+        match declaration:
+            case FunDeclNode():
+                return ("fun", declaration.id.text)
+            case VarDeclNode():
+                return ("var", declaration.id.text)
+        return None
+
+    def find(self, i: int) -> int:
+        while self.parents[i] != i:
+            self.parents[i] = self.parents[self.parents[i]]
+            i = self.parents[i]
+        return i
+
+    def join(self, i: int, j: int) -> None:
+        i, j = self.find(i), self.find(j)
+        # Keep the lowest index as the root, for a deterministic order of the groups
+        if i < j:
+            self.parents[j] = i
+        elif j < i:
+            self.parents[i] = j
+
+    def groups(self) -> List[List[int]]:
+        """Compute the groups of declarations that can be typed independently.
+
+        Returns:
+            List[List[int]]: The indices of the declarations in each group, in source order.
+                The groups are ordered by their first declaration.
+        """
+        groups = {}
+        for i in range(len(self.declarations)):
+            groups.setdefault(self.find(i), []).append(i)
+        return list(groups.values())
+
+    def partition(self, n: int) -> List[List[int]]:
+        """Distribute the groups of declarations over at most `n` partitions of similar size.
+
+        Args:
+            n (int): The maximum number of partitions.
+
+        Returns:
+            List[List[int]]: The non-empty partitions, each a list of declaration indices
+                in source order.
+        """
+        partitions = [[] for _ in range(min(n, len(self.declarations)))]
+        # Greedily assign the largest groups first to the smallest partition
+        for group in sorted(self.groups(), key=len, reverse=True):
+            min(partitions, key=len).extend(group)
+        return [sorted(partition) for partition in partitions if partition]
@@ -0,0 +1,159 @@
+import pickle  # nosec
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from enum import Enum
+from typing import Dict, List, Optional, Tuple
+
+from compiler.error.communicator import Diagnostics, ErrorRaiser, error_position
+from compiler.tree.tree import Node, PolymorphicTypeNode, SPLNode
+from compiler.typer.cache import CacheEntry, TypeCache
+from compiler.util import SourceFile
+
+# The result of typing a partition of the declarations: The typed declarations,
+# the errors, the new cache entries and the number of cache hits and misses
+PartitionResult = Tuple[List[Node], Diagnostics, Dict[str, CacheEntry], int, int]
+
+
+def type_partition(
+    program: SourceFile,
+    tree: SPLNode,
+    cache: Optional[TypeCache],
+    first_id: Optional[int],
+) -> PartitionResult:
+    """Type the declarations in `tree`, without communicating the errors.
+
+    Args:
+        program (SourceFile): The program, for error messages.
+        tree (SPLNode): An SPLNode containing a partition of the declarations of the program.
+        cache (Optional[TypeCache]): The cache of function types, if any.
+        first_id (Optional[int]): The id for the first fresh PolymorphicTypeNode, used when
+            typing in a separate process. None when typing in the current process.
+
+    Returns:
+        PartitionResult: The typed declarations, errors, new cache entries, and cache statistics.
+    """
+    # Prevent circular import
+    from compiler.typer.typer import Typer
+
+    if first_id is not None:
+        PolymorphicTypeNode.next_id = first_id
+
+    # Collect all errors of this partition separately, to add them to the ErrorRaiser later
+    outer_errors = ErrorRaiser.ERRORS
+    ErrorRaiser.ERRORS = errors = Diagnostics(limit=None, key=error_position)
+    typer = Typer(program, cache)
+    try:
+        typer.type_sequential(tree)
+    finally:
+        ErrorRaiser.ERRORS = outer_errors
+
+    if cache is None:
+        return tree.body, errors, {}, 0, 0
+    return tree.body, errors, typer.cache_entries, cache.hits, cache.misses
+
+
+def renumber(value: object, first_id: int) -> None:
+    """Replace the ids of the PolymorphicTypeNodes created in another process by fresh ids,
+    such that they do not clash with ids of this process. Nodes that are shared keep sharing
+    the same id.
+
+    Args:
+        value (object): The (unpickled) result from another process.
+        first_id (int): The first id that was used by the other process. Polymorphic types with
+            a lower id were created before, e.g. by the Parser, and are not renumbered.
+    """
+    ids = {}
+    seen = set()
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+
+        match value:
+            case str() | int() | bool() | Enum() | None:
+                continue
+            case PolymorphicTypeNode():
+                if value.id >= first_id:
+                    if value.id not in ids:
+                        ids[value.id] = PolymorphicTypeNode.fresh().id
+                    value.id = ids[value.id]
+                stack += attributes(value)
+            case list() | tuple():
+                stack += value
+            case dict():
+                stack += value.values()
+            case _:
+                stack += attributes(value)
+
+
+def attributes(value: object) -> List[object]:
+    """Get the attribute values of `value`, both from slots and from its `__dict__`."""
+    values = list(getattr(value, "__dict__", {}).values())
+    for cls in type(value).__mro__:
+        for name in getattr(cls, "__slots__", ()):
+            if hasattr(value, name):
+                values.append(getattr(value, name))
+    return values
+
+
+def type_in_parallel(
+    program: SourceFile,
+    tree: SPLNode,
+    partitions: List[List[int]],
+    cache: Optional[TypeCache],
+) -> Dict[str, CacheEntry]:
+    """Type the partitions of the declarations of `tree` concurrently in a process pool, and
+    place the typed declarations back into `tree`.
+
+    The errors are added to the ErrorRaiser in the order of the partitions, regardless of the
+    order in which the processes finish.
+
+    Args:
+        program (SourceFile): The program, for error messages.
+        tree (SPLNode): The complete program tree.
+        partitions (List[List[int]]): Independent partitions of the declaration indices, e.g.
+            from `CallGraph(tree).partition(n)`.
+        cache (Optional[TypeCache]): The cache of function types, if any.
+
+    Returns:
+        Dict[str, CacheEntry]: The new cache entries, to commit if typing succeeds.
+    """
+    first_id = PolymorphicTypeNode.next_id
+    cache_entries = {}
+
+    def sub_tree(partition: List[int]) -> SPLNode:
+        return SPLNode([tree.body[i] for i in partition], span=tree.span)
+
+    def sub_cache() -> Optional[TypeCache]:
+        # A separate instance to count the hits and misses, sharing the entries
+        return None if cache is None else TypeCache(cache.entries)
+
+    with ProcessPoolExecutor(max_workers=len(partitions)) as executor:
+        futures = [
+            executor.submit(
+                type_partition, program, sub_tree(partition), sub_cache(), first_id
+            )
+            for partition in partitions
+        ]
+
+        for partition, future in zip(partitions, futures):
+            try:
+                result = future.result()
+                renumber(result, first_id)
+            except (RecursionError, pickle.PicklingError, BrokenProcessPool):
+                # E.g. if the tree is too deeply nested to be sent to another process,
+                # then type this partition in the current process instead
+                result = type_partition(program, sub_tree(partition), sub_cache(), None)
+
+            body, errors, entries, hits, misses = result
+            for i, node in zip(partition, body):
+                tree.body[i] = node
+            ErrorRaiser.ERRORS.extend(errors)
+            cache_entries.update(entries)
+            if cache is not None:
+                cache.hits += hits
+                cache.misses += misses
+
+    return cache_entries
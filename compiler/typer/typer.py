@@ -1,13 +1,17 @@
 import copy
 from collections import defaultdict
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
+from compiler.built_in import BUILT_IN_FUNCTIONS
 from compiler.error.communicator import Communicator
 from compiler.error.error import UnrecoverableError
 from compiler.token import Token
 from compiler.tree.visitor import NodeTransformer
+from compiler.typer.cache import TypeCache
+from compiler.typer.call_graph import CallGraph
+from compiler.typer.parallel import type_in_parallel
 from compiler.type import Type
-from compiler.util import Span
+from compiler.util import SourceFile, Span
 
 from compiler.error.typer_error import (  # isort:skip
     BinaryUnifyErrorFactory,
@@ -22,6 +26,7 @@ from compiler.error.typer_error import (  # isort:skip
     RedefinitionOfLoopVariableError,
     RedefinitionOfVariableError,
     TyperException,
+    StringUnifyErrorFactory,
     UnaryUnifyErrorFactory,
     UnificationError,
     UsageOfUndefinedFunctionError,
@@ -61,6 +66,7 @@ from compiler.tree.tree import (  # isort:skip
     SPLNode,
     StmtAssNode,
     StmtNode,
+    StringLiteralNode,
     TupleNode,
     TypeNode,
     VarDeclNode,
@@ -71,52 +77,71 @@ from compiler.tree.tree import (  # isort:skip
 
 
 class Typer:
-    def __init__(self, program: str) -> None:
-        self.program = program
+    def __init__(
+        self,
+        program: str | SourceFile,
+        cache: Optional[TypeCache] = None,
+        workers: int = 1,
+    ) -> None:
+        self.program = SourceFile.of(program)
+        # The maximum number of processes to type independent groups of declarations with
+        self.workers = workers
         self.i = 0
         self.fun_calls = defaultdict(list)
         # Keeps track of the current function that is checked
         self.current_function = None
 
+        # Optional cache of function types from previous compilations, and the
+        # new entries, which are only added to the cache if typing succeeds
+        self.cache = cache
+        self.cache_entries = {}
+
         # Create an instance of our transformation application transformer to use in self.apply_trans
         self.sub_transformer = SubstitutionTransformer()
 
-    def type(self, tree: Node) -> Node:
+    def type(self, tree: Node, call_graph: Optional[CallGraph] = None) -> Node:
         """Add type information to the parsed AST from `Parser(program).parse(tokens)`.
 
-        Uses the M-algorithm behind the scenes.
+        Uses the M-algorithm behind the scenes. If `workers` is larger than 1, then groups of
+        declarations that do not depend on each other are typed concurrently.
 
         Args:
             tree (Node): The input AST (potentially) without type information.
+            call_graph (Optional[CallGraph], optional): The CallGraph of `tree`, if it has been
+                computed already. Defaults to None.
 
         Returns:
             Node: The output AST with type information applied.
         """
+        partitions = []
+        if self.workers > 1 and isinstance(tree, SPLNode):
+            partitions = (call_graph or CallGraph(tree)).partition(self.workers)
+
+        if len(partitions) > 1:
+            self.cache_entries = type_in_parallel(
+                self.program, tree, partitions, self.cache
+            )
+        else:
+            self.type_sequential(tree)
+
+        Communicator.communicate(TyperException)
+
+        if self.cache is not None:
+            self.cache.commit(self.cache_entries)
+        return tree
+
+    def type_sequential(self, tree: Node) -> None:
+        """Add type information to `tree` in the current process, without communicating errors.
+
+        Args:
+            tree (Node): The input AST (potentially) without type information.
+        """
         # Store variables and functions in a context as a mapping of variable/function names
         # to the TypeNodes
         var_context = {}
         fun_context = {
-            "print": FunTypeNode(
-                [PolymorphicTypeNode.fresh()],
-                VoidTypeNode(),
-            ),
-            "println": FunTypeNode(
-                [PolymorphicTypeNode.fresh()],
-                VoidTypeNode(),
-            ),
-            "isEmpty": FunTypeNode(
-                [ListNode(PolymorphicTypeNode.fresh())], BoolTypeNode()
-            ),
-            "get_Int": FunTypeNode([], IntTypeNode()),
-            "get_Chr": FunTypeNode([], CharTypeNode()),
-            "get_Str": FunTypeNode([], ListNode(CharTypeNode())),
-            "exit": FunTypeNode([], ListNode(VoidTypeNode())),
-            "length": FunTypeNode(
-                [ListNode(PolymorphicTypeNode.fresh())], IntTypeNode()
-            ),
-            "ord": FunTypeNode([CharTypeNode()], IntTypeNode()),
-            "chr": FunTypeNode([IntTypeNode()], CharTypeNode()),
-            "bool": FunTypeNode([PolymorphicTypeNode.fresh()], BoolTypeNode()),
+            name: built_in.instantiate()
+            for name, built_in in BUILT_IN_FUNCTIONS.items()
         }
         # Apply the recursive `type_node` function.
         trans = self.type_node(
@@ -136,9 +161,6 @@ class Typer:
                 fun_call_node = fun_call[0]
                 UsageOfUndefinedFunctionError(self.program, fun_call_node)
 
-        Communicator.communicate(TyperException)
-        return tree
-
     def type_node(
         self,
         tree: Node,
@@ -158,7 +180,9 @@ class Typer:
                 that are caused very deep in the tree to use information from a bit higher
                 in the tree. For example, if there is an error in an Op2Node (i.e. an expression),
                 then we can throw the exception with information that the expression occurs in the
-                condition of an if-statement, in a specific function.
+                condition of an if-statement, in a specific function. Generally an error frame,
+                i.e. a tuple of a UnificationError subclass and its arguments, which is only
+                materialized into an error factory if unification fails.
 
         Returns:
             Node: A transformation, i.e. a list of tuples that represent mappings from very general
@@ -228,83 +252,35 @@ class Typer:
                 else:
                     original_tree_type = None
 
-                original_context = var_context.copy()
-
                 if tree.id.text in fun_context:
                     FunctionRedefinitionError(self.program, tree)
                     return []
 
-                # Add the function arguments to the variable context,
-                # and ensure no duplicate argument names (e.g. func(a, a) {...})
-                fresh_types = []
-                args = set()
-                if tree.args:
-                    for token in tree.args.items:
-                        if token.text in args:
-                            DuplicateArgumentsDeclError(self.program, token, tree)
-                            return []
-
-                        fresh = PolymorphicTypeNode.fresh()
-                        var_context[token.text] = fresh
-                        fresh_types.append(fresh)
-                        args.add(token.text)
-
-                # Add the function type to the function context
-                ret_type = PolymorphicTypeNode.fresh()
-                fun_context[tree.id.text] = FunTypeNode(
-                    fresh_types,
-                    ret_type,
-                    span=Span(tree.id.span.start_ln, (-1, -1))
-                    if tree.type == None
-                    else tree.type.span,
-                )
-
-                # Iterate over the variable declarations and type them
-                transformations = []
-                for var_decl in tree.var_decl:
-                    trans = self.type_node(
-                        var_decl,
-                        var_context,
-                        fun_context,
-                        PolymorphicTypeNode.fresh(),
-                        error_factory,
+                # Reuse the typing of this function from a previous compilation, if possible
+                cache_key = None
+                cache_entry = None
+                if self.cache is not None:
+                    cache_key = self.cache.key(tree, var_context, fun_context, exp_type)
+                    if cache_key:
+                        cache_entry = self.cache.get(cache_key)
+
+                if cache_entry:
+                    inferred_type, transformations = self.cache.restore(
+                        cache_key, cache_entry
                     )
-                    var_context = self.apply_trans_context(trans, var_context)
-                    fun_context = self.apply_trans_context(trans, fun_context)
-                    transformations += trans
-
-                # Iterate over the statements and type them
-                for stmt in tree.stmt:
-                    trans = self.type_node(
-                        stmt,
-                        var_context,
-                        fun_context,
-                        fun_context[tree.id.text].ret_type,
-                        error_factory,
-                    )
-                    var_context = self.apply_trans_context(trans, var_context)
-                    fun_context = self.apply_trans_context(trans, fun_context)
-                    transformations += trans
-
-                # Unify the inferred function type with the expected type
-                inferred_type = fun_context[tree.id.text]
-                transformations += self.unify(exp_type, inferred_type, error_factory)
-
-                # Compare the inferred type with the developer-supplied type, if any (type checking)
-                if tree.type:
-                    # If we crash here, we know that the inferred type does not equal the type as provided by the programmer
-                    transformations += self.unify(
-                        tree.type,
-                        inferred_type,
-                        FunctionSignatureTypeError(tree, inferred_type),
+                    fun_context[tree.id.text] = inferred_type
+                else:
+                    typed = self.type_fun_decl(
+                        tree, var_context, fun_context, exp_type, error_factory
                     )
+                    if typed is None:
+                        return []
+                    inferred_type, transformations = typed
 
-                # Reset function arguments
-                for token in list(var_context.keys()):
-                    if token in original_context:
-                        var_context[token] = original_context[token]
-                    elif token != tree.id.text:
-                        del var_context[token]
+                    if cache_key:
+                        self.cache_entries[cache_key.digest] = self.cache.put(
+                            cache_key, inferred_type, transformations
+                        )
 
                 # If this function was previously called, then type the function call now
                 if tree.id.text in self.fun_calls:
@@ -376,7 +352,7 @@ class Typer:
                         var_context,
                         fun_context,
                         exp_type,
-                        ReturnUnifyErrorFactory(tree),
+                        (ReturnUnifyErrorFactory, tree),
                     )
 
                     # We cannot return a variable of type Void
@@ -389,7 +365,7 @@ class Typer:
                 trans = self.unify(
                     exp_type,
                     VoidTypeNode(span=tree.span),
-                    ReturnUnifyErrorFactory(tree),
+                    (ReturnUnifyErrorFactory, tree),
                 )
                 return trans
 
@@ -420,7 +396,7 @@ class Typer:
                 trans += self.unify(
                     self.apply_trans(expr_exp_type, trans),
                     self.apply_trans(assignment_exp_type, trans),
-                    VariableAssignmentUnifyErrorFactory(tree),
+                    (VariableAssignmentUnifyErrorFactory, tree),
                 )
 
                 return trans
@@ -478,6 +454,23 @@ class Typer:
                     error_factory,
                 )
 
+            case StringLiteralNode():
+                """
+                A string is a list of characters, regardless of its length.
+                """
+                return self.unify(
+                    exp_type,
+                    ListNode(CharTypeNode(span=tree.span), span=tree.span),
+                    (StringUnifyErrorFactory, tree),
+                )
+
+            case Op2Node(operator=Token(type=Type.COLON)):
+                """
+                A chain of `:` operators, e.g. `1 : 2 : []`, is nested to the right. Such a chain
+                can be very long, so it is typed iteratively rather than recursing once per element.
+                """
+                return self.type_colon_chain(tree, var_context, fun_context, exp_type)
+
             case Op2Node():
                 """
                 Depending on the operator used, set the expected type for left, right and the output.
@@ -486,11 +479,6 @@ class Typer:
                 that neither are Void, and unify the output type too.
                 """
                 match tree.operator.type:
-                    case Type.COLON:
-                        left_exp_type = PolymorphicTypeNode.fresh()
-                        right_exp_type = ListNode(left_exp_type, span=tree.right.span)
-                        output_exp_type = right_exp_type
-
                     case (
                         Type.PLUS | Type.MINUS | Type.STAR | Type.SLASH | Type.PERCENT
                     ):
@@ -522,7 +510,7 @@ class Typer:
                     var_context,
                     fun_context,
                     left_exp_type,
-                    BinaryUnifyErrorFactory(tree),
+                    (BinaryUnifyErrorFactory, tree),
                 )
                 var_context = self.apply_trans_context(trans, var_context)
                 fun_context = self.apply_trans_context(trans, fun_context)
@@ -531,7 +519,7 @@ class Typer:
                     var_context,
                     fun_context,
                     self.apply_trans(right_exp_type, trans),
-                    BinaryUnifyErrorFactory(tree),
+                    (BinaryUnifyErrorFactory, tree),
                 )
 
                 # Void cannot be used in a binary operation
@@ -542,7 +530,7 @@ class Typer:
                 trans += self.unify(
                     self.apply_trans(exp_type, trans),
                     self.apply_trans(output_exp_type, trans),
-                    BinaryUnifyErrorFactory(tree),
+                    (BinaryUnifyErrorFactory, tree),
                 )
                 return trans
 
@@ -564,7 +552,7 @@ class Typer:
                     var_context,
                     fun_context,
                     operand_exp_type,
-                    UnaryUnifyErrorFactory(tree),
+                    (UnaryUnifyErrorFactory, tree),
                 )
                 var_context = self.apply_trans_context(trans, var_context)
                 fun_context = self.apply_trans_context(trans, fun_context)
@@ -575,7 +563,7 @@ class Typer:
                 trans += self.unify(
                     self.apply_trans(exp_type, trans),
                     self.apply_trans(output_exp_type, trans),
-                    UnaryUnifyErrorFactory(tree),
+                    (UnaryUnifyErrorFactory, tree),
                 )
                 return trans
 
@@ -606,7 +594,7 @@ class Typer:
                     var_context,
                     fun_context,
                     expr_exp_type,
-                    VariableDeclarationUnifyErrorFactory(tree),
+                    (VariableDeclarationUnifyErrorFactory, tree),
                 )
 
                 # We cannot make an assignment of type void
@@ -670,7 +658,7 @@ class Typer:
                     trans_context,
                     original_fun_context,
                     BoolTypeNode(span=condition.span),
-                    IfConditionUnifyErrorFactory(tree),
+                    (IfConditionUnifyErrorFactory, tree),
                 )
                 return transformation_then + transformation_else + trans_condition
 
@@ -755,7 +743,7 @@ class Typer:
                     original_var_context,
                     original_fun_context,
                     BoolTypeNode(span=condition.span),
-                    WhileConditionUnifyErrorFactory(tree),
+                    (WhileConditionUnifyErrorFactory, tree),
                 )
 
                 return trans_condition
@@ -805,7 +793,7 @@ class Typer:
                             trans = self.unify(
                                 decl_arg_type,
                                 call_arg_type,
-                                FunCallUnifyErrorFactory(tree),
+                                (FunCallUnifyErrorFactory, tree),
                                 left_to_right=True,
                             )
 
@@ -875,7 +863,7 @@ class Typer:
                             sub = self.unify(
                                 var_exp_type,
                                 variable_type,
-                                FieldUnifyErrorFactory(tree),
+                                (FieldUnifyErrorFactory, tree),
                             )
                             var_context = self.apply_trans_context(sub, var_context)
                             fun_context = self.apply_trans_context(sub, fun_context)
@@ -891,7 +879,7 @@ class Typer:
                             sub = self.unify(
                                 var_exp_type,
                                 variable_type,
-                                FieldUnifyErrorFactory(tree),
+                                (FieldUnifyErrorFactory, tree),
                             )
                             var_context = self.apply_trans_context(sub, var_context)
                             fun_context = self.apply_trans_context(sub, fun_context)
@@ -905,7 +893,7 @@ class Typer:
                                     var_context,
                                     fun_context,
                                     IntTypeNode(),
-                                    IndexTypeError(field),
+                                    (IndexTypeError, field),
                                 )
                             else:
                                 picked = (
@@ -934,7 +922,7 @@ class Typer:
                     var_context,
                     fun_context,
                     sub_exp_type,
-                    ListAbbrError(tree.left, is_left=True),
+                    (ListAbbrError, tree.left, True),
                 )
                 var_context = self.apply_trans_context(trans, var_context)
                 fun_context = self.apply_trans_context(trans, fun_context)
@@ -954,7 +942,7 @@ class Typer:
                     var_context,
                     fun_context,
                     sub_exp_type,
-                    ListAbbrError(tree.right, is_left=False),
+                    (ListAbbrError, tree.right, False),
                 )
 
                 trans += self.unify(exp_type, ListNode(sub_exp_type), error_factory)
@@ -963,6 +951,240 @@ class Typer:
 
         UnrecoverableError(f"Node had no handler: {tree!r}")
 
+    def type_fun_decl(
+        self,
+        tree: FunDeclNode,
+        var_context: Dict[str, TypeNode],
+        fun_context: Dict[str, TypeNode],
+        exp_type: TypeNode,
+        error_factory: UnificationError,
+    ) -> Optional[Tuple[FunTypeNode, List[Tuple[PolymorphicTypeNode, TypeNode]]]]:
+        """Type the arguments and body of a function declaration, and place its type in `fun_context`.
+
+        Args:
+            tree (FunDeclNode): The function declaration to type.
+            var_context (Dict[str, TypeNode]): The variables defined in this context.
+            fun_context (Dict[str, TypeNode]): The functions defined.
+            exp_type (TypeNode): The expected type for `tree`.
+            error_factory (UnificationError): The error factory for unifications without a more
+                specific error factory.
+
+        Returns:
+            Optional[Tuple[FunTypeNode, List[Tuple[PolymorphicTypeNode, TypeNode]]]]: The inferred
+                function type and the transformations, or None if the arguments are invalid.
+        """
+        original_context = var_context.copy()
+
+        # Add the function arguments to the variable context,
+        # and ensure no duplicate argument names (e.g. func(a, a) {...})
+        fresh_types = []
+        args = set()
+        if tree.args:
+            for token in tree.args.items:
+                if token.text in args:
+                    DuplicateArgumentsDeclError(self.program, token, tree)
+                    return None
+
+                fresh = PolymorphicTypeNode.fresh()
+                var_context[token.text] = fresh
+                fresh_types.append(fresh)
+                args.add(token.text)
+
+        # Add the function type to the function context
+        ret_type = PolymorphicTypeNode.fresh()
+        fun_context[tree.id.text] = FunTypeNode(
+            fresh_types,
+            ret_type,
+            span=Span(tree.id.span.start_ln, (-1, -1))
+            if tree.type == None
+            else tree.type.span,
+        )
+
+        # Iterate over the variable declarations and type them
+        transformations = []
+        for var_decl in tree.var_decl:
+            trans = self.type_node(
+                var_decl,
+                var_context,
+                fun_context,
+                PolymorphicTypeNode.fresh(),
+                error_factory,
+            )
+            var_context = self.apply_trans_context(trans, var_context)
+            fun_context = self.apply_trans_context(trans, fun_context)
+            transformations += trans
+
+        # Iterate over the statements and type them
+        for stmt in tree.stmt:
+            trans = self.type_node(
+                stmt,
+                var_context,
+                fun_context,
+                fun_context[tree.id.text].ret_type,
+                error_factory,
+            )
+            var_context = self.apply_trans_context(trans, var_context)
+            fun_context = self.apply_trans_context(trans, fun_context)
+            transformations += trans
+
+        # Unify the inferred function type with the expected type
+        inferred_type = fun_context[tree.id.text]
+        transformations += self.unify(exp_type, inferred_type, error_factory)
+
+        # Compare the inferred type with the developer-supplied type, if any (type checking)
+        if tree.type:
+            # If we crash here, we know that the inferred type does not equal the type as provided by the programmer
+            transformations += self.unify(
+                tree.type,
+                inferred_type,
+                (FunctionSignatureTypeError, tree, inferred_type),
+            )
+
+        # Reset function arguments
+        for token in list(var_context.keys()):
+            if token in original_context:
+                var_context[token] = original_context[token]
+            elif token != tree.id.text:
+                del var_context[token]
+
+        return inferred_type, transformations
+
+    def type_colon_chain(
+        self,
+        tree: Op2Node,
+        var_context: Dict[str, TypeNode],
+        fun_context: Dict[str, TypeNode],
+        exp_type: TypeNode,
+    ) -> List[Tuple[PolymorphicTypeNode, TypeNode]]:
+        """Type a right-nested chain of `:` operators, e.g. `1 : 2 : 3 : []`, without recursion.
+
+        This performs the same steps as typing each `:` as a separate binary operation: First the
+        left-hand sides are typed from the outside inwards, then the tail of the chain, and then
+        the output types are unified from the inside outwards, each with their own error factory.
+        The transformations are produced in the same order as with the recursive approach.
+
+        Args:
+            tree (Op2Node): The outermost `:` of the chain.
+            var_context (Dict[str, TypeNode]): The variables defined in this context.
+            fun_context (Dict[str, TypeNode]): The functions defined.
+            exp_type (TypeNode): The expected type for `tree`.
+
+        Returns:
+            List[Tuple[PolymorphicTypeNode, TypeNode]]: The transformations for the whole chain.
+        """
+        chain = []
+        while isinstance(tree, Op2Node) and tree.operator.type == Type.COLON:
+            chain.append(tree)
+            tree = tree.right
+        tail = tree
+
+        transformations = []
+        # The index in `transformations` at which the transformations of each `:` start
+        starts = []
+        element_types = []
+        # The expected type of every `:`, i.e. `exp_type` for the outermost one,
+        # and a list of the element type of the preceding `:` for the others
+        exp_types = [exp_type]
+        for op in chain:
+            starts.append(len(transformations))
+            element_type = PolymorphicTypeNode.fresh()
+            element_types.append(element_type)
+
+            trans = self.type_node(
+                op.left,
+                var_context,
+                fun_context,
+                element_type,
+                (BinaryUnifyErrorFactory, op),
+            )
+            var_context = self.apply_trans_context(trans, var_context)
+            fun_context = self.apply_trans_context(trans, fun_context)
+            transformations += trans
+            exp_types.append(
+                self.apply_trans(ListNode(element_type, span=op.right.span), trans)
+            )
+
+        tail_start = len(transformations)
+        transformations += self.type_node(
+            tail,
+            var_context,
+            fun_context,
+            exp_types[-1],
+            (BinaryUnifyErrorFactory, chain[-1]),
+        )
+
+        # Transformations from `checked` onwards have not been verified to be free of Void yet
+        checked = tail_start
+        for i in reversed(range(len(chain))):
+            op = chain[i]
+            start = starts[i]
+            left_end = starts[i + 1] if i + 1 < len(chain) else tail_start
+
+            # Void cannot be used in a binary operation
+            unchecked = transformations[start:left_end] + transformations[checked:]
+            if any(VoidTypeNode() in x[1] for x in unchecked):
+                VoidOp2Error(self.program, op)
+                del transformations[start:]
+                checked = start
+                continue
+
+            checked = len(transformations)
+            transformations += self.unify(
+                self.apply_trans_chain(exp_types[i], transformations, start, left_end),
+                self.apply_trans_chain(
+                    ListNode(element_types[i], span=op.right.span),
+                    transformations,
+                    start,
+                    left_end,
+                ),
+                (BinaryUnifyErrorFactory, op),
+            )
+        return transformations
+
+    def apply_trans_chain(
+        self,
+        node: Node,
+        trans: List[Tuple[PolymorphicTypeNode, TypeNode]],
+        start: int,
+        split: int,
+    ) -> Node:
+        """Apply `trans[start:]` on `node`, in two steps split at `split`.
+
+        Transformations only replace PolymorphicTypeNode instances, so once `node` no longer
+        contains any after applying `trans[start:split]`, the remainder can be skipped.
+        This keeps typing long `:` chains linear rather than quadratic.
+
+        Args:
+            node (Node): The Node on which to apply the type transformations.
+            trans (List[Tuple[PolymorphicTypeNode, TypeNode]]): A list of transformations.
+            start (int): The index of the first transformation to apply.
+            split (int): The index at which to check whether the remainder is still required.
+
+        Returns:
+            Node: `node`, but with the transformations applied.
+        """
+        node = self.apply_trans(node, trans[start:split])
+        if self.is_polymorphic(node):
+            node = self.apply_trans(node, trans[split:])
+        return node
+
+    @staticmethod
+    def is_polymorphic(node: Node) -> bool:
+        """Return whether `node` is or contains a PolymorphicTypeNode."""
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            match node:
+                case PolymorphicTypeNode():
+                    return True
+                case ListNode():
+                    stack.append(node.body)
+                case TupleNode():
+                    stack += [node.left, node.right]
+                case FunTypeNode():
+                    stack += [*node.types, node.ret_type]
+        return False
+
     def apply_trans(
         self, node: Node, trans: List[Tuple[PolymorphicTypeNode, TypeNode]]
     ) -> Node:
@@ -1015,7 +1237,8 @@ class Typer:
             type_one (TypeNode): The left type. This is generally the expected/desired type.
             type_two (TypeNode): The right type.
             error_factory (UnificationError): A factory with a `build` method that can be called to
-                throw an exception, when the two types cannot unify.
+                throw an exception, when the two types cannot unify. May also be an error frame,
+                see `UnificationError.materialize`.
             left_to_right (bool, optional): If set to True, then the return type becomes
                 List[Tuple[PolymorphicTypeNode, TypeNode, bool]]. The last bool is True whenever
                 we are now updating `type_one` to `type_two` and False otherwise, but only if both
@@ -1107,12 +1330,8 @@ class Typer:
             transformations += trans
             return transformations
 
-        # If no (correct) error_factory was provided, then just use a default one that simply
-        # states that the two types cannot unify.
-        if not isinstance(error_factory, UnificationError):
-            error_factory = DefaultUnifyErrorFactory()
-
         # Use the error factory to produce a detailed and relevant error.
+        error_factory = UnificationError.materialize(error_factory)
         error_factory.build(
             type_one=type_one,
             type_two=type_two,
@@ -1125,6 +1344,21 @@ class Typer:
 class SubstitutionTransformer(NodeTransformer):
     """Apply a transformation on a tree using a visitor pattern"""
 
+    def visit_Op2Node(
+        self,
+        node: Op2Node,
+        trans: List[Tuple[PolymorphicTypeNode, TypeNode]],
+    ) -> Node:
+        # Walk down the right side of (potentially very long) chains of binary operations,
+        # e.g. long lists, iteratively rather than recursively.
+        current = node
+        while True:
+            current.left = self.visit(current.left, trans)
+            if not isinstance(current.right, Op2Node):
+                current.right = self.visit(current.right, trans)
+                return node
+            current = current.right
+
     def visit_PolymorphicTypeNode(
         self,
         node: PolymorphicTypeNode,
@@ -1,31 +1,27 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Tuple
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
 
 from compiler.type import Type
 
 
-@dataclass
+@dataclass(slots=True)
 class Span:
-    ln: Tuple[int, int]
-    col: Tuple[int, int]
+    # Packed as four integers, rather than two tuples
+    start_ln: int
+    end_ln: int
+    start_col: int
+    end_col: int
 
     @property
-    def start_ln(self) -> int:
-        return self.ln[0]
+    def ln(self) -> Tuple[int, int]:
+        return (self.start_ln, self.end_ln)
 
     @property
-    def end_ln(self) -> int:
-        return self.ln[1]
-
-    @property
-    def start_col(self) -> int:
-        return self.col[0]
-
-    @property
-    def end_col(self) -> int:
-        return self.col[1]
+    def col(self) -> Tuple[int, int]:
+        return (self.start_col, self.end_col)
 
     @property
     def multiline(self) -> bool:
@@ -43,10 +39,10 @@ class Span:
 
     def __init__(self, line_no: int | Tuple[int, int], span: Tuple[int, int]) -> None:
         if isinstance(line_no, int):
-            self.ln = (line_no, line_no)
+            self.start_ln = self.end_ln = line_no
         else:
-            self.ln = line_no
-        self.col = span
+            self.start_ln, self.end_ln = line_no
+        self.start_col, self.end_col = span
 
     def __and__(self, other: Span) -> Span:
         # Determine the correct columns based on the starting line
@@ -69,6 +65,69 @@ class Span:
         )
 
 
+@dataclass(slots=True)
+class SourceFile:
+    """
+    The source code of a program, shared by all stages of a compilation and by the errors and
+    warnings that they create. Lines are indexed by their offsets on first use, such that
+    diagnostics only slice out the lines that they show, instead of splitting the program.
+    """
+
+    text: str
+    # The start and end offsets of every line, excluding the line breaks
+    _starts: Optional[List[int]] = field(default=None, compare=False, repr=False)
+    _ends: Optional[List[int]] = field(default=None, compare=False, repr=False)
+
+    # The line boundaries recognized by `str.splitlines`
+    LINE_BREAK = re.compile(r"\r\n|[\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]")
+
+    @classmethod
+    def of(cls, program: str | SourceFile) -> SourceFile:
+        if isinstance(program, SourceFile):
+            return program
+        return cls(program)
+
+    def index(self) -> None:
+        starts = []
+        ends = []
+        start = 0
+        for match in SourceFile.LINE_BREAK.finditer(self.text):
+            starts.append(start)
+            ends.append(match.start())
+            start = match.end()
+        # The final line, unless the program ends with a line break
+        if start < len(self.text):
+            starts.append(start)
+            ends.append(len(self.text))
+        self._starts = starts
+        self._ends = ends
+
+    def line(self, line_no: int) -> str:
+        """Get line `line_no`, starting from 1, like `text.splitlines()[line_no - 1]`."""
+        if self._starts is None:
+            self.index()
+        return self.text[self._starts[line_no - 1] : self._ends[line_no - 1]]
+
+    def lines(self, start_ln: int, end_ln: int) -> List[str]:
+        """Get the lines `start_ln` up to and including `end_ln`, starting from 1.
+        Lines outside of the program are omitted."""
+        if self._starts is None:
+            self.index()
+        return [
+            self.text[self._starts[i] : self._ends[i]]
+            for i in range(max(start_ln, 1) - 1, min(end_ln, len(self._starts)))
+        ]
+
+    def __len__(self) -> int:
+        if self._starts is None:
+            self.index()
+        return len(self._starts)
+
+    def __reduce__(self):
+        # The index is not sent to other processes, as it can be recomputed cheaply
+        return SourceFile, (self.text,)
+
+
 # This only considers binary operators
 operator_precedence = {
     Type.OR: 15,
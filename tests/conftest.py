@@ -5,6 +5,7 @@ from typing import List
 
 import pytest
 
+from compiler.generation.std_lib import ListLayout
 from tests.test_util import open_file
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -65,3 +66,8 @@ def valid_typed_file(request) -> str:
 @pytest.fixture(scope="session", params=parser_error_files())
 def parser_error(request) -> str:
     return request.param
+
+
+@pytest.fixture(scope="session", params=[layout.value for layout in ListLayout])
+def lists(request) -> str:
+    return request.param
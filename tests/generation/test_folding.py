@@ -0,0 +1,92 @@
+from compiler.generation.folding import ConstantFolder
+from compiler.generation.generator import Generator
+from compiler.parser.parser import Parser
+from compiler.scanner.scanner import Scanner
+from compiler.tree.tree import ListAbbrNode
+from compiler.typer.typer import Typer
+
+
+def typed_tree(program):
+    tree = Parser(program).parse(Scanner(program).scan())
+    Typer(program).type(tree)
+    return tree
+
+
+def test_fold():
+    program = """
+    main() {
+        var a = 1 + 2 * 3;
+        var b = a * 2;
+        var c = 0;
+        var z = 0;
+        var d = [1..3];
+        var e = ['a'..'c'];
+        var f = [1..100];
+        Bool g = !True || 'a' == 'a';
+        var h = 1 / z;
+        c = b - 1;
+        return;
+    }
+    """
+    tree = typed_tree(program)
+    folder = ConstantFolder()
+    folder.fold(tree)
+    var_decls = {str(var_decl.id): var_decl.exp for var_decl in tree.body[0].var_decl}
+
+    assert str(var_decls["a"]) == "7"
+    assert str(var_decls["b"]) == "14"
+    assert str(var_decls["d"]) == "1:2:3:[]"
+    assert str(var_decls["e"]) == "'a':'b':'c':[]"
+    # Long lists are still computed at runtime
+    assert isinstance(var_decls["f"], ListAbbrNode)
+    assert str(var_decls["g"]) == "True"
+    # Divisions by zero are left to fail at runtime
+    assert str(var_decls["h"]) == "1 / 0"
+    # `c` is assigned to, so it is not replaced, but `b` is
+    assert str(tree.body[0].stmt[0]) == "c = 13;"
+    assert folder.folded == 12
+
+
+def test_loop_ranges():
+    """Ensure that ranges that are looped over are not written out, as they are counted."""
+    program = """
+    main() {
+        var n = 3;
+        for i in [n..n + 2] {
+            println(i);
+        }
+        return;
+    }
+    """
+    tree = typed_tree(program)
+    ConstantFolder().fold(tree)
+    loop = tree.body[0].stmt[0].stmt.loop
+    assert isinstance(loop, ListAbbrNode)
+    assert (str(loop.left), str(loop.right)) == ("3", "5")
+
+
+def test_folded_program():
+    """Ensure that folded expressions have the same values as they have in SSM."""
+    program = """
+    main() {
+        var big = 2147483647;
+        var small = -2147483647 - 1;
+        println(-7 / 2 : -7 % 2 : 7 % -2 : 7 / -2 : []);
+        println(big + 1 : small - 1 : big * big : small / -1 : small % -1 : -small : []);
+        println(('\\n' == '\\n') : (1 < 2) : (2 >= 3) : (True && !False) : []);
+        println([3..1] : [2..2] : []);
+        println(['x'..'z']);
+    }
+    """
+    plain = Generator(program)
+    folded = Generator(program)
+    plain_code = plain.generate(typed_tree(program))
+    tree = typed_tree(program)
+    folder = ConstantFolder()
+    folder.fold(tree)
+    folded_code = folded.generate(tree)
+
+    assert folder.folded > 0
+    assert folder.changed == tree.body
+    assert len(folded_code.splitlines()) < len(plain_code.splitlines())
+    assert folded.run(folded_code) == plain.run(plain_code)
@@ -0,0 +1,108 @@
+from compiler.generation.generator import Generator
+from compiler.generation.inliner import Inliner
+from compiler.generation.instruction import Instruction
+from compiler.generation.line import Line
+from compiler.parser.parser import Parser
+from compiler.scanner.scanner import Scanner
+from compiler.typer.typer import Typer
+
+
+def instructions(lines):
+    return [(line.label, *line.instruction) for line in lines]
+
+
+def test_inline():
+    lines = [
+        Line(Instruction.LDC, 3, label="main"),
+        Line(Instruction.LDC, 4),
+        Line(Instruction.BSR, "add"),
+        Line(Instruction.AJS, -2),
+        Line(Instruction.LDR, "RR"),
+        Line(Instruction.TRAP, 0),
+        Line(Instruction.HALT),
+        Line(label="add"),
+        Line(Instruction.LINK, 1),
+        Line(Instruction.LDL, -3),
+        Line(Instruction.LDL, -2),
+        Line(Instruction.ADD),
+        Line(Instruction.STL, 1),
+        Line(Instruction.LDL, 1),
+        Line(Instruction.STR, "RR"),
+        Line(Instruction.UNLINK),
+        Line(Instruction.RET),
+    ]
+    inliner = Inliner()
+    assert instructions(inliner.inline(lines)) == [
+        ("main", Instruction.LDC, 3),
+        ("", Instruction.LDC, 4),
+        ("", Instruction.AJS, 1),
+        ("", Instruction.LDS, -2),
+        ("", Instruction.LDS, -2),
+        ("", Instruction.ADD),
+        ("", Instruction.STS, -1),
+        ("", Instruction.LDS, 0),
+        ("", Instruction.STS, -3),
+        ("", Instruction.AJS, -2),
+        ("", Instruction.TRAP, 0),
+        ("", Instruction.HALT),
+    ]
+    # BSR, AJS, LDR, LINK, STR, UNLINK and RET are replaced by AJS, STS and AJS
+    assert inliner.inlined == {"add": 1}
+    assert inliner.saved == {"add": 4}
+    assert inliner.report().splitlines()[-1].split() == ["Total", "1"]
+
+
+def test_not_inlined():
+    """Ensure that routines that are too long or that use their frame otherwise are kept."""
+    lines = [
+        Line(Instruction.BSR, "long"),
+        Line(Instruction.LDR, "RR"),
+        Line(Instruction.BSR, "frame"),
+        Line(Instruction.LDR, "RR"),
+        Line(Instruction.HALT),
+        Line(Instruction.LINK, 0, label="long"),
+        *[Line(Instruction.NOP)] * 4,
+        Line(Instruction.UNLINK),
+        Line(Instruction.RET),
+        Line(Instruction.LINK, 0, label="frame"),
+        Line(Instruction.LDR, "MP"),
+        Line(Instruction.STR, "RR"),
+        Line(Instruction.UNLINK),
+        Line(Instruction.RET),
+    ]
+    inliner = Inliner(size=4)
+    assert inliner.inline(lines) == lines
+    assert not inliner.inlined
+
+
+def test_inlined_program(lists):
+    program = """
+    square(n) {
+        return n * n;
+    }
+    sign(n) {
+        if (n < 0) {
+            return -1;
+        }
+        return 1;
+    }
+    main() {
+        var xs = 3 : -2 : [];
+        println(square(xs.hd) + sign(xs.tl.hd));
+        println(isEmpty(xs.tl.tl));
+        return;
+    }
+    """
+    tree = Parser(program).parse(Scanner(program).scan())
+    Typer(program).type(tree)
+    plain = Generator(program, lists=lists, inline_size=0)
+    inlined = Generator(program, lists=lists)
+    plain_code = plain.generate(tree)
+    inlined_code = inlined.generate(tree)
+
+    assert not plain.inliner.inlined
+    assert inlined.inliner.inlined["square_Int"] == 1
+    assert inlined.inliner.inlined["sign_Int"] == 1
+    # The functions are no longer called, so they are removed
+    assert "square_Int:" not in inlined_code
+    assert inlined.run(inlined_code) == plain.run(plain_code) == "8\nTrue\n"
@@ -0,0 +1,45 @@
+from compiler.analysis import AnalysisManager
+from compiler.generation.generator import Generator
+from compiler.generation.instruction import Instruction
+from compiler.generation.line import Line
+from compiler.parser.parser import Parser
+from compiler.scanner.scanner import Scanner
+from compiler.typer.typer import Typer
+
+
+def test_render():
+    program = "main() { var a = 1; a = a * 5; println(a + 2); }"
+    tree = Parser(program).parse(Scanner(program).scan())
+    Typer(program).type(tree)
+    exp = tree.body[0].stmt[1].stmt.args.items[0]
+
+    line = Line(Instruction.ADD, comment=exp)
+    assert line.render() == "\tadd\t\t\t; a + 2"
+    # Nodes are not printed if the line is not annotated
+    assert line.render(annotate=False) == "\tadd"
+    assert (
+        Line(Instruction.LDC, 1, comment="Load\n1").render(False)
+        == "\tldc 1\t\t\t; Load1"
+    )
+
+    plain = Generator(program).generate(tree)
+    annotated = Generator(program, annotate=True).generate(tree)
+    assert "; a + 2" in annotated
+    assert "; a + 2" not in plain
+    assert len(plain.splitlines()) == len(annotated.splitlines())
+
+
+def test_render_without_printing():
+    """Ensure that no nodes are printed when generating code without annotations."""
+    program = (
+        "main() { var xs = 1 : 2 : []; if (!isEmpty(xs)) { println(xs.hd * 3); } }"
+    )
+    tree = Parser(program).parse(Scanner(program).scan())
+    Typer(program).type(tree)
+
+    # Every printed node stores its rendering with the analyses of the tree
+    analyses = AnalysisManager()
+    Generator(program, analyses).generate(tree)
+    assert not analyses.renderings
+    Generator(program, analyses, annotate=True).generate(tree)
+    assert analyses.renderings
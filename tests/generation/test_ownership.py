@@ -0,0 +1,75 @@
+from compiler.analysis import AnalysisManager, OwnershipAnalysis
+from compiler.generation.generator import Generator
+from compiler.parser.parser import Parser
+from compiler.scanner.scanner import Scanner
+from compiler.typer.typer import Typer
+
+PROGRAM = """
+build(n) {
+    var acc = [];
+    var i = 0;
+    while (i < n) {
+        acc = i : acc;
+        i = i + 1;
+    }
+    return acc;
+}
+main() {
+    var a = build(4);
+    var b = 7 : a;
+    var c = [];
+    var d = 8 : c;
+    println(b);
+    println(a);
+    println(d);
+    println(9 : 8 : build(2));
+    return;
+}
+"""
+
+
+def typed_tree(program):
+    tree = Parser(program).parse(Scanner(program).scan())
+    Typer(program).type(tree)
+    return tree
+
+
+def test_ownership():
+    tree = typed_tree(PROGRAM)
+    ownership = AnalysisManager().get(OwnershipAnalysis, tree)
+    eliminated = sorted(
+        (node.span.start_ln, reason) for node, reason in ownership.eliminated.values()
+    )
+    # `acc` and `c` are not used after they are prepended to, while `a` is printed later,
+    # and `build(2)` is a list that only `:` refers to, but it does not copy it anyway
+    assert eliminated == [(6, "dead"), (15, "dead")]
+    assert not ownership.writes
+    assert ownership.report().splitlines()[-1] == "Eliminated 2 copies"
+
+
+def test_owned_program(lists):
+    generator = Generator(PROGRAM, lists=lists)
+    ssm_code = generator.generate(typed_tree(PROGRAM))
+    assert (
+        generator.run(ssm_code) == "[7, 3, 2, 1, 0]\n[3, 2, 1, 0]\n[8]\n[9, 8, 1, 0]\n"
+    )
+    # The list of `a` is still used, so only its (length, next*) pair is copied
+    assert generator.generator_yielder.copies == {"dead": 2, "shared": 1}
+
+
+def test_field_writes(lists):
+    """Ensure that lists are copied as a whole if their elements can be modified."""
+    program = """
+    main() {
+        var xs = 1 : 2 : [];
+        var ys = 3 : xs;
+        ys.tl.hd = 4;
+        println(xs);
+        println(ys);
+        return;
+    }
+    """
+    generator = Generator(program, lists=lists)
+    ssm_code = generator.generate(typed_tree(program))
+    assert generator.run(ssm_code) == "[1, 2]\n[3, 4, 2]\n"
+    assert generator.generator_yielder.copies == {"copied": 1}
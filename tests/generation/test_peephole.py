@@ -0,0 +1,126 @@
+from compiler.generation.generator import Generator
+from compiler.generation.instruction import Instruction
+from compiler.generation.line import Line
+from compiler.generation.peephole import PeepholeOptimizer
+from compiler.parser.parser import Parser
+from compiler.scanner.scanner import Scanner
+from compiler.typer.typer import Typer
+
+
+def instructions(lines):
+    return [(line.label, *line.instruction) for line in lines]
+
+
+def test_rules():
+    lines = [
+        Line(Instruction.LDC, 3, label="start"),
+        Line(Instruction.LDC, 4),
+        Line(Instruction.ADD, comment="3 + 4"),
+        Line(Instruction.NEG),
+        Line(Instruction.NEG),
+        Line(Instruction.LDC, 0),
+        Line(Instruction.ADD),
+        Line(Instruction.SWP),
+        Line(Instruction.AJS, -1),
+        Line(Instruction.LDR, "RR"),
+        Line(Instruction.AJS, -2),
+        Line(Instruction.LT),
+        Line(Instruction.NOT),
+        Line(Instruction.BRF, "end"),
+        Line(Instruction.BRA, "end"),
+        Line(Instruction.LDC, 1),
+        Line(label="end"),
+        Line(Instruction.HALT),
+    ]
+    optimizer = PeepholeOptimizer()
+    optimized = optimizer.optimize(lines)
+    assert instructions(optimized) == [
+        ("start", Instruction.LDC, 7),
+        ("", Instruction.STS, -1),
+        ("", Instruction.AJS, -1),
+        ("", Instruction.GE),
+        ("", Instruction.BRF, "end"),
+        ("end",),
+        ("", Instruction.HALT),
+    ]
+    # The comment of the window is kept on the replacement
+    assert optimized[0].comment == "3 + 4"
+    assert sum(optimizer.removed.values()) == 11
+    assert optimizer.report().splitlines()[-1].split() == ["Total", "11"]
+
+
+def test_operand_rules():
+    lines = [
+        Line(Instruction.LDL, 1),
+        Line(Instruction.LDC, 1),
+        Line(Instruction.ADD),
+        Line(Instruction.LDC, 2),
+        Line(Instruction.SUB),
+        # An inlined routine with one argument
+        Line(Instruction.LDS, 0),
+        Line(Instruction.LDA, 0),
+        Line(Instruction.LDC, -1),
+        Line(Instruction.ADD),
+        Line(Instruction.STS, -1),
+        # An inlined routine with two arguments
+        Line(Instruction.LDL, 2),
+        Line(Instruction.LDS, -1),
+        Line(Instruction.LDS, -1),
+        Line(Instruction.EQ),
+        Line(Instruction.STS, -2),
+        Line(Instruction.AJS, -1),
+        Line(Instruction.NOT),
+        # Only the complement of a comparison is known to be its negation
+        Line(Instruction.LDL, 3),
+        Line(Instruction.NOT),
+        Line(Instruction.BRF, "end"),
+    ]
+    assert instructions(PeepholeOptimizer().optimize(lines)) == [
+        ("", Instruction.LDL, 1),
+        ("", Instruction.LDAA, -1),
+        ("", Instruction.LDA, 0),
+        ("", Instruction.LDAA, -1),
+        ("", Instruction.LDL, 2),
+        ("", Instruction.NE),
+        ("", Instruction.LDL, 3),
+        ("", Instruction.NOT),
+        ("", Instruction.BRF, "end"),
+    ]
+
+
+def test_labels():
+    """Ensure that lines that can be jumped to are not merged with the lines before them."""
+    lines = [
+        Line(Instruction.LDC, 0),
+        Line(Instruction.ADD, label="loop"),
+        Line(Instruction.NEG, label="first"),
+        Line(Instruction.NEG),
+    ]
+    assert instructions(PeepholeOptimizer().optimize(lines)) == [
+        ("", Instruction.LDC, 0),
+        ("loop", Instruction.ADD),
+        ("first",),
+    ]
+
+
+def test_optimized_program():
+    program = """
+    main() {
+        var xs = 1 : 2 : 3 : [];
+        var a = -(-4) * 1;
+        if (!isEmpty(xs)) {
+            println(xs.hd + a);
+        }
+        return;
+    }
+    """
+    tree = Parser(program).parse(Scanner(program).scan())
+    Typer(program).type(tree)
+    plain = Generator(program, rules=())
+    optimized = Generator(program)
+    plain_code = plain.generate(tree)
+    optimized_code = optimized.generate(tree)
+
+    assert not plain.peephole.removed
+    assert len(optimized_code.splitlines()) < len(plain_code.splitlines())
+    assert optimized.run(optimized_code) == plain.run(plain_code) == "5\n"
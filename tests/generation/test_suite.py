@@ -1,7 +1,7 @@
 from tests.generation.util import execute
 
 
-def test_field_expr():
+def test_field_expr(lists):
     program = r"""
     main(){
         var b = [1..5] : [6..10] : [11..15] : [];
@@ -17,11 +17,11 @@ def test_field_expr():
 11
 9
 """
-    output = execute(program)
+    output = execute(program, lists=lists)
     assert output.splitlines() == expected.splitlines()
 
 
-def test_field_index_assign():
+def test_field_index_assign(lists):
     program = r"""
     main(){
         var b = [1..5] : [6..10] : [11..15] : [];
@@ -32,11 +32,11 @@ def test_field_index_assign():
     }
     """
     expected = "[[1, 2, 8, 4, 5], [12, 7, 8, 9, 10], [11, 12, 13, 14, 24]]"
-    output = execute(program)
+    output = execute(program, lists=lists)
     assert output.splitlines() == expected.splitlines()
 
 
-def test_field_head_assign():
+def test_field_head_assign(lists):
     program = r"""
     main(){
         var b = [1..5] : [6..10] : [11..15] : [];
@@ -46,11 +46,11 @@ def test_field_head_assign():
     }
     """
     expected = "[[2], [6, 7, 8, 9, 10], [3, 12, 13, 14, 15]]"
-    output = execute(program)
+    output = execute(program, lists=lists)
     assert output.splitlines() == expected.splitlines()
 
 
-def test_if_else():
+def test_if_else(lists):
     program = """
     cond_print(x){
         var a = 12;
@@ -85,11 +85,11 @@ def test_if_else():
 10 is larger than 5, but smaller than 12
 4 is smaller or equal to 5, and smaller than 12
 24 is greater or equal to 12"""
-    output = execute(program)
+    output = execute(program, lists=lists)
     assert output.splitlines() == expected.splitlines()
 
 
-def test_continue():
+def test_continue(lists):
     program = r"""
     main(){
         int x = 13;
@@ -114,11 +114,11 @@ def test_continue():
         }
     }"""
     expected = "< 2\n< 2\n3\n4\n5\n\n> 10\n> 10\n10\n9\n8\n7\n"
-    output = execute(program)
+    output = execute(program, lists=lists)
     assert output.splitlines() == expected.splitlines()
 
 
-def test_break():
+def test_break(lists):
     program = r"""
     main(){
         int x = 13;
@@ -143,5 +143,135 @@ def test_break():
         }
     }"""
     expected = "1\n2\n3\n> 3\n\n12\n11\n10\n< 10\n"
-    output = execute(program)
+    output = execute(program, lists=lists)
     assert output.splitlines() == expected.splitlines()
+
+
+def test_string_literal(lists):
+    program = r"""
+    main(){
+        var s = "hello\tworld";
+        var t = 'a' : s;
+        s.hd = 'H';
+        println(s);
+        println(t);
+        println(length("long string" : []));
+        return;
+    }
+    """
+    expected = "Hello\tworld\nahello\tworld\n1\n"
+    output = execute(program, lists=lists)
+    assert output.splitlines() == expected.splitlines()
+
+
+def test_short_circuit(lists):
+    """Ensure that the right side of `&&` and `||` is only evaluated if the left side does
+    not decide the outcome, both for values and for conditions."""
+    program = r"""
+    check(name, value){
+        print(name);
+        return value;
+    }
+
+    main(){
+        var xs = [];
+        var n = 0;
+        var a = check('a', False) && check('b', True);
+        var b = check('c', True) || check('d', True);
+        var c = check('e', True) && check('f', False);
+        print('\n');
+        println(a : b : c : []);
+
+        if (!isEmpty(xs) && xs.hd > 0 || check('g', False)) {
+            println("then");
+        } else {
+            println("else");
+        }
+        xs = 3 : xs;
+        if (!(isEmpty(xs) || xs.hd < 0) && !check('h', False)) {
+            println("then");
+        }
+        while (n < 2 && check('i', True)) {
+            n = n + 1;
+        }
+        println(n);
+    }
+    """
+    expected = "acef\n[False, True, False]\ngelse\nhthen\nii2\n"
+    output = execute(program, lists=lists)
+    assert output.splitlines() == expected.splitlines()
+
+
+def test_shared_lists(lists):
+    """Ensure that prepending to a list does not change the lists it shares elements with."""
+    program = r"""
+    main(){
+        var xs = 1 : 2 : 3 : [];
+        var t = 8 : xs.tl;
+        var u = 9 : xs.tl;
+        println(xs);
+        println(t);
+        println(u);
+        println(7 : u.tl.tl);
+    }
+    """
+    expected = "[1, 2, 3]\n[8, 2, 3]\n[9, 2, 3]\n[7, 3]\n"
+    output = execute(program, lists=lists)
+    assert output == expected
+
+
+def test_tail_calls(lists):
+    """Ensure that calls in return statements do not grow the stack, even if they are deep."""
+    program = r"""
+    sum(n, acc) { if (n == 0) { return acc; } return sum(n - 1, acc + n); }
+    even(n) { if (n == 0) { return True; } return odd(n - 1); }
+    odd(n) { if (n == 0) { return False; } return even(n - 1); }
+    last(xs) {
+        for x in xs {
+            if (isEmpty(xs.tl)) {
+                return x;
+            }
+            return last(xs.tl);
+        }
+        return 0;
+    }
+    main(){
+        println(sum(3000, 0));
+        println(even(3001));
+        println(last([1..100]));
+    }
+    """
+    expected = "4501500\nFalse\n100\n"
+    output = execute(program, lists=lists)
+    assert output == expected
+
+
+def test_counted_loops(lists):
+    """Ensure that loops over ranges count in either direction, like the ranges as lists."""
+    program = r"""
+    bound(n) { print(n); return n; }
+    main(){
+        var total = 0;
+        for i in [1..4] { print(i); }
+        for i in [4..1] { print(i); }
+        for c in ['x'..'z'] { print(c); }
+        println(' ');
+        for i in [bound(2)..bound(0)] { print(i); }
+        println(' ');
+        for i in [0..1000] {
+            if (i % 2 == 0) {
+                continue;
+            }
+            if (i > 500) {
+                break;
+            }
+            total = total + i;
+        }
+        println(total);
+        for i in [2147483646..2147483647] { print(i); }
+        println(' ');
+    }
+    """
+    expected = "12344321xyz \n20210 \n62500\n21474836462147483647 \n"
+    output = execute(program, lists=lists)
+    assert output == expected
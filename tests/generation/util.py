@@ -1,3 +1,4 @@
+from compiler.generation.folding import ConstantFolder
 from compiler.generation.generator import Generator
 from compiler.parser.parser import Parser
 from compiler.scanner.scanner import Scanner
@@ -5,7 +6,7 @@ from compiler.typer.typer import Typer
 from tests.test_util import open_file
 
 
-def execute(program: str) -> str:
+def execute(program: str, fold: bool = True, **options) -> str:
     scanner = Scanner(program)
     tokens = scanner.scan()
 
@@ -15,12 +16,15 @@ def execute(program: str) -> str:
     typer = Typer(program)
     typer.type(tree)
 
-    generator = Generator(program)
+    if fold:
+        ConstantFolder().fold(tree)
+
+    generator = Generator(program, **options)
     ssm_code = generator.generate(tree)
     output = generator.run(ssm_code)
     return output
 
 
-def execute_file(filename: str) -> str:
+def execute_file(filename: str, **options) -> str:
     program: str = open_file(filename)
-    return execute(program)
+    return execute(program, **options)
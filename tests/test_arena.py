@@ -0,0 +1,94 @@
+import copy
+
+from compiler.generation.utils import ForCounterVisitor
+from compiler.parser.analyze import AnalyzeTransformer
+from compiler.parser.parser import Parser
+from compiler.scanner.scanner import Scanner
+from compiler.tree.arena import Arena, NodeView
+from compiler.tree.tree import ForNode, FunDeclNode, Op2Node, ReturnNode
+from tests.test_util import open_file
+
+
+def parse(program: str):
+    tokens = Scanner(program).scan()
+    return Parser(program).parse(tokens)
+
+
+def test_round_trip(valid_file: str):
+    """Ensure that converting to an arena and back results in the same tree."""
+    tree = parse(open_file(valid_file))
+    expected = str(tree)
+
+    arena = Arena.from_node(tree)
+    assert arena.end[0] == len(arena)
+    back = arena.to_node()
+    assert back == tree
+    assert str(back) == expected
+
+
+def test_max_nesting(valid_file: str):
+    """Ensure that counting nested for loops on the arena matches the ForCounterVisitor."""
+    tree = parse(open_file(valid_file))
+    arena = Arena.from_node(tree)
+    for row, fun_decl in zip(arena.rows_of(FunDeclNode), tree.body):
+        assert arena.max_nesting(ForNode, row) == ForCounterVisitor().count(fun_decl)
+
+
+def test_unreachable_statements():
+    program = """
+f(x) {
+    if (x) {
+        return 1;
+    } else {
+        return 2;
+    }
+}
+g(x) {
+    while (x) {
+        return 1;
+    }
+    return 2;
+}
+"""
+    tree = parse(program)
+    assert Arena.from_node(tree).unreachable_statements() == []
+
+    # Insert dead code after the if-else, after the return in the while, and after the final return
+    f, g = tree.body
+    f.stmt.append(copy.deepcopy(g.stmt[-1]))
+    g.stmt[0].stmt.body.append(copy.deepcopy(g.stmt[-1]))
+    g.stmt += [copy.deepcopy(f.stmt[0]), copy.deepcopy(g.stmt[-1])]
+
+    arena = Arena.from_node(tree)
+    unreachable = arena.unreachable_statements()
+    assert [arena.view(row).to_node() for row in unreachable] == [
+        f.stmt[1],
+        g.stmt[0].stmt.body[1],
+        *g.stmt[2:],
+    ]
+
+    # The AnalyzeTransformer removes exactly these statements
+    AnalyzeTransformer(program).visit(tree)
+    assert Arena.from_node(tree).unreachable_statements() == []
+    assert len(Arena.from_node(tree)) == len(arena) - sum(
+        arena.end[row] - row for row in unreachable
+    )
+
+
+def test_node_view():
+    tree = parse("main() { var a = 1 + 2; return a; }")
+    arena = Arena.from_node(tree)
+
+    root = arena.view()
+    assert isinstance(root, NodeView)
+    (main,) = root.body
+    assert main.node_class is FunDeclNode
+    assert main.id.text == "main"
+    assert main.args is None
+
+    var_decl = main.var_decl[0]
+    assert var_decl.exp.node_class is Op2Node
+    assert var_decl.exp.operator.text == "+"
+    assert var_decl.exp.to_node() == tree.body[0].var_decl[0].exp
+    assert main.stmt[0].stmt.node_class is ReturnNode
+    assert [name for name, _ in var_decl.iter_fields()] == ["span", "type", "id", "exp"]
@@ -0,0 +1,32 @@
+from compiler.built_in import BUILT_IN_FUNCTIONS
+from compiler.generation.generator import GeneratorYielder
+from compiler.tree.tree import FunTypeNode, ListNode, PolymorphicTypeNode
+
+
+def test_instantiate():
+    """Ensure that every compilation receives fresh polymorphic types for the built-ins."""
+    scheme = BUILT_IN_FUNCTIONS["isEmpty"].type
+    first = BUILT_IN_FUNCTIONS["isEmpty"].instantiate()
+    second = BUILT_IN_FUNCTIONS["isEmpty"].instantiate()
+
+    match first, second:
+        case (
+            FunTypeNode(types=[ListNode(PolymorphicTypeNode() as a)]),
+            FunTypeNode(types=[ListNode(PolymorphicTypeNode() as b)]),
+        ):
+            assert a != b
+            assert a != scheme.types[0].body
+            # The return type is not polymorphic, and can be shared
+            assert first.ret_type is second.ret_type is scheme.ret_type
+
+        case _:
+            raise Exception("Did not match expected type scheme.")
+
+    # Monomorphic type schemes are shared completely
+    assert BUILT_IN_FUNCTIONS["ord"].instantiate() is BUILT_IN_FUNCTIONS["ord"].type
+
+
+def test_codegen_strategies():
+    """Ensure that every built-in function has a code generation strategy."""
+    for built_in in BUILT_IN_FUNCTIONS.values():
+        assert hasattr(GeneratorYielder, f"built_in_{built_in.codegen}")
@@ -201,6 +201,6 @@ main(){
 
 
 @pytest.mark.parametrize("program, expected", programs)
-def test_program(program: str, expected: str):
-    predicted = execute(program)
+def test_program(program: str, expected: str, lists: str):
+    predicted = execute(program, lists=lists)
     assert predicted == expected
@@ -0,0 +1,95 @@
+import io
+import json
+
+import pytest
+
+from compiler.error.communicator import Communicator, ErrorRaiser, Message
+from compiler.error.diagnostic import Diagnostic, JsonLinesWriter, Severity, check
+from compiler.error.scanner_error import EmptyQuoteError
+from compiler.error.typer_error import TyperException
+from compiler.parser.parser import Parser
+from compiler.scanner.scanner import Scanner
+from compiler.typer.typer import Typer
+from compiler.util import Span
+
+PROGRAM = """
+f(x) {
+    return x + 1;
+    return x;
+}
+main() {
+    var a = f('a');
+}
+"""
+
+
+def test_check(capsys):
+    diagnostics = list(check(PROGRAM))
+    assert [(diagnostic.code, diagnostic.severity) for diagnostic in diagnostics] == [
+        ("DeadCodeRemovalWarning", Severity.WARNING),
+        ("InsertedReturnWarning", Severity.WARNING),
+        ("FunCallUnifyErrorFactory", Severity.ERROR),
+    ]
+    error = diagnostics[-1]
+    assert error.category == "TypeError"
+    assert error.span == Span(7, (14, 17))
+    assert error.message.startswith("Cannot match type 'Char' with expected type 'Int'")
+    # Nothing is shown to the programmer
+    assert capsys.readouterr().out == ""
+
+
+def test_check_scanner_error():
+    diagnostics = list(check("main() { var a = '; }"))
+    assert diagnostics == [
+        Diagnostic(
+            "LonelyQuoteError",
+            Severity.ERROR,
+            "ScannerError",
+            Span(1, (17, 18)),
+            "Found lonely quote on line [1].",
+        )
+    ]
+
+
+def test_describe():
+    """Ensure that diagnostics are built from the message stored when the error is created."""
+    diagnostics = []
+    with Communicator.listen(diagnostics.append, render=False):
+        error = EmptyQuoteError("main() { var a = ''; }", Span(1, (17, 19)))
+    ErrorRaiser.ERRORS.clear()
+
+    assert error.message == Message(
+        "ScannerError", Span(1, (17, 19)), "Found empty quote on line [1]."
+    )
+    assert diagnostics == [
+        Diagnostic(
+            "EmptyQuoteError",
+            Severity.ERROR,
+            "ScannerError",
+            Span(1, (17, 19)),
+            "Found empty quote on line [1].",
+        )
+    ]
+    assert str(error).startswith("ScannerError: Found empty quote on line [1].\n")
+
+
+def test_json_lines(capsys):
+    """Ensure that diagnostics are streamed while the messages are still shown."""
+    stream = io.StringIO()
+    tree = Parser(PROGRAM).parse(Scanner(PROGRAM).scan())
+    with Communicator.listen(JsonLinesWriter(stream)):
+        with pytest.raises(TyperException) as excinfo:
+            Typer(PROGRAM).type(tree)
+        # The error is streamed before it is communicated
+        assert json.loads(stream.getvalue())["code"] == "FunCallUnifyErrorFactory"
+
+    assert "Cannot match type 'Char'" in str(excinfo.value)
+    assert Communicator.listeners == []
+    assert json.loads(stream.getvalue()) == {
+        "code": "FunCallUnifyErrorFactory",
+        "severity": "error",
+        "category": "TypeError",
+        "span": {"start_line": 7, "start_col": 14, "end_line": 7, "end_col": 17},
+        "message": "Cannot match type 'Char' with expected type 'Int' in the function call to 'f' on line [7].",
+        "note": "",
+    }
@@ -1,3 +1,4 @@
+import io
 import re
 
 import pytest
@@ -5,7 +6,10 @@ import pytest
 from compiler.error.parser_error import ParserException
 from compiler.parser.parser import Parser
 from compiler.scanner.scanner import Scanner
-from compiler.tree.tree import SPLNode
+from compiler.token import Token
+from compiler.tree.printer import Printer
+from compiler.tree.tree import Node, SPLNode, StringLiteralNode
+from compiler.typer.typer import Typer
 from compiler.util import Span
 from tests.test_util import open_file
 
@@ -190,3 +194,89 @@ def test_break():
     with pytest.raises(ParserException) as excinfo:
         parser.parse(tokens)
     assert "'break'" in str(excinfo.value) and "-> 4. " in str(excinfo.value)
+
+
+def test_slotted_nodes(list_program: str):
+    """Ensure that the nodes, tokens and spans of a parsed tree do not carry a `__dict__`."""
+    tokens = Scanner(list_program).scan()
+    tree = Parser(list_program).parse(tokens)
+
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack += node
+        elif isinstance(node, (Node, Token)):
+            assert not hasattr(node, "__dict__"), type(node).__name__
+            assert not hasattr(node.span, "__dict__")
+            if isinstance(node, Node):
+                stack += [child for _, child in node.iter_fields()]
+
+    span = Span(line_no=(1, 2), span=(3, 4))
+    assert (span.ln, span.col) == ((1, 2), (3, 4))
+
+
+def test_print_stream(valid_file: str):
+    """Ensure that printing to a stream gives the same result as `str`."""
+    program: str = open_file(valid_file)
+    tree = Parser(program).parse(Scanner(program).scan())
+
+    stream = io.StringIO()
+    Printer().write(tree, stream)
+    assert stream.getvalue() == str(tree)
+
+
+def test_print_long_string():
+    """Ensure that deeply nested trees, e.g. long strings, can be printed."""
+    program = 'main() { var s = "a b"; return; }'
+    expected = str(Parser(program).parse(Scanner(program).scan()))
+
+    program = program.replace("a b", "a b" * 5000)
+    tree = Parser(program).parse(Scanner(program).scan())
+    assert str(tree) == expected.replace("a b", "a b" * 5000)
+
+
+def test_string_literal():
+    """Ensure that strings are flat nodes, such that long strings can be typed."""
+    program = 'main() { var s = "%s"; return; }' % ("a\\n" * 20000)
+    tree = Parser(program).parse(Scanner(program).scan())
+    literal = tree.body[0].var_decl[0].exp
+    assert isinstance(literal, StringLiteralNode)
+    assert literal.chars == "a\n" * 20000
+
+    Typer(program).type(tree)
+    assert '"%s"' % ("a\\n" * 20000) in str(tree)
+
+
+def test_print_quoted_string():
+    """Ensure that printed strings containing quotes can be parsed again."""
+    program = r'main() { var s = "say \"hi\"\n"; return; }'
+    tree = Parser(program).parse(Scanner(program).scan())
+    assert tree.body[0].var_decl[0].exp.chars == 'say "hi"\n'
+
+    printed = str(tree)
+    assert r'"say \"hi\"\n"' in printed
+    reparsed = Parser(printed).parse(Scanner(printed).scan())
+    assert reparsed.body[0].var_decl[0].exp.chars == 'say "hi"\n'
+    assert str(reparsed) == printed
+
+
+def test_print_caching():
+    program = "main() { var a = 1 + 2; return; }"
+    tree = Parser(program).parse(Scanner(program).scan())
+    fun_decl = tree.body[0]
+    var_decl = fun_decl.var_decl[0]
+
+    renderings = {}
+    assert Printer.render(var_decl.exp, renderings) == "1 + 2"
+    fragment = renderings[id(var_decl.exp)][1][()]
+    # The rendering of the expression is reused for the nodes that contain it
+    assert Printer.render(var_decl, renderings) == "var a = 1 + 2;"
+    assert "var a = 1 + 2;" in Printer.render(tree, renderings)
+    assert renderings[id(var_decl.exp)][1][()] is fragment
+
+    # Without shared renderings, nodes are printed as they are now. Shared renderings are
+    # stale once the tree is modified, until their owner discards them
+    fun_decl.var_decl.clear()
+    assert "var" not in str(tree)
+    assert "var" in Printer.render(tree, renderings)
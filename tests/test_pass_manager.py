@@ -0,0 +1,205 @@
+import pytest
+
+from compiler.analysis import (  # isort:skip
+    AnalysisManager,
+    ForNestingAnalysis,
+    FrameLayoutAnalysis,
+    FrameSizeAnalysis,
+)
+from compiler.generation.generator import Generator
+from compiler.parser.parser import Parser
+from compiler.scanner.scanner import Scanner
+from compiler.tree.printer import Printer
+from compiler.tree.tree import SPLNode
+from compiler.typer.typer import Typer
+from tests.test_util import open_file
+
+from compiler.pass_manager import (  # isort:skip
+    AnalyzePass,
+    FoldPass,
+    GeneratePass,
+    Pass,
+    PassManager,
+    TypePass,
+)
+
+PROGRAM = """
+f(xs) {
+    var total = 0;
+    for x in xs {
+        for y in xs {
+            total = total + x * y;
+        }
+    }
+    return total;
+}
+main() {
+    var a = f(1 : 2 : []);
+    return;
+}
+"""
+
+
+def parse(program: str) -> SPLNode:
+    tokens = Scanner(program).scan()
+    return Parser(program).parse(tokens)
+
+
+def test_pipeline(valid_typed_file: str):
+    """Ensure that the passes generate the same code as the individual phases."""
+    program = open_file(valid_typed_file)
+    tree = parse(program)
+    Typer(program).type(tree)
+    generate = GeneratePass(program)
+    manager = PassManager([TypePass(program), generate])
+    try:
+        expected = Generator(program).generate(tree)
+    except Exception as error:
+        # Some programs cannot be generated, which must fail in the same way
+        with pytest.raises(type(error)):
+            manager.run(parse(program))
+        return
+
+    manager.run(parse(program))
+    assert generate.ssm_code == expected
+    assert {"TypePass", "GeneratePass (analyses)", "GeneratePass"} == set(
+        manager.timings
+    )
+    assert "Total" in manager.report()
+
+
+def test_frame_size():
+    tree = parse(PROGRAM)
+    f, main = tree.body
+    analyses = AnalysisManager()
+    assert analyses.get(FrameSizeAnalysis, f) == 3
+    assert analyses.get(FrameSizeAnalysis, main) == 1
+    # The nesting of for loops in `f` does not affect `main`
+    assert analyses.get(ForNestingAnalysis, main) == 0
+
+
+def test_generated_frame_sizes():
+    """Ensure that the nested for loops of one function do not enlarge the frames of others."""
+    program = """
+    g(n) {
+        var m = n + 1;
+        return m;
+    }
+    main() {
+        var xs = 1 : 2 : [];
+        for x in xs {
+            for y in xs {
+                print(g(x * y));
+            }
+        }
+        return;
+    }
+    """
+    tree = parse(program)
+    Typer(program).type(tree)
+    lines = Generator(program, inline_size=0).generate(tree).splitlines()
+    links = {
+        line.split(":")[0]: lines[i + 1].split()
+        for i, line in enumerate(lines)
+        if line.startswith(("main:", "g_Int:"))
+    }
+    assert links == {"main": ["link", "3"], "g_Int": ["link", "1"]}
+
+
+def test_frame_layout():
+    tree = parse(PROGRAM)
+    f, main = tree.body
+    layout = AnalysisManager().get(FrameLayoutAnalysis, f)
+    outer = f.stmt[0].stmt
+    inner = outer.body[0].stmt
+    assert layout.arguments == {"xs": -2}
+    assert layout.locals == {"total": 1}
+    assert (layout.offset(outer), layout.offset(inner)) == (2, 3)
+    assert str(layout).splitlines() == ["MP-2  xs", "MP+1  total", "MP+2  x", "MP+3  y"]
+
+
+class RenamePass(Pass):
+    """Change the first function, reporting only that function as changed."""
+
+    def run(self, tree: SPLNode, analyses: AnalysisManager):
+        fun_decl = tree.body[0]
+        fun_decl.var_decl.append(fun_decl.var_decl[0])
+        return [fun_decl]
+
+
+def test_cached_analyses():
+    """Ensure that analyses are reused until a pass changes the node they belong to."""
+    tree = parse(PROGRAM)
+    f, main = tree.body
+    manager = PassManager([TypePass(PROGRAM), GeneratePass(PROGRAM)])
+    manager.run(tree)
+    # The frame layouts and sizes, and the ownership of lists, are computed before
+    # generation, and reused by the generator
+    assert manager.analyses.misses == 7
+    assert manager.analyses.hits == 5
+
+    manager.passes = [RenamePass(), GeneratePass(PROGRAM)]
+    manager.run(tree)
+    # Only the changed function, and the program it is part of, are analysed again
+    assert manager.analyses.get(FrameSizeAnalysis, f) == 4
+    assert manager.analyses.misses == 11
+
+    # Passes that report any change invalidate all analyses
+    manager.passes = [AnalyzePass(PROGRAM)]
+    manager.run(tree)
+    assert all(not results for results in manager.analyses.results.values())
+
+
+def test_fold_pass():
+    """Ensure that generation leaves the tree as is, and that folding invalidates only the
+    analyses of the functions that it changed."""
+    program = """
+    g(n) {
+        var k = 2 * 3;
+        return n + k;
+    }
+    main() {
+        var xs = 1 : 2 : [];
+        for x in xs {
+            print(g(x));
+        }
+        return;
+    }
+    """
+    tree = parse(program)
+    g, main = tree.body
+    manager = PassManager([TypePass(program), GeneratePass(program)])
+    manager.run(tree)
+    assert "2 * 3" in str(g)
+
+    fold = FoldPass()
+    manager.passes = [fold]
+    manager.run(tree)
+    assert fold.folded == 2
+    assert str(g.stmt[0]) == "return n + 6;"
+    sizes = manager.analyses.results[FrameSizeAnalysis]
+    assert id(g) not in sizes
+    assert id(main) in sizes
+
+
+class PopPass(Pass):
+    """Remove the first statement of the first function, in place."""
+
+    def run(self, tree: SPLNode, analyses: AnalysisManager):
+        fun_decl = tree.body[0]
+        fun_decl.stmt.pop(0)
+        return [fun_decl]
+
+
+def test_renderings():
+    """Ensure that renderings are discarded once a pass modifies a list in place."""
+    program = "main() { var x = 1; x = 2; return; }"
+    tree = parse(program)
+    fun_decl = tree.body[0]
+    manager = PassManager([])
+    assert "x = 2;" in Printer.render(fun_decl, manager.analyses.renderings)
+
+    manager.passes = [PopPass()]
+    manager.run(tree)
+    assert "x = 2;" not in Printer.render(fun_decl, manager.analyses.renderings)
+    assert Printer.render(fun_decl) == Printer().print(fun_decl)
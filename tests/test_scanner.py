@@ -1,7 +1,9 @@
 import pytest
 
 from compiler import Scanner, Token, Type
+from compiler.error.communicator import Diagnostics
 from compiler.error.scanner_error import ScannerException
+from compiler.util import SourceFile
 from tests.test_util import open_file
 
 
@@ -105,6 +107,51 @@ def test_UnexpectedCharacterError_1():
     )
 
 
+def test_UnexpectedCharacterError_shared_source():
+    """Ensure that errors from a shared SourceFile are identical to those from a string."""
+    program: str = open_file("data/tests/scanner_error/UnexpectedCharacterError_1.spl")
+    messages = []
+    for source in (program, SourceFile(program)):
+        with pytest.raises(ScannerException) as excinfo:
+            Scanner(source).scan()
+        messages.append(str(excinfo.value))
+    assert messages[0] == messages[1]
+
+
+def test_UnexpectedCharacterError_many():
+    """Ensure that consecutive unexpected characters are merged into one error."""
+    program = "~" * 100000 + "\n" + "~ " * 50
+    with pytest.raises(ScannerException) as excinfo:
+        Scanner(program).scan()
+    message = str(excinfo.value)
+    assert repr("~" * 100000) in message
+    assert message.endswith("Showing 10 errors, omitting 41 errors...")
+
+
+def test_UnexpectedCharacterError_mixed():
+    """Ensure that unexpected characters are merged, also if they are not matched together."""
+    program = "main() { var a = 1 @#_&$ 2; }"
+    with pytest.raises(ScannerException) as excinfo:
+        Scanner(program).scan()
+    message = str(excinfo.value)
+    assert "'@#_&$'" in message
+    assert message.count("ScannerError") == 1
+
+
+def test_diagnostics():
+    """Ensure that only the diagnostics that are shown first are kept."""
+    diagnostics = Diagnostics(limit=3, key=lambda value: (value[0],))
+    diagnostics.extend([(5, "a"), (1, "b"), (4, "c"), (1, "d"), (3, "e")])
+    assert list(diagnostics) == [(1, "b"), (1, "d"), (3, "e")]
+    assert len(diagnostics) == 5 and diagnostics.n_omitted == 2
+
+    merged = Diagnostics(limit=2)
+    merged.extend(["x", "y"])
+    merged.extend(diagnostics)
+    assert list(merged) == ["x", "y"]
+    assert len(merged) == 7
+
+
 def test_UnexpectedCharacterError_2():
     program: str = open_file("data/tests/scanner_error/UnexpectedCharacterError_2.spl")
     scanner = Scanner(program)
@@ -124,3 +171,16 @@ def test_char():
     scanner = Scanner(program)
     tokens = scanner.scan()
     assert tokens
+
+
+@pytest.mark.parametrize(
+    "program", ["", "a", "a\n", "a\r\nb\rc\n\nd", "\n\n", "a\x0bb\x85c\u2028"]
+)
+def test_source_file(program: str):
+    source = SourceFile(program)
+    lines = program.splitlines()
+    assert len(source) == len(lines)
+    assert [source.line(i) for i in range(1, len(lines) + 1)] == lines
+    # Lines outside of the program are omitted
+    assert source.lines(-1, len(lines) + 2) == lines
+    assert source.lines(2, 3) == lines[1:3]
@@ -0,0 +1,87 @@
+from io import BytesIO
+
+import pytest
+
+from compiler.parser.parser import Parser
+from compiler.scanner.scanner import Scanner
+from compiler.tree.tree import PolymorphicTypeNode
+from tests.test_util import open_file
+from tests.typer.util import type_program
+
+from compiler.tree.serialize import (  # isort:skip
+    MAGIC,
+    VERSION,
+    Decoder,
+    Encoder,
+    SerializationError,
+    dumps,
+    loads,
+)
+
+
+def parse(program: str):
+    tokens = Scanner(program).scan()
+    return Parser(program).parse(tokens)
+
+
+def test_round_trip(valid_file: str):
+    """Ensure that encoding and decoding a parsed tree results in the same tree."""
+    tree = parse(open_file(valid_file))
+    expected = str(tree)
+
+    back = loads(dumps(tree))
+    assert back == tree
+    assert str(back) == expected
+
+
+def test_round_trip_typed(valid_typed_file: str):
+    """Ensure that encoding and decoding a typed tree results in the same tree."""
+    tree = type_program(open_file(valid_typed_file))
+    expected = str(tree)
+
+    data = dumps(tree)
+    back = loads(data)
+    assert back == tree
+    assert str(back) == expected
+
+
+def test_polymorphic_identity():
+    tree = type_program("id(x) { return x; } pair(a, b) { return (a, b); }")
+    back = loads(dumps(tree))
+
+    # Type variables that were equal remain equal, and distinct ones remain distinct
+    id_type, pair_type = (fun_decl.type for fun_decl in back.body)
+    assert id_type.types[0] == id_type.ret_type
+    assert pair_type.types[0] != pair_type.types[1]
+    assert pair_type.ret_type.left == pair_type.types[0]
+
+    # Fresh polymorphic types do not clash with the decoded ones
+    assert PolymorphicTypeNode.fresh() not in (*id_type.types, *pair_type.types)
+
+
+def test_stream():
+    trees = [parse("main() { return 1; }"), parse("f(x) { return x + 1; }")]
+    stream = BytesIO()
+    encoder = Encoder(stream)
+    for tree in trees:
+        encoder.write(tree)
+
+    # Strings are shared between the trees in a single stream
+    assert len(stream.getvalue()) < sum(len(dumps(tree)) for tree in trees)
+
+    stream.seek(0)
+    assert list(Decoder(stream)) == trees
+
+
+def test_invalid_stream():
+    with pytest.raises(SerializationError):
+        loads(b"not a tree")
+
+    with pytest.raises(SerializationError):
+        loads(MAGIC + bytes([VERSION + 1]))
+
+    with pytest.raises(SerializationError):
+        loads(dumps(parse("main() { return 1; }"))[:-1])
+
+    with pytest.raises(SerializationError):
+        dumps(parse("main() { return 1; }").body + [object()])
@@ -0,0 +1,39 @@
+from compiler.token import Token
+from compiler.tree.tree import IntTypeNode, ListNode, TupleNode
+from compiler.tree.visitor import NodeTransformer, NodeVisitor, NodeYielder
+from compiler.type import Type
+
+
+class IntCounter(NodeVisitor):
+    def __init__(self) -> None:
+        self.count = 0
+
+    def visit_IntTypeNode(self, node: IntTypeNode, *args, **kwargs) -> None:
+        self.count += 1
+
+
+class TokenYielder(NodeYielder):
+    def visit_Token(self, node: Token, *args, **kwargs):
+        yield node.text
+
+
+class IntToList(NodeTransformer):
+    def visit_IntTypeNode(self, node: IntTypeNode, *args, **kwargs) -> ListNode:
+        return ListNode(node)
+
+
+def test_dispatch_tables():
+    """Ensure that every visitor class dispatches using its own visit methods."""
+    tree = TupleNode(IntTypeNode(), ListNode(IntTypeNode()))
+
+    counter = IntCounter()
+    counter.visit(tree)
+    assert counter.count == 2
+    assert IntCounter.dispatch[IntTypeNode] is IntCounter.visit_IntTypeNode
+    assert IntTypeNode not in NodeVisitor.dispatch
+
+    tree = ListNode(TupleNode(Token("a", Type.ID), Token("b", Type.ID)))
+    assert list(TokenYielder().visit(tree)) == ["a", "b"]
+
+    tree = IntToList().visit(TupleNode(IntTypeNode(), IntTypeNode()))
+    assert tree == TupleNode(ListNode(IntTypeNode()), ListNode(IntTypeNode()))
@@ -0,0 +1,69 @@
+import pytest
+
+from compiler.typer.cache import TypeCache
+from compiler.typer.typer import TyperException
+from tests.test_util import open_file
+from tests.typer.util import type_program
+
+
+def test_cache(valid_typed_file: str):
+    """Ensure that typing with a (filled) cache results in the same types as typing without one."""
+    program = open_file(valid_typed_file)
+    expected = str(type_program(program))
+
+    cache = TypeCache()
+    assert str(type_program(program, cache)) == expected
+    assert cache.hits == 0
+    assert str(type_program(program, cache)) == expected
+
+
+def test_cache_hits():
+    program = """
+id(x) { return x; }
+double(x) :: Int -> Int { return x * 2; }
+main() { var a = id(1); var b = double(a); var c = id('c'); }
+"""
+    cache = TypeCache()
+    type_program(program, cache)
+    assert (cache.hits, cache.misses) == (0, 3)
+
+    type_program(program, cache)
+    assert (cache.hits, cache.misses) == (3, 3)
+
+    # Only the changed function, and the functions that depend on its type, are typed again
+    changed = program.replace("x * 2", "x * 3")
+    type_program(changed, cache)
+    assert (cache.hits, cache.misses) == (5, 4)
+
+    changed = program.replace(
+        "double(x) :: Int -> Int { return x * 2; }", "double(x) { return x; }"
+    )
+    type_program(changed, cache)
+    assert (cache.hits, cache.misses) == (6, 6)
+
+
+def test_cache_not_committed_on_error():
+    program = """
+f(x) { return x + 1; }
+main() { var a = f('c'); }
+"""
+    cache = TypeCache()
+    with pytest.raises(TyperException):
+        type_program(program, cache)
+    assert not cache.entries
+
+
+def test_cache_save_load(tmp_path):
+    program = open_file("data/given/valid/bool.spl")
+    path = tmp_path / "types.cache"
+
+    cache = TypeCache()
+    expected = str(type_program(program, cache))
+    cache.save(path)
+
+    loaded = TypeCache.load(path)
+    assert loaded.entries.keys() == cache.entries.keys()
+    assert str(type_program(program, loaded)) == expected
+    assert loaded.hits == len(loaded.entries)
+
+    assert not TypeCache.load(tmp_path / "missing.cache").entries
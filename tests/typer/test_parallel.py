@@ -0,0 +1,56 @@
+import pytest
+
+from compiler.parser.parser import Parser
+from compiler.scanner.scanner import Scanner
+from compiler.typer.cache import TypeCache
+from compiler.typer.call_graph import CallGraph
+from compiler.typer.typer import TyperException
+from tests.test_util import open_file
+from tests.typer.util import type_program
+
+
+def test_parallel(valid_typed_file: str):
+    """Ensure that typing in parallel results in the same types as typing sequentially."""
+    program = open_file(valid_typed_file)
+    expected = str(type_program(program))
+    assert str(type_program(program, workers=4)) == expected
+
+
+def test_call_graph_groups():
+    program = """
+var g = 1;
+id(x) { return x; }
+inc(x) { return x + g; }
+twice(x) { return inc(inc(x)); }
+main() { var a = id(1); }
+id(x) { return x; }
+"""
+    tree = Parser(program).parse(Scanner(program).scan())
+    call_graph = CallGraph(tree)
+    assert call_graph.groups() == [[0, 2, 3], [1, 4, 5]]
+    assert call_graph.partition(1) == [[0, 1, 2, 3, 4, 5]]
+    assert call_graph.partition(4) == [[0, 2, 3], [1, 4, 5]]
+
+
+def test_parallel_errors():
+    """Ensure that the errors of parallel typing are identical to those of sequential typing."""
+    program = """
+f(x) { return x + 'c'; }
+g(x) { return x && 1; }
+h(x) { return undefined(x); }
+"""
+    with pytest.raises(TyperException) as sequential:
+        type_program(program)
+    with pytest.raises(TyperException) as parallel:
+        type_program(program, workers=3)
+    assert str(parallel.value) == str(sequential.value)
+
+
+def test_parallel_cache():
+    program = open_file("data/given/valid/bool.spl")
+    cache = TypeCache()
+    expected = str(type_program(program, cache, workers=2))
+    assert cache.entries
+
+    assert str(type_program(program, cache, workers=2)) == expected
+    assert cache.hits == len(cache.entries)
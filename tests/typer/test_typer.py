@@ -1,14 +1,25 @@
+from compiler.token import Token
+from compiler.type import Type
+
+from compiler.error.typer_error import (  # isort:skip
+    BinaryUnifyErrorFactory,
+    DefaultUnifyErrorFactory,
+    UnificationError,
+)
 from compiler.tree.tree import (  # isort:skip
     BoolTypeNode,
+    CharTypeNode,
     FunDeclNode,
     FunTypeNode,
+    IntTypeNode,
     ListNode,
+    Op2Node,
     SPLNode,
     TupleNode,
     VarDeclNode,
 )
 
-from tests.typer.util import type_tree
+from tests.typer.util import type_program, type_tree
 
 
 def test_typer(valid_typed_file: str):
@@ -54,3 +65,44 @@ def test_complex_fields():
         case _:
             print(tree)
             raise Exception("Did not match expected typing scheme.")
+
+
+def test_huge_string_literal():
+    """Ensure that typing a long string does not recurse once per character."""
+    program = 'main(){ var s = "' + "a" * 5000 + '"; return; }'
+    tree = type_program(program)
+
+    match tree:
+        case SPLNode(body=[FunDeclNode(var_decl=[VarDeclNode(type=ListNode(body))])]):
+            assert body == CharTypeNode()
+
+        case _:
+            raise Exception("Did not match expected typing scheme.")
+
+
+def test_huge_colon_chain():
+    """Ensure that typing a long chain of `:` does not recurse once per element."""
+    program = "main(){ var s = " + "1 : " * 2000 + "[]; return; }"
+    tree = type_program(program)
+
+    match tree:
+        case SPLNode(body=[FunDeclNode(var_decl=[VarDeclNode(type=ListNode(body))])]):
+            assert body == IntTypeNode()
+
+        case _:
+            raise Exception("Did not match expected typing scheme.")
+
+
+def test_error_frame_materialize():
+    """Ensure that error frames are only turned into error factories on demand."""
+    op = Op2Node(IntTypeNode(), Token(":", Type.COLON), IntTypeNode())
+
+    factory = UnificationError.materialize((BinaryUnifyErrorFactory, op))
+    assert isinstance(factory, BinaryUnifyErrorFactory)
+    assert factory.binary_op is op
+
+    assert UnificationError.materialize(factory) is factory
+    assert isinstance(
+        UnificationError.materialize(DefaultUnifyErrorFactory), DefaultUnifyErrorFactory
+    )
+    assert isinstance(UnificationError.materialize(None), DefaultUnifyErrorFactory)
@@ -1,19 +1,23 @@
 from compiler.parser.parser import Parser
 from compiler.scanner.scanner import Scanner
 from compiler.tree.tree import Node
+from compiler.typer.cache import TypeCache
 from compiler.typer.typer import Typer
 from tests.test_util import open_file
 
 
-def type_tree(filename: str) -> Node:
-    program: str = open_file(filename)
-
+def type_program(program: str, cache: TypeCache = None, workers: int = 1) -> Node:
     scanner = Scanner(program)
     tokens = scanner.scan()
 
     parser = Parser(program)
     tree = parser.parse(tokens)
 
-    typer = Typer(program)
+    typer = Typer(program, cache, workers)
     typer.type(tree)
     return tree
+
+
+def type_tree(filename: str) -> Node:
+    program: str = open_file(filename)
+    return type_program(program)